@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -46,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -88,6 +90,40 @@ DATABASES = {
 }
 
 
+# Cache
+# Redis when REDIS_URL is set (docker-compose), local memory otherwise so
+# development and tests run without a Redis server.
+
+REDIS_URL = os.environ.get('REDIS_URL')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': 'bridgeaid',
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bridgeaid',
+        }
+    }
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Exchange rates used to compare expenses across currencies (see core/fx.py)
+
+FX_RATES_FILE = os.environ.get('FX_RATES_FILE', BASE_DIR / 'fx_rates.json')
+FX_RATES_TTL = 3600
+
+# Largest batch accepted by the bulk vacancy/application endpoints (see core/bulk.py)
+
+BULK_MAX_ROWS = 1000
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -132,11 +168,63 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_ROOT = BASE_DIR / 'media'
 MEDIA_URL = '/media/'
 
+# Only these MEDIA_ROOT subdirectories are public; documents go through the
+# authorized download view, which hands the transfer to nginx when
+# MEDIA_ACCEL_REDIRECT is on (see core/protected.py).
+PUBLIC_MEDIA_DIRS = ['users/', 'variants/profile_pics/']
+MEDIA_ACCEL_REDIRECT = os.environ.get('MEDIA_ACCEL_REDIRECT', '0') == '1'
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+# Chunked document uploads (see core/uploads.py)
+
+UPLOAD_TEMP_DIR = MEDIA_ROOT / 'uploads'
+UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+UPLOAD_CHUNK_MAX_SIZE = 8 * 1024 * 1024
+UPLOAD_SESSION_TTL = 24 * 3600
+
+# Background document processing (see core/processing.py)
+
+PROCESSING_MAX_ATTEMPTS = 5
+PROCESSING_LOCK_TIMEOUT = 15 * 60
+
+# Streaming AI assistant (see core/assistant.py)
+
+ASSISTANT_BACKEND = os.environ.get('ASSISTANT_BACKEND', 'core.assistant.StubBackend')
+ASSISTANT_BACKEND_OPTIONS = {}
+
+# Conversation windows and summaries (see core/conversations.py)
+
+CONVERSATION_WINDOW = 20
+CONVERSATION_COMPACT_EVERY = 10
+CONVERSATION_COMPACT_BATCH = 200
+CONVERSATION_SUMMARIZER = 'core.conversations.extractive_summary'
+CONVERSATION_SUMMARY_MAX_CHARS = 4000
+
+# Visa case SLA and officer assignment (see core/workload.py)
+
+VISA_CASE_SLA_DAYS = 30
+VISA_CASE_AUTO_ASSIGN = True
+
+# Sampled request profiling, reported by manage.py perf_report (see core/profiling.py)
+
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_FLUSH_INTERVAL = 60
+PROFILING_FILE = os.environ.get('PROFILING_FILE', BASE_DIR / 'perf' / 'requests.jsonl')
+PROFILING_MAX_FINGERPRINTS = 20
+
+# Request principal: cached profile ids per user (see core/principals.py)
+
+PRINCIPAL_CACHE_TTL = 300
+
+# Stateless JWT authentication: seconds between revocation table reloads (see core/authentication.py)
+
+JWT_REVOCATION_REFRESH = 5
+
 AUTH_USER_MODEL = 'users.User'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
@@ -156,6 +244,8 @@ SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
     "UPDATE_LAST_LOGIN": True,
     'USERNAME_FIELD': 'email',
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.PrincipalTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.PrincipalTokenRefreshSerializer',
 }
 
 # CORS settings
@@ -22,4 +22,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/users/', include('users.urls')),
     path('api/', include('core.urls')),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+]
+
+for media_dir in settings.PUBLIC_MEDIA_DIRS:
+    urlpatterns += static(settings.MEDIA_URL + media_dir, document_root=settings.MEDIA_ROOT / media_dir)
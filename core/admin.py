@@ -1,7 +1,7 @@
 from django.contrib import admin
 from .models import (
     Employer, CandidateProfile, Vacancy, Application, Document,
-    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate,
+    VisaCase, VisaCaseStep, HousingListing, RelocationSuggestion, ExpenseEstimate,
     AIAssistantInteraction
 )
 
@@ -46,12 +46,25 @@ class DocumentAdmin(admin.ModelAdmin):
     readonly_fields = ['id', 'uploaded_at']
 
 
+class VisaCaseStepInline(admin.TabularInline):
+    model = VisaCaseStep
+    fields = ['name', 'status', 'data', 'author', 'created_at']
+    readonly_fields = fields
+    extra = 0
+    can_delete = False
+    ordering = ['created_at', 'id']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
 @admin.register(VisaCase)
 class VisaCaseAdmin(admin.ModelAdmin):
     list_display = ['application', 'assigned_officer', 'status', 'created_at']
     list_filter = ['status', 'created_at']
     search_fields = ['application__candidate__user__first_name', 'assigned_officer__first_name']
     readonly_fields = ['id', 'created_at', 'updated_at']
+    inlines = [VisaCaseStepInline]
 
 
 @admin.register(HousingListing)
@@ -0,0 +1,173 @@
+"""
+Streaming AI assistant.
+
+``assistant_stream`` is a native async view: under ASGI each open stream is
+a coroutine waiting on the backend, not a worker thread. The reply is sent as
+Server-Sent Events (``token`` frames, then ``done``). Both sides of the
+exchange are stored in one ``bulk_create`` once the stream ends. If the
+client disconnects or the backend fails, the partial reply is still stored,
+marked ``complete: false``.
+
+The backend sees the conversation window from :mod:`core.conversations`:
+the stored summary followed by the most recent turns.
+
+Backends are classes named by ``settings.ASSISTANT_BACKEND``. Each one
+implements ``async stream(messages)``, which yields text fragments.
+:class:`StubBackend` runs locally and is used in development and tests.
+"""
+import asyncio
+import json
+import logging
+import re
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import AuthenticationFailed
+
+from .authentication import StatelessJWTAuthentication
+from .conversations import awindow, compact
+from .models import AIAssistantInteraction, Application
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\S+\s*')
+
+
+class StubBackend:
+    """Streams a canned reply word by word; ``delay`` simulates model latency."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+
+    async def stream(self, messages):
+        prompt = messages[-1]['content']
+        reply = f'You asked: {prompt} ({len(messages) - 1} earlier messages in this conversation.)'
+        for token in _TOKEN_RE.findall(reply):
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield token
+
+
+def get_backend():
+    backend_class = import_string(settings.ASSISTANT_BACKEND)
+    return backend_class(**settings.ASSISTANT_BACKEND_OPTIONS)
+
+
+def sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+class _CsrfCheck(CsrfViewMiddleware):
+    def _reject(self, request, reason):
+        return reason
+
+
+async def authenticate(request):
+    """JWT first, as with the DRF views; session auth additionally needs a CSRF token."""
+    try:
+        result = await sync_to_async(StatelessJWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    if _CsrfCheck(lambda request: None).process_view(request, None, (), {}) is not None:
+        return None
+    return user
+
+
+async def can_use_application(user, application_id):
+    return await Application.objects.filter(
+        Q(candidate__user=user) | Q(vacancy__employer__user=user), pk=application_id,
+    ).aexists()
+
+
+async def save_exchange(user, application_id, prompt, tokens, metadata):
+    return await AIAssistantInteraction.objects.abulk_create([
+        AIAssistantInteraction(user=user, application_id=application_id, role='user', message=prompt),
+        AIAssistantInteraction(
+            user=user, application_id=application_id, role='assistant',
+            message=''.join(tokens), metadata=metadata,
+        ),
+    ])
+
+
+async def reply_events(user, application_id, prompt, messages, backend, compaction_due=False):
+    tokens = []
+    save_attempted = False
+    started = time.monotonic()
+
+    def metadata(complete):
+        return {
+            'backend': type(backend).__name__,
+            'complete': complete,
+            'tokens': len(tokens),
+            'duration_ms': round((time.monotonic() - started) * 1000),
+        }
+
+    try:
+        async for token in backend.stream(messages):
+            tokens.append(token)
+            yield sse('token', {'text': token})
+        # Set before saving: if the save itself fails, the finally block must not store the exchange again.
+        save_attempted = True
+        _, reply = await save_exchange(user, application_id, prompt, tokens, metadata(True))
+        yield sse('done', {'id': str(reply.pk), 'message': reply.message})
+    except Exception:
+        logger.exception('Assistant backend failed')
+        yield sse('error', {'detail': 'The assistant could not finish this reply.'})
+    else:
+        if compaction_due:
+            try:
+                await sync_to_async(compact)(user, application_id)
+            except Exception:
+                logger.exception('Conversation compaction failed')
+    finally:
+        # Also runs when the client disconnects and the generator is closed.
+        if not save_attempted:
+            await asyncio.shield(save_exchange(user, application_id, prompt, tokens, metadata(False)))
+
+
+@csrf_exempt
+@require_POST
+async def assistant_stream(request):
+    user = await authenticate(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    try:
+        body = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'detail': 'Body must be JSON.'}, status=400)
+    prompt = body.get('message') if isinstance(body, dict) else None
+    if not isinstance(prompt, str) or not prompt.strip():
+        return JsonResponse({'message': ['This field is required.']}, status=400)
+
+    application_id = body.get('application')
+    if application_id is not None:
+        try:
+            allowed = await can_use_application(user, application_id)
+        except ValidationError:
+            allowed = False
+        if not allowed:
+            return JsonResponse({'application': ['Unknown application.']}, status=400)
+
+    window = await awindow(user, application_id)
+    messages = window.as_prompt() + [{'role': 'user', 'content': prompt}]
+    response = StreamingHttpResponse(
+        reply_events(user, application_id, prompt, messages, get_backend(), window.compaction_due),
+        content_type='text/event-stream',
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
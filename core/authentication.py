@@ -0,0 +1,220 @@
+"""
+Stateless JWT authentication.
+
+Access tokens issued by ``/api/users/token/`` and ``/api/users/token/refresh/``
+carry the request principal (see :mod:`core.principals`) as claims:
+``is_staff``, ``employer_id``, ``candidate_id`` and an informational
+``role``. :class:`StatelessJWTAuthentication` trusts those signed claims. It
+checks the signature and expiry, then builds a ``User`` with only ``id``,
+``is_staff`` and ``is_active`` loaded and the principal already set, without
+touching the database. Other user fields load on first access, so views that
+need them still work. A real ``User`` instance is used rather than simplejwt's
+``TokenUser`` because views assign ``request.user`` to foreign keys.
+
+Claims can go stale. When a user gains or loses a profile, changes staff or
+active status (including through ``QuerySet.update()``), or is deleted,
+tokens issued before that moment fall back to the regular
+``JWTAuthentication`` path, which loads the row. Revoked tokens
+(``/api/users/token/revoke/`` and refresh tokens rotated out) are rejected.
+
+Both kinds of revocation are ``TokenRevocation`` rows, written when the
+surrounding transaction commits. Each process keeps a local copy: it loads
+every unexpired row on first use, then every ``JWT_REVOCATION_REFRESH``
+seconds applies the rows created in the last few minutes. That recent list is
+read through the cache, so with a shared cache one process per interval
+queries the table; losing the cache only costs a query. Checking a token is
+a dict lookup.
+"""
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from users.models import User
+from .models import TokenRevocation
+from .principals import Principal, build_principal
+
+RECENT_KEY = 'jwt:revocations:recent'
+# Rows created this recently are re-read on every refresh; a process idle for longer reloads them all.
+RECENT_WINDOW = 300
+
+
+def load_revocations(**filters):
+    return [
+        (jti, user_pk, issued_before.timestamp() if issued_before else 0, expires_at.timestamp())
+        for jti, user_pk, issued_before, expires_at in TokenRevocation.objects.filter(**filters).values_list(
+            'jti', 'user_pk', 'issued_before', 'expires_at',
+        )
+    ]
+
+
+class TokenRevocations:
+    """Process-local copy of the ``TokenRevocation`` table."""
+
+    def __init__(self):
+        self.tokens = {}  # jti -> exp
+        self.users = {}  # user id -> (issued-before, expires)
+        self.loaded_at = None
+        self.lock = threading.Lock()
+
+    def apply(self, jti, user_pk, issued_before, expires):
+        if jti:
+            self.tokens[jti] = expires
+        else:
+            self.users[user_pk] = (max(issued_before, self.users.get(user_pk, (0,))[0]), expires)
+
+    def refresh(self):
+        now = time.monotonic()
+        loaded_at = self.loaded_at
+        if loaded_at is not None and now - loaded_at < settings.JWT_REVOCATION_REFRESH:
+            return
+        with self.lock:
+            if self.loaded_at != loaded_at:
+                return
+            # The cached recent list may be one interval old, so it must cover two intervals of idling.
+            if loaded_at is None or now - loaded_at > RECENT_WINDOW - 2 * settings.JWT_REVOCATION_REFRESH:
+                rows = load_revocations(expires_at__gt=timezone.now())
+            else:
+                rows = cache.get(RECENT_KEY)
+                if rows is None:
+                    rows = load_revocations(created_at__gte=timezone.now() - timedelta(seconds=RECENT_WINDOW))
+                    cache.set(RECENT_KEY, rows, settings.JWT_REVOCATION_REFRESH)
+            for row in rows:
+                self.apply(*row)
+            epoch = time.time()
+            self.tokens = {jti: exp for jti, exp in self.tokens.items() if exp > epoch}
+            self.users = {user_id: marker for user_id, marker in self.users.items() if marker[1] > epoch}
+            self.loaded_at = now
+
+    def is_revoked(self, payload):
+        self.refresh()
+        return payload.get(api_settings.JTI_CLAIM) in self.tokens
+
+    def is_stale(self, payload):
+        self.refresh()
+        marker = self.users.get(claimed_user_id(payload))
+        return marker is not None and payload.get('iat', 0) <= marker[0]
+
+
+revocations = TokenRevocations()
+
+
+def record_revocations(build):
+    """Saves the rows ``build(now)`` returns once the surrounding transaction commits."""
+    def save():
+        rows = TokenRevocation.objects.bulk_create(build(timezone.now()))
+        cache.delete(RECENT_KEY)
+        with revocations.lock:
+            for row in rows:
+                revocations.apply(
+                    row.jti, row.user_pk, row.issued_before.timestamp() if row.issued_before else 0,
+                    row.expires_at.timestamp(),
+                )
+    transaction.on_commit(save)
+
+
+def revoke_token(payload):
+    """Rejects the token with this payload until it expires."""
+    expires_at = datetime.fromtimestamp(payload['exp'], tz=dt_timezone.utc)
+    record_revocations(lambda now: [TokenRevocation(jti=payload[api_settings.JTI_CLAIM], expires_at=expires_at)])
+
+
+def expire_claims(*user_pks):
+    """Sends these users' current tokens through the database until they expire."""
+    lifetime = api_settings.ACCESS_TOKEN_LIFETIME
+    record_revocations(lambda now: [
+        TokenRevocation(user_pk=user_pk, issued_before=now, expires_at=now + lifetime) for user_pk in user_pks
+    ])
+
+
+def purge_expired_revocations(now=None):
+    """Deletes revocations whose tokens have expired. Returns the count."""
+    return TokenRevocation.objects.filter(expires_at__lte=now or timezone.now()).delete()[0]
+
+
+def claimed_user_id(payload):
+    # simplejwt writes the user id claim as a string.
+    return User._meta.pk.to_python(payload.get(api_settings.USER_ID_CLAIM))
+
+
+def set_principal_claims(token, principal):
+    token['is_staff'] = principal.is_staff
+    token['employer_id'] = str(principal.employer_id) if principal.employer_id else None
+    token['candidate_id'] = str(principal.candidate_id) if principal.candidate_id else None
+    token['role'] = principal.role
+    return token
+
+
+def principal_from_claims(payload):
+    employer_id, candidate_id = payload['employer_id'], payload['candidate_id']
+    return Principal(
+        claimed_user_id(payload), payload['is_staff'],
+        uuid.UUID(employer_id) if employer_id else None,
+        uuid.UUID(candidate_id) if candidate_id else None,
+    )
+
+
+class PrincipalAccessToken(AccessToken):
+    @classmethod
+    def for_user(cls, user):
+        return set_principal_claims(super().for_user(user), build_principal(user))
+
+
+class PrincipalRefreshToken(RefreshToken):
+    access_token_class = PrincipalAccessToken
+    # Principal claims are read fresh for every access token, never copied from the refresh token.
+    no_copy_claims = RefreshToken.no_copy_claims + ('is_staff', 'employer_id', 'candidate_id', 'role')
+
+    @property
+    def access_token(self):
+        user = User.objects.only('is_staff').get(pk=self[api_settings.USER_ID_CLAIM])
+        return set_principal_claims(super().access_token, build_principal(user))
+
+
+class PrincipalTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = PrincipalRefreshToken
+
+
+class PrincipalTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = PrincipalRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocations.is_revoked(refresh.payload):
+            raise TokenError(_('Token is blacklisted'))
+        data = super().validate(attrs)
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            revoke_token(refresh.payload)
+        return data
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that answers from the token's principal claims while they are current."""
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        token = self.get_validated_token(raw_token)
+        if revocations.is_revoked(token.payload):
+            raise InvalidToken(_('Token is blacklisted'))
+        if 'role' not in token or revocations.is_stale(token.payload):
+            return self.get_user(token), token
+        principal = principal_from_claims(token.payload)
+        user = User.from_db(DEFAULT_DB_ALIAS, ['id', 'is_staff', 'is_active'], [principal.user_id, principal.is_staff, True])
+        getattr(request, '_request', request)._principal = principal
+        return user, token
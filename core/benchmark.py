@@ -0,0 +1,197 @@
+"""
+Local load driver for the main API flows.
+
+:class:`BenchmarkDriver` sends requests through ``django.test.Client``, so
+each one runs the full middleware, authentication and view stack in-process
+with no network in between. It authenticates with JWT bearer tokens as the
+synthetic users from :mod:`core.synthetic`. For every request it records the
+wall time and the number of SQL statements. The response cache is cleared
+before each request unless ``warm_cache`` is set, so query counts reflect
+the work a cache miss costs and stay deterministic.
+
+:func:`compare` checks a run against a saved baseline. A flow regresses when
+its p95 latency grows by more than the tolerance, or when it issues more
+queries than before. ``manage.py benchmark`` wraps the whole process.
+"""
+import json
+import math
+import random
+import time
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+
+from users.models import User
+from .authentication import PrincipalAccessToken
+from .models import CandidateProfile, Vacancy
+from .profiling import QueryRecorder
+from .synthetic import CITIES, bench_email
+
+FLOWS = (
+    'vacancy_list', 'apply', 'document_list', 'dashboard', 'housing_search',
+    'candidate_applications', 'employer_vacancies', 'vacancy_applications', 'officer_queue',
+)
+ACTORS = 50
+# Latency changes smaller than this are noise on any machine.
+LATENCY_FLOOR_MS = 2.0
+
+
+def nearest_rank(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)) - 1, 0)]
+
+
+@dataclass
+class FlowResult:
+    name: str
+    latencies_ms: list = field(default_factory=list)
+    queries: list = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self):
+        count = len(self.latencies_ms)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'p50_ms': round(nearest_rank(self.latencies_ms, 0.50), 2),
+            'p95_ms': round(nearest_rank(self.latencies_ms, 0.95), 2),
+            'p99_ms': round(nearest_rank(self.latencies_ms, 0.99), 2),
+            'max_ms': round(max(self.latencies_ms, default=0.0), 2),
+            'mean_queries': round(sum(self.queries) / count, 2) if count else 0.0,
+            'max_queries': max(self.queries, default=0),
+        }
+
+
+class BenchmarkDriver:
+    def __init__(self, seed=0, warm_cache=False):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.warm_cache = warm_cache
+        self.client = Client()
+        self.tokens = {}
+        self.applicant = None
+        self.unapplied = []
+
+    def setup(self):
+        emails = [bench_email('candidate', index, self.seed) for index in range(ACTORS)]
+        self.candidates = list(User.objects.filter(email__in=emails).order_by('pk'))
+        if not self.candidates:
+            raise LookupError(f'No synthetic users for seed {self.seed}; run populate_db --scale first')
+        self.open_vacancies = list(Vacancy.objects.filter(status='open').values_list('pk', flat=True))
+        if not self.open_vacancies:
+            raise LookupError('No open vacancies to apply to')
+        emails = [bench_email('employer', index, self.seed) for index in range(ACTORS)]
+        self.employers = list(User.objects.filter(email__in=emails, employer_profile__isnull=False).order_by('pk'))
+        self.employer_vacancies = {}
+        for user_id, vacancy_id in Vacancy.objects.filter(employer__user__in=self.employers).values_list(
+            'employer__user_id', 'pk',
+        ):
+            self.employer_vacancies.setdefault(user_id, []).append(vacancy_id)
+        emails = [bench_email('officer', index, self.seed) for index in range(ACTORS)]
+        self.officers = list(User.objects.filter(email__in=emails, is_staff=True).order_by('pk'))
+
+    def headers(self, user):
+        if user.pk not in self.tokens:
+            self.tokens[user.pk] = str(PrincipalAccessToken.for_user(user))
+        return {'HTTP_AUTHORIZATION': f'Bearer {self.tokens[user.pk]}'}
+
+    def next_applicant(self):
+        """A fresh candidate per sweep of the open vacancies, so every apply creates a row."""
+        if not self.unapplied:
+            index = self.rng.getrandbits(32)
+            self.applicant = User.objects.create(
+                email=bench_email('applicant', index, self.seed), password=make_password(None),
+            )
+            CandidateProfile.objects.create(user=self.applicant)
+            self.unapplied = list(self.open_vacancies)
+            self.rng.shuffle(self.unapplied)
+        return self.applicant, self.unapplied.pop()
+
+    def request(self, flow):
+        """Returns ``(user, method, path, payload)`` for one request of ``flow``."""
+        user = self.rng.choice(self.candidates)
+        if flow == 'vacancy_list':
+            return user, 'get', '/api/vacancies/', None
+        if flow == 'apply':
+            applicant, vacancy_id = self.next_applicant()
+            return applicant, 'post', '/api/applications/bulk/', [
+                {'vacancy': str(vacancy_id), 'cover_letter': 'Benchmark application.'},
+            ]
+        if flow == 'document_list':
+            return user, 'get', '/api/users/documents/', None
+        if flow == 'dashboard':
+            return user, 'get', '/api/dashboard/stats/', None
+        if flow == 'housing_search':
+            lat, lon = self.rng.choice(list(CITIES.values()))
+            lat, lon = lat + self.rng.uniform(-0.02, 0.02), lon + self.rng.uniform(-0.02, 0.02)
+            return user, 'get', f'/api/housing/nearby/?lat={lat:.5f}&lon={lon:.5f}', None
+        if flow == 'candidate_applications':
+            return user, 'get', '/api/candidates/applications/', None
+        if flow == 'employer_vacancies':
+            return self.rng.choice(self.employers), 'get', '/api/employers/vacancies/', None
+        if flow == 'vacancy_applications':
+            employer = self.rng.choice([user for user in self.employers if user.pk in self.employer_vacancies])
+            vacancy_id = self.rng.choice(self.employer_vacancies[employer.pk])
+            return employer, 'get', f'/api/vacancies/{vacancy_id}/applications/', None
+        if flow == 'officer_queue':
+            return self.rng.choice(self.officers), 'get', '/api/officers/visa-cases/queue/', None
+        raise ValueError(f'Unknown flow {flow!r}')
+
+    def send(self, flow, result=None):
+        user, method, path, payload = self.request(flow)
+        headers = self.headers(user)
+        if not self.warm_cache:
+            cache.clear()
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            started = time.perf_counter()
+            if payload is None:
+                response = getattr(self.client, method)(path, **headers)
+            else:
+                response = getattr(self.client, method)(
+                    path, data=json.dumps(payload), content_type='application/json', **headers,
+                )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        if result is not None:
+            if response.status_code >= 400:
+                result.errors += 1
+            result.latencies_ms.append(elapsed_ms)
+            result.queries.append(recorder.count)
+        return response
+
+    def run(self, flows=FLOWS, requests=100, warmup=10):
+        """Runs ``warmup`` unmeasured then ``requests`` measured requests per flow."""
+        self.setup()
+        results = {}
+        # Token revocations are reloaded once per interval per process, not per request; hold the
+        # first load for the run so query counts stay deterministic.
+        with override_settings(JWT_REVOCATION_REFRESH=math.inf):
+            for flow in flows:
+                for _ in range(warmup):
+                    self.send(flow)
+                result = results[flow] = FlowResult(flow)
+                for _ in range(requests):
+                    self.send(flow, result)
+        return {flow: result.summary() for flow, result in results.items()}
+
+
+def compare(current, baseline, latency_tolerance=0.25, latency_floor_ms=LATENCY_FLOOR_MS):
+    """Lists the regressions of ``current`` flow summaries against ``baseline``."""
+    regressions = []
+    for flow, stats in current.items():
+        base = baseline.get(flow)
+        if base is None:
+            continue
+        limit = max(base['p95_ms'] * (1 + latency_tolerance), base['p95_ms'] + latency_floor_ms)
+        if stats['p95_ms'] > limit:
+            regressions.append(f"{flow}: p95 {stats['p95_ms']:.1f}ms > {limit:.1f}ms (baseline {base['p95_ms']:.1f}ms)")
+        if stats['max_queries'] > base['max_queries']:
+            regressions.append(f"{flow}: {stats['max_queries']} queries > baseline {base['max_queries']}")
+        if stats['errors'] > base.get('errors', 0):
+            regressions.append(f"{flow}: {stats['errors']} errors > baseline {base.get('errors', 0)}")
+    return regressions
@@ -0,0 +1,197 @@
+"""
+Bulk vacancy and application writes.
+
+Rows arrive as a JSON array or as NDJSON (``application/x-ndjson``, one
+object per line). Every row is validated by the regular serializer, errors
+are reported per row, and only a fully valid batch is written, with
+``bulk_create``/``bulk_update`` inside one transaction.
+
+``bulk_create`` and ``bulk_update`` skip model signals, so the work of the
+handlers in ``core.signals`` (search indexing, queueing match re-scores,
+dashboard counters and cache invalidation) is done here once per batch.
+"""
+import json
+import uuid
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ParseError, ValidationError
+from rest_framework.parsers import BaseParser
+
+from .caching import invalidate_tags_on_commit
+from .counters import reconcile_counters
+from .models import Application, Vacancy
+from .processing import enqueue_many
+from .scoring import sync_application_scores
+from .search import index_vacancies
+
+BATCH_SIZE = 500
+ALREADY_APPLIED = 'You have already applied to this vacancy.'
+
+
+class NDJSONParser(BaseParser):
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', settings.DEFAULT_CHARSET)
+        rows = []
+        if stream is None:
+            return rows
+        for number, line in enumerate(stream, start=1):
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                rows.append(json.loads(line))
+            except ValueError as exc:
+                raise ParseError(f'NDJSON parse error on line {number}: {exc}')
+        return rows
+
+
+@dataclass
+class BulkResult:
+    created: list = field(default_factory=list)
+    updated: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+    # The errors come from a concurrent write rather than from the rows themselves.
+    conflict: bool = False
+
+
+def get_rows(data):
+    if not isinstance(data, list):
+        raise ValidationError({'non_field_errors': ['Expected a JSON array or NDJSON rows.']})
+    if not data:
+        raise ValidationError({'non_field_errors': ['No rows submitted.']})
+    if len(data) > settings.BULK_MAX_ROWS:
+        raise ValidationError({'non_field_errors': [f'At most {settings.BULK_MAX_ROWS} rows per request.']})
+    return data
+
+
+def validate_rows(serializer, rows):
+    """
+    Runs the child of a ``many=True`` serializer over ``rows`` and returns
+    ``(validated, errors)`` aligned with ``rows``; unlike
+    ``ListSerializer.is_valid`` the valid rows keep their data.
+    """
+    validated, errors = [], []
+    for row in rows:
+        try:
+            validated.append(serializer.child.run_validation(row))
+            errors.append({})
+        except ValidationError as exc:
+            validated.append(None)
+            errors.append(exc.detail)
+    return validated, errors
+
+
+def row_errors(errors):
+    return [{'row': index, 'errors': error} for index, error in enumerate(errors) if error]
+
+
+def parse_pk(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def write_vacancies(employer, rows, serializer_class, context=None):
+    """
+    Creates rows without an ``id`` and partially updates rows with the
+    ``id`` of one of ``employer``'s vacancies.
+    """
+    create_indexes = [i for i, row in enumerate(rows) if not (isinstance(row, dict) and row.get('id'))]
+    update_indexes = [i for i, row in enumerate(rows) if isinstance(row, dict) and row.get('id')]
+
+    errors = [{} for _ in rows]
+    validated = [None for _ in rows]
+    for indexes, partial in ((create_indexes, False), (update_indexes, True)):
+        serializer = serializer_class(data=[rows[i] for i in indexes], many=True, partial=partial, context=context)
+        for i, data, error in zip(indexes, *validate_rows(serializer, [rows[i] for i in indexes])):
+            validated[i], errors[i] = data, error
+
+    pks = {i: parse_pk(rows[i]['id']) for i in update_indexes}
+    existing = Vacancy.objects.filter(employer=employer).in_bulk([pk for pk in pks.values() if pk])
+    for i, pk in pks.items():
+        if existing.get(pk) is None:
+            errors[i] = {**errors[i], 'id': ['Vacancy not found.']}
+
+    result = BulkResult(errors=row_errors(errors))
+    if result.errors:
+        return result
+
+    created = [Vacancy(employer=employer, **validated[i]) for i in create_indexes]
+    updated = []
+    update_fields = set()
+    for i in update_indexes:
+        vacancy = existing[pks[i]]
+        for attr, value in validated[i].items():
+            setattr(vacancy, attr, value)
+        update_fields.update(validated[i])
+        updated.append(vacancy)
+
+    with transaction.atomic():
+        Vacancy.objects.bulk_create(created, batch_size=BATCH_SIZE)
+        if updated and update_fields:
+            Vacancy.objects.bulk_update(updated, sorted(update_fields), batch_size=BATCH_SIZE)
+        written = created + updated
+        index_vacancies(written)
+        reconcile_counters([employer.user_id])
+        invalidate_tags_on_commit('vacancies', *(f'vacancy:{vacancy.pk}' for vacancy in written))
+        # Same test as core.signals: only new skills need a re-score.
+        to_score = [vacancy.pk for vacancy in created if vacancy.skills]
+        to_score += [vacancy.pk for vacancy in updated if vacancy.skills != vacancy._scored_skills]
+        if to_score:
+            transaction.on_commit(lambda: enqueue_many('score_vacancy', to_score))
+
+    result.created = [vacancy.pk for vacancy in created]
+    result.updated = [vacancy.pk for vacancy in updated]
+    return result
+
+
+def write_applications(candidate, rows, serializer_class, context=None):
+    """Creates one application by ``candidate`` per row."""
+    serializer = serializer_class(data=rows, many=True, context=context)
+    validated, errors = validate_rows(serializer, rows)
+
+    vacancy_ids = {data['vacancy_id'] for data in validated if data}
+    vacancies = dict(Vacancy.objects.filter(pk__in=vacancy_ids).values_list('pk', 'employer__user_id'))
+    applied = set(
+        Application.objects.filter(candidate=candidate, vacancy_id__in=vacancy_ids).values_list('vacancy_id', flat=True)
+    )
+    seen = set()
+    for i, data in enumerate(validated):
+        if data is None:
+            continue
+        vacancy_id = data['vacancy_id']
+        if vacancy_id not in vacancies:
+            errors[i] = {'vacancy': ['Vacancy not found.']}
+        elif vacancy_id in applied:
+            errors[i] = {'vacancy': [ALREADY_APPLIED]}
+        elif vacancy_id in seen:
+            errors[i] = {'vacancy': ['Duplicate vacancy in this request.']}
+        seen.add(vacancy_id)
+
+    result = BulkResult(errors=row_errors(errors))
+    if result.errors:
+        return result
+
+    created = [Application(candidate=candidate, **data) for data in validated]
+    try:
+        with transaction.atomic():
+            Application.objects.bulk_create(created, batch_size=BATCH_SIZE)
+            sync_application_scores(Application.objects.filter(pk__in=[application.pk for application in created]))
+            reconcile_counters({candidate.user_id, *(vacancies[data['vacancy_id']] for data in validated)})
+    except IntegrityError:
+        # Another request applied to one of these vacancies since the check above.
+        applied = set(
+            Application.objects.filter(candidate=candidate, vacancy_id__in=vacancy_ids).values_list('vacancy_id', flat=True)
+        )
+        if not applied:
+            raise
+        errors = [{'vacancy': [ALREADY_APPLIED]} if data['vacancy_id'] in applied else {} for data in validated]
+        return BulkResult(errors=row_errors(errors), conflict=True)
+
+    result.created = [application.pk for application in created]
+    return result
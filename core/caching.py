@@ -0,0 +1,159 @@
+"""
+Response caching with tag-based invalidation.
+
+Every cached entry is stored under a key that embeds the current version of
+each of its tags. Invalidating a tag bumps its version, so every entry that
+carried it becomes unreachable at once and simply ages out of the backend.
+Writers invalidate on commit, so readers never cache rows that are about to
+change under a version that is already current.
+This only needs ``get_many``/``incr``, so it works the same on Redis and on
+the local-memory fallback used in development and tests.
+
+Cache failures are logged and treated as misses; a Redis outage degrades to
+uncached responses instead of errors.
+"""
+import hashlib
+import logging
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+logger = logging.getLogger(__name__)
+
+
+class TaggedCache:
+    def __init__(self, alias='default', prefix='response'):
+        self.alias = alias
+        self.prefix = prefix
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def tag_key(tag):
+        return f'tag:{tag}'
+
+    def versions(self, tags):
+        keys = [self.tag_key(tag) for tag in tags]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # A fresh version must never collide with one evicted earlier.
+                self.cache.add(key, time.time_ns(), timeout=None)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def make_key(self, key, tags):
+        tags = sorted(tags)
+        stamp = '|'.join(f'{tag}={version}' for tag, version in zip(tags, self.versions(tags)))
+        digest = hashlib.sha1(f'{key}|{stamp}'.encode()).hexdigest()
+        return f'{self.prefix}:{digest}'
+
+    def get(self, key, tags):
+        try:
+            return self.cache.get(self.make_key(key, tags))
+        except Exception:
+            logger.warning('Cache read failed for %s', key, exc_info=True)
+            return None
+
+    def set(self, key, tags, value, timeout=None):
+        try:
+            self.cache.set(self.make_key(key, tags), value, timeout)
+        except Exception:
+            logger.warning('Cache write failed for %s', key, exc_info=True)
+
+    def invalidate(self, *tags):
+        for tag in tags:
+            key = self.tag_key(tag)
+            try:
+                try:
+                    self.cache.incr(key)
+                except ValueError:
+                    self.cache.set(key, time.time_ns(), timeout=None)
+            except Exception:
+                logger.warning('Cache invalidation failed for tag %s', tag, exc_info=True)
+
+
+response_cache = TaggedCache()
+
+
+def invalidate_tags(*tags):
+    response_cache.invalidate(*tags)
+
+
+def invalidate_tags_on_commit(*tags):
+    """
+    Invalidates ``tags`` once the surrounding transaction commits. Bumping
+    earlier would let a concurrent request re-cache the old rows under the
+    new version; with no transaction open this runs immediately.
+    """
+    transaction.on_commit(lambda: invalidate_tags(*tags))
+
+
+def cached_response(key, tags, produce, timeout=None):
+    """Returns the cached data for ``key`` or calls ``produce()`` and caches a 200 response."""
+    data = response_cache.get(key, tags)
+    if data is not None:
+        return Response(data)
+
+    response = produce()
+    if response.status_code == 200:
+        response_cache.set(key, tags, response.data, timeout if timeout is not None else settings.RESPONSE_CACHE_TIMEOUT)
+    return response
+
+
+def response_cache_key(request, name, per_user=False):
+    parts = [name, request.build_absolute_uri()]
+    if per_user:
+        parts.append(f'user={request.user.pk}')
+    return '|'.join(parts)
+
+
+def cache_response(get_tags, per_user=False, timeout=None):
+    """
+    Decorator for function views; place it below ``@api_view`` so it sees
+    the authenticated DRF request. ``get_tags(request, **kwargs)`` returns
+    the tags the response depends on.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET':
+                return view(request, *args, **kwargs)
+            key = response_cache_key(request, view.__name__, per_user)
+            return cached_response(
+                key, get_tags(request, **kwargs),
+                lambda: view(request, *args, **kwargs), timeout,
+            )
+        return wrapper
+    return decorator
+
+
+class CachedResponseMixin:
+    """
+    Caches successful GET responses of a DRF view.
+
+    ``cache_tags`` lists the tags the response depends on (override
+    ``get_cache_tags`` for per-object tags); ``cache_per_user`` keys entries
+    by the requesting user for responses that differ between users.
+    """
+
+    cache_tags = ()
+    cache_per_user = False
+    cache_timeout = None
+
+    def get_cache_tags(self):
+        return list(self.cache_tags)
+
+    def get(self, request, *args, **kwargs):
+        key = response_cache_key(request, type(self).__name__, self.cache_per_user)
+        return cached_response(
+            key, self.get_cache_tags(),
+            lambda: super(CachedResponseMixin, self).get(request, *args, **kwargs),
+            self.cache_timeout,
+        )
@@ -0,0 +1,165 @@
+"""
+Windowed conversation history for the AI assistant.
+
+A conversation is everything one user said to the assistant about one
+application, or with no application at all. :func:`window` returns the last
+``turns`` messages plus the stored summary of the turns before them. It is a
+single query on the ``(user, application, created_at, id)`` index, so its
+cost does not grow with the length of the history. Once enough messages have
+fallen out of the window, :func:`compact` folds them into the
+:class:`~core.models.ConversationSummary`, ``CONVERSATION_COMPACT_BATCH``
+messages at a time so a long backlog never loads at once. The summarizer is named by
+``settings.CONVERSATION_SUMMARIZER``.
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Subquery
+from django.utils.module_loading import import_string
+
+from .models import AIAssistantInteraction, ConversationSummary
+
+SUMMARY_LINE_CHARS = 200
+_SENTENCE_RE = re.compile(r'(.+?[.!?])(\s|$)', re.S)
+
+
+@dataclass
+class Window:
+    summary: str = ''
+    summarized_turns: int = 0
+    messages: list = field(default_factory=list)
+    # Messages older than the window that no summary covers yet.
+    pending: int = 0
+
+    @property
+    def compaction_due(self):
+        return self.pending >= settings.CONVERSATION_COMPACT_EVERY
+
+    def as_prompt(self):
+        """Backend input: the summary as a system message, then the window oldest first."""
+        prompt = [{'role': 'system', 'content': f'Summary of the earlier conversation:\n{self.summary}'}] if self.summary else []
+        return prompt + [{'role': message.role, 'content': message.message} for message in self.messages]
+
+
+def window_queryset(user, application_id, turns):
+    summary = ConversationSummary.objects.filter(user=user, application_id=application_id)
+    return (
+        AIAssistantInteraction.objects
+        .filter(user=user, application_id=application_id)
+        .annotate(
+            summary_text=Subquery(summary.values('summary')[:1]),
+            summary_turns=Subquery(summary.values('turns')[:1]),
+            summary_until=Subquery(summary.values('covered_until')[:1]),
+            summary_until_id=Subquery(summary.values('covered_until_id')[:1]),
+        )
+        .only('id', 'role', 'message', 'metadata', 'created_at')
+        .order_by('-created_at', '-id')[:turns + settings.CONVERSATION_COMPACT_EVERY]
+    )
+
+
+def uncovered_filter(until, until_id):
+    """Messages after the ``(covered_until, covered_until_id)`` boundary."""
+    if until_id is None:
+        return Q(created_at__gt=until)
+    return Q(created_at__gt=until) | Q(created_at=until, id__gt=until_id)
+
+
+def build_window(rows, turns):
+    if not rows:
+        return Window()
+    first = rows[0]
+    until, until_id = first.summary_until, first.summary_until_id
+    uncovered = [
+        row for row in rows
+        if until is None or row.created_at > until
+        or (until_id is not None and row.created_at == until and row.id > until_id)
+    ]
+    return Window(
+        summary=first.summary_text or '',
+        summarized_turns=first.summary_turns or 0,
+        messages=uncovered[:turns][::-1],
+        pending=max(len(uncovered) - turns, 0),
+    )
+
+
+def window(user, application_id=None, turns=None):
+    turns = turns or settings.CONVERSATION_WINDOW
+    return build_window(list(window_queryset(user, application_id, turns)), turns)
+
+
+async def awindow(user, application_id=None, turns=None):
+    turns = turns or settings.CONVERSATION_WINDOW
+    return build_window([row async for row in window_queryset(user, application_id, turns)], turns)
+
+
+def extractive_summary(previous, messages):
+    """Keeps the first sentence of each turn, dropping the oldest lines past ``CONVERSATION_SUMMARY_MAX_CHARS``."""
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        text = ' '.join(message['message'].split())
+        match = _SENTENCE_RE.match(text)
+        first = match.group(1) if match else text
+        if len(first) > SUMMARY_LINE_CHARS:
+            first = first[:SUMMARY_LINE_CHARS - 1].rstrip() + '…'
+        if first:
+            lines.append(f"{message['role']}: {first}")
+
+    limit = settings.CONVERSATION_SUMMARY_MAX_CHARS
+    total = sum(len(line) + 1 for line in lines)
+    while len(lines) > 1 and total > limit:
+        total -= len(lines.pop(0)) + 1
+    return '\n'.join(lines)
+
+
+def get_summarizer():
+    return import_string(settings.CONVERSATION_SUMMARIZER)
+
+
+def compact(user, application_id=None, keep=None, batch_size=None):
+    """
+    Summarizes every uncovered message older than the last ``keep``, oldest
+    first and at most ``batch_size`` per transaction; returns the summary row
+    or ``None``.
+    """
+    keep = settings.CONVERSATION_WINDOW if keep is None else keep
+    batch_size = batch_size or settings.CONVERSATION_COMPACT_BATCH
+    while True:
+        current, done = _compact_batch(user, application_id, keep, batch_size)
+        if done:
+            return current
+
+
+def _compact_batch(user, application_id, keep, batch_size):
+    with transaction.atomic():
+        current = (
+            ConversationSummary.objects.select_for_update()
+            .filter(user=user, application_id=application_id).first()
+        )
+        messages = AIAssistantInteraction.objects.filter(user=user, application_id=application_id)
+        if current is not None:
+            messages = messages.filter(uncovered_filter(current.covered_until, current.covered_until_id))
+        # The newest message that falls outside the window bounds the batch.
+        boundary = list(messages.order_by('-created_at', '-id').values_list('created_at', 'id')[keep:keep + 1])
+        if not boundary:
+            return current, True
+        until, last_id = boundary[0]
+        older = list(
+            messages.filter(Q(created_at__lt=until) | Q(created_at=until, id__lte=last_id))
+            .order_by('created_at', 'id').values('id', 'role', 'message', 'created_at')[:batch_size]
+        )
+
+        summary = get_summarizer()(current.summary if current else '', older)
+        if current is None:
+            current = ConversationSummary.objects.create(
+                user=user, application_id=application_id, summary=summary,
+                turns=len(older), covered_until=older[-1]['created_at'], covered_until_id=older[-1]['id'],
+            )
+        else:
+            current.summary = summary
+            current.turns += len(older)
+            current.covered_until = older[-1]['created_at']
+            current.covered_until_id = older[-1]['id']
+            current.save(update_fields=['summary', 'turns', 'covered_until', 'covered_until_id', 'updated_at'])
+        return current, len(older) < batch_size
@@ -0,0 +1,155 @@
+"""
+Materialized dashboard counters.
+
+``DashboardCounters`` holds one row per user so ``dashboard_stats`` is a
+single primary-key read. Rows are adjusted incrementally with ``F()``
+updates from the ``Vacancy``/``Application`` signal handlers in
+``core.signals``; :func:`reconcile_counters` recomputes them from scratch and
+is what ``manage.py reconcile_dashboard_counters`` runs to repair drift left
+by paths that bypass signals (``bulk_create``, ``update()``, raw SQL).
+"""
+from django.db.models import Count, F, Q
+
+from .caching import invalidate_tags_on_commit
+from .models import Employer, CandidateProfile, Vacancy, Application, DashboardCounters
+
+EMPLOYER_PENDING_STATUSES = ('applied', 'screening')
+CANDIDATE_PENDING_STATUSES = ('applied', 'screening', 'interview')
+
+# Counter field -> statuses it counts (None counts every row).
+EMPLOYER_VACANCY_COUNTERS = {
+    'employer_total_vacancies': None,
+    'employer_open_vacancies': ('open',),
+}
+EMPLOYER_APPLICATION_COUNTERS = {
+    'employer_total_applications': None,
+    'employer_pending_applications': EMPLOYER_PENDING_STATUSES,
+}
+CANDIDATE_APPLICATION_COUNTERS = {
+    'candidate_total_applications': None,
+    'candidate_pending_applications': CANDIDATE_PENDING_STATUSES,
+    'candidate_accepted_applications': ('accepted',),
+}
+COUNTER_FIELDS = [
+    'is_employer', 'is_candidate',
+    *EMPLOYER_VACANCY_COUNTERS, *EMPLOYER_APPLICATION_COUNTERS, *CANDIDATE_APPLICATION_COUNTERS,
+]
+
+
+def _counted(status, statuses):
+    return int(status is not None and (statuses is None or status in statuses))
+
+
+def apply_status_change(user_id, counters, old_status, new_status):
+    """
+    Adjusts ``counters`` for ``user_id`` when a row moves from ``old_status``
+    to ``new_status``; ``None`` stands for "row does not exist".
+    """
+    if user_id is None:
+        return
+    updates = {}
+    for field, statuses in counters.items():
+        delta = _counted(new_status, statuses) - _counted(old_status, statuses)
+        if delta:
+            updates[field] = F(field) + delta
+    if updates:
+        DashboardCounters.objects.filter(pk=user_id).update(**updates)
+        invalidate_tags_on_commit(dashboard_tag(user_id))
+
+
+def dashboard_tag(user_id):
+    return f'dashboard:{user_id}'
+
+
+def vacancy_changed(employer_id, old_status, new_status):
+    user_id = Employer.objects.filter(pk=employer_id).values_list('user_id', flat=True).first()
+    apply_status_change(user_id, EMPLOYER_VACANCY_COUNTERS, old_status, new_status)
+
+
+def application_changed(vacancy_id, candidate_id, old_status, new_status):
+    employer_user_id = Vacancy.objects.filter(pk=vacancy_id).values_list('employer__user_id', flat=True).first()
+    candidate_user_id = CandidateProfile.objects.filter(pk=candidate_id).values_list('user_id', flat=True).first()
+    apply_status_change(employer_user_id, EMPLOYER_APPLICATION_COUNTERS, old_status, new_status)
+    apply_status_change(candidate_user_id, CANDIDATE_APPLICATION_COUNTERS, old_status, new_status)
+
+
+def _aggregate(queryset, user_field, counters):
+    # Counting the non-null ``status`` keeps the grouped reads inside the (fk, status) indexes.
+    annotations = {
+        field: Count('status', filter=Q(status__in=statuses)) if statuses else Count('status')
+        for field, statuses in counters.items()
+    }
+    rows = queryset.values(user_field).annotate(**annotations)
+    return {row.pop(user_field): row for row in rows}
+
+
+def compute_counters(user_ids=None):
+    """Recomputes counters for ``user_ids`` (or everyone) with five grouped queries."""
+    employers = Employer.objects.all()
+    candidates = CandidateProfile.objects.all()
+    vacancies = Vacancy.objects.all()
+    employer_applications = Application.objects.all()
+    candidate_applications = Application.objects.all()
+    if user_ids is not None:
+        employers = employers.filter(user_id__in=user_ids)
+        candidates = candidates.filter(user_id__in=user_ids)
+        vacancies = vacancies.filter(employer__user_id__in=user_ids)
+        employer_applications = employer_applications.filter(vacancy__employer__user_id__in=user_ids)
+        candidate_applications = candidate_applications.filter(candidate__user_id__in=user_ids)
+
+    computed = {}
+    for user_id in employers.values_list('user_id', flat=True):
+        computed.setdefault(user_id, {'is_employer': False, 'is_candidate': False})['is_employer'] = True
+    for user_id in candidates.values_list('user_id', flat=True):
+        computed.setdefault(user_id, {'is_employer': False, 'is_candidate': False})['is_candidate'] = True
+
+    for counts in (
+        _aggregate(vacancies, 'employer__user_id', EMPLOYER_VACANCY_COUNTERS),
+        _aggregate(employer_applications, 'vacancy__employer__user_id', EMPLOYER_APPLICATION_COUNTERS),
+        _aggregate(candidate_applications, 'candidate__user_id', CANDIDATE_APPLICATION_COUNTERS),
+    ):
+        for user_id, values in counts.items():
+            if user_id in computed:
+                computed[user_id].update(values)
+
+    return [
+        DashboardCounters(user_id=user_id, **{field: values.get(field, 0) for field in COUNTER_FIELDS})
+        for user_id, values in computed.items()
+    ]
+
+
+def reconcile_counters(user_ids=None):
+    """Rewrites counter rows that drifted from the source tables. Returns the number repaired."""
+    expected = compute_counters(user_ids)
+    existing = DashboardCounters.objects.all()
+    if user_ids is not None:
+        existing = existing.filter(pk__in=user_ids)
+    current = {row[0]: row[1:] for row in existing.values_list('pk', *COUNTER_FIELDS)}
+
+    drifted = [
+        counters for counters in expected
+        if current.get(counters.user_id) != tuple(getattr(counters, field) for field in COUNTER_FIELDS)
+    ]
+    DashboardCounters.objects.bulk_create(
+        drifted,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=[*COUNTER_FIELDS, 'updated_at'],
+    )
+
+    stale = set(current) - {counters.user_id for counters in expected}
+    if stale:
+        DashboardCounters.objects.filter(pk__in=stale).delete()
+    invalidate_tags_on_commit(
+        *(dashboard_tag(counters.user_id) for counters in drifted), *map(dashboard_tag, stale),
+    )
+    return len(drifted) + len(stale)
+
+
+def get_counters(user):
+    counters = DashboardCounters.objects.filter(pk=user.pk).first()
+    if counters is None:
+        reconcile_counters([user.pk])
+        counters = DashboardCounters.objects.filter(pk=user.pk).first()
+    return counters
@@ -0,0 +1,180 @@
+"""
+Expense projections.
+
+:class:`ExpenseEstimator` projects daily and monthly living costs for many
+application × housing pairs at once with NumPy, converting rents into one
+currency through the cached FX table. The helpers below push ``daily_total``
+and its currency conversion into SQL so list endpoints can sort and
+aggregate without loading every row.
+"""
+import time
+from decimal import Decimal
+
+import numpy as np
+from django.db.models import (
+    Avg, Case, Count, DecimalField, Exists, ExpressionWrapper, F, Max, Min, OuterRef, Sum, Value, When,
+)
+from rest_framework.exceptions import ValidationError
+
+from .fx import get_rates
+from .models import ExpenseEstimate, RelocationSuggestion
+
+MONEY = DecimalField(max_digits=12, decimal_places=2)
+RATE = DecimalField(max_digits=20, decimal_places=10)
+CENT = Decimal('0.01')
+
+
+def daily_total_expression():
+    return ExpressionWrapper(F('daily_commute_cost') + F('daily_food_cost'), output_field=MONEY)
+
+
+def converted_expression(expression, target, currency_field='currency', rates=None):
+    rates = rates or get_rates()
+    multiplier = Case(
+        *[When(**{currency_field: code}, then=Value(rate, output_field=RATE))
+          for code, rate in rates.multipliers(target).items()],
+        output_field=RATE,
+    )
+    return ExpressionWrapper(expression * multiplier, output_field=MONEY)
+
+
+def annotate_totals(queryset, currency=None):
+    """Adds ``daily_total`` and, with ``currency``, ``converted_daily_total``."""
+    queryset = queryset.annotate(daily_total=daily_total_expression())
+    if currency:
+        queryset = queryset.annotate(converted_daily_total=converted_expression(daily_total_expression(), currency))
+    return queryset
+
+
+def summarize_by_vacancy(queryset, currency):
+    total = converted_expression(daily_total_expression(), currency)
+    return (
+        queryset
+        .values(vacancy_id=F('application__vacancy_id'), vacancy_title=F('application__vacancy__title'))
+        .annotate(
+            estimates=Count('pk'),
+            avg_daily_total=Avg(total),
+            min_daily_total=Min(total),
+            max_daily_total=Max(total),
+            sum_daily_total=Sum(total),
+        )
+        .order_by('-avg_daily_total')
+    )
+
+
+class ExpenseTotalsMixin:
+    """
+    Annotates ``daily_total`` in SQL for expense list views and honours
+    ``?currency=`` (adds ``converted_daily_total``; unknown codes are a 400)
+    and ``?ordering=[-]daily_total``.
+    """
+
+    ordering_fields = ('daily_total', 'converted_daily_total', 'created_at')
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        currency = self.request.query_params.get('currency')
+        if currency and currency not in get_rates().rates:
+            raise ValidationError({'currency': f'Unknown currency {currency}'})
+        queryset = annotate_totals(queryset, currency)
+        ordering = self.request.query_params.get('ordering')
+        if ordering and ordering.lstrip('-') in self.ordering_fields:
+            if ordering.lstrip('-') != 'converted_daily_total' or currency:
+                queryset = queryset.order_by(ordering, 'pk')
+        return queryset
+
+
+class ExpenseEstimator:
+    """
+    Vectorized cost projection. Commute cost is a round trip priced per
+    minute of ``HousingListing.commute_minutes``. ``daily_total`` is commute
+    plus food, the same sum ``ExpenseEstimate.daily_total`` stores; only
+    ``monthly_total`` adds the rent converted into ``currency``.
+    """
+
+    def __init__(self, currency='EUR', food_per_day=Decimal('20.00'),
+                 commute_cost_per_minute=Decimal('0.08'), commute_days_per_month=22, days_per_month=30,
+                 rates=None):
+        self.currency = currency
+        self.food_per_day = food_per_day
+        self.commute_cost_per_minute = commute_cost_per_minute
+        self.commute_days_per_month = commute_days_per_month
+        self.days_per_month = days_per_month
+        self.rates = rates or get_rates()
+
+    def estimate(self, prices, currencies, commute_minutes):
+        """Returns a dict of NumPy arrays, one entry per pair."""
+        multipliers = self.rates.multipliers(self.currency)
+        rent = np.asarray([float(p or 0) for p in prices], dtype=np.float64)
+        rent *= np.asarray([float(multipliers[c]) for c in currencies], dtype=np.float64)
+        minutes = np.asarray([m if m is not None else 0 for m in commute_minutes], dtype=np.float64)
+
+        daily_commute = minutes * 2 * float(self.commute_cost_per_minute)
+        daily_food = np.full(rent.shape, float(self.food_per_day))
+        monthly_total = rent + daily_commute * self.commute_days_per_month + daily_food * self.days_per_month
+        return {
+            'daily_commute_cost': np.round(daily_commute, 2),
+            'daily_food_cost': np.round(daily_food, 2),
+            'monthly_rent': np.round(rent, 2),
+            'monthly_total': np.round(monthly_total, 2),
+            'daily_total': np.round(daily_commute + daily_food, 2),
+        }
+
+    def assumptions(self):
+        return {
+            'food_per_day': str(self.food_per_day),
+            'commute_cost_per_minute': str(self.commute_cost_per_minute),
+            'commute_days_per_month': self.commute_days_per_month,
+            'days_per_month': self.days_per_month,
+            'fx_as_of': self.rates.as_of,
+        }
+
+    def estimate_suggestions(self, chunk_size=1000):
+        """
+        Creates an ``ExpenseEstimate`` for every relocation suggestion whose
+        application/housing pair has none. Returns ``(created, seconds)``.
+        """
+        started = time.monotonic()
+        created = 0
+        last_pk = None
+        has_estimate = ExpenseEstimate.objects.filter(
+            application=OuterRef('application'), housing=OuterRef('housing'),
+        )
+        while True:
+            pending = (
+                RelocationSuggestion.objects
+                .filter(~Exists(has_estimate))
+                .order_by('pk')
+                .values('pk', 'application_id', 'housing_id', 'housing__price',
+                        'housing__currency', 'housing__commute_minutes')
+            )
+            if last_pk is not None:
+                pending = pending.filter(pk__gt=last_pk)
+            rows = list(pending[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1]['pk']
+
+            projections = self.estimate(
+                [row['housing__price'] for row in rows],
+                [row['housing__currency'] for row in rows],
+                [row['housing__commute_minutes'] for row in rows],
+            )
+            assumptions = self.assumptions()
+            estimates = []
+            for i, row in enumerate(rows):
+                estimates.append(ExpenseEstimate(
+                    application_id=row['application_id'],
+                    housing_id=row['housing_id'],
+                    daily_commute_cost=Decimal(str(projections['daily_commute_cost'][i])).quantize(CENT),
+                    daily_food_cost=Decimal(str(projections['daily_food_cost'][i])).quantize(CENT),
+                    currency=self.currency,
+                    assumptions={
+                        **assumptions,
+                        'monthly_rent': str(projections['monthly_rent'][i]),
+                        'monthly_total': str(projections['monthly_total'][i]),
+                    },
+                ))
+            ExpenseEstimate.objects.bulk_create(estimates)
+            created += len(estimates)
+        return created, time.monotonic() - started
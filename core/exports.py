@@ -0,0 +1,139 @@
+"""
+Streaming NDJSON/CSV exports.
+
+Rows are read with a ``values()`` projection and ``.iterator(chunk_size=...)``
+(a server-side cursor on PostgreSQL) and encoded one at a time into a
+``StreamingHttpResponse``, so memory stays flat however many rows match.
+CSV text cells that a spreadsheet would run as a formula are prefixed with
+``'``.
+"""
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import ValidationError
+
+CHUNK_SIZE = 2000
+BUFFER_SIZE = 64 * 1024
+OUTPUT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+# Export column -> ``values()`` lookup.
+APPLICATION_EXPORT_FIELDS = {
+    'id': 'id',
+    'vacancy_id': 'vacancy_id',
+    'vacancy_title': 'vacancy__title',
+    'employer': 'vacancy__employer__company_name',
+    'candidate_id': 'candidate_id',
+    'candidate_email': 'candidate__user__email',
+    'status': 'status',
+    'score': 'score',
+    'submitted_at': 'submitted_at',
+    'updated_at': 'updated_at',
+}
+VISA_CASE_EXPORT_FIELDS = {
+    'id': 'id',
+    'application_id': 'application_id',
+    'vacancy_title': 'application__vacancy__title',
+    'candidate_email': 'application__candidate__user__email',
+    'assigned_officer_email': 'assigned_officer__email',
+    'status': 'status',
+    # Annotated by core.visa.annotate_latest_step.
+    'latest_step': 'latest_step',
+    'latest_step_status': 'latest_step_status',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+
+def parse_bound(value, name, end=False):
+    """Accepts an ISO date or datetime; a bare ``until`` date includes that whole day."""
+    # Check for a bare date first: parse_datetime() also accepts one, as midnight.
+    try:
+        day = parse_date(value)
+        moment = datetime.combine(day, time.max if end else time.min) if day else parse_datetime(value)
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ValidationError({name: ['Expected an ISO 8601 date or datetime.']})
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def filter_export(queryset, params, date_field):
+    """Applies ``?status=a,b``, ``?since=`` and ``?until=`` to ``queryset``."""
+    statuses = [status for status in params.get('status', '').split(',') if status]
+    if statuses:
+        queryset = queryset.filter(status__in=statuses)
+    if params.get('since'):
+        queryset = queryset.filter(**{f'{date_field}__gte': parse_bound(params['since'], 'since')})
+    if params.get('until'):
+        queryset = queryset.filter(**{f'{date_field}__lte': parse_bound(params['until'], 'until', end=True)})
+    return queryset.order_by(date_field, 'pk')
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(rows, columns):
+    for row in rows:
+        yield json.dumps({column: row[column] for column in columns}, cls=DjangoJSONEncoder) + '\n'
+
+
+def csv_lines(rows, columns):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow([_csv_cell(row[column]) for column in columns])
+
+
+# Spreadsheets run cells starting with these as formulas.
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def _csv_cell(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def buffered(lines, size=BUFFER_SIZE):
+    """Joins lines into blocks of about ``size`` characters to keep write calls few."""
+    block, length = [], 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= size:
+            yield ''.join(block)
+            block, length = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def stream_export(queryset, fields, output, filename):
+    if output not in OUTPUT_FORMATS:
+        raise ValidationError({'output': [f"Expected one of: {', '.join(OUTPUT_FORMATS)}."]})
+    rows = queryset.values(
+        *[column for column, lookup in fields.items() if column == lookup],
+        **{column: F(lookup) for column, lookup in fields.items() if column != lookup},
+    )
+    rows = rows.iterator(chunk_size=CHUNK_SIZE)
+    encode = ndjson_lines if output == 'ndjson' else csv_lines
+
+    response = StreamingHttpResponse(buffered(encode(rows, list(fields))), content_type=OUTPUT_FORMATS[output])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{output}"'
+    response['Cache-Control'] = 'no-store'
+    return response
+
@@ -0,0 +1,67 @@
+"""
+Foreign-exchange rates for ``CURRENCY_CHOICES``.
+
+Rates are read from a local JSON file (``settings.FX_RATES_FILE``)::
+
+    {"base": "EUR", "as_of": "2025-10-01", "rates": {"EUR": 1, "TRY": 48.5, "USD": 1.16}}
+
+where each rate is the amount of that currency one unit of ``base`` buys.
+The parsed table is cached in process memory for ``settings.FX_RATES_TTL``
+seconds, so conversions never touch the disk on the request path.
+"""
+import json
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+
+
+class UnknownCurrency(KeyError):
+    pass
+
+
+class FXRates:
+    def __init__(self, base, rates, as_of=None):
+        self.base = base
+        self.rates = {code: Decimal(str(rate)) for code, rate in rates.items()}
+        self.as_of = as_of
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as fp:
+            data = json.load(fp)
+        return cls(data['base'], data['rates'], data.get('as_of'))
+
+    def rate(self, source, target):
+        """Multiplier converting an amount in ``source`` into ``target``."""
+        try:
+            return self.rates[target] / self.rates[source]
+        except KeyError as exc:
+            raise UnknownCurrency(exc.args[0]) from None
+
+    def convert(self, amount, source, target):
+        if source == target:
+            return amount
+        return (Decimal(amount) * self.rate(source, target)).quantize(Decimal('0.01'))
+
+    def multipliers(self, target):
+        return {code: self.rate(code, target) for code in self.rates}
+
+
+_lock = threading.Lock()
+_cached = {'rates': None, 'loaded_at': 0.0}
+
+
+def get_rates():
+    with _lock:
+        rates = _cached['rates']
+        if rates is None or time.monotonic() - _cached['loaded_at'] > settings.FX_RATES_TTL:
+            rates = FXRates.from_file(settings.FX_RATES_FILE)
+            _cached.update(rates=rates, loaded_at=time.monotonic())
+        return rates
+
+
+def clear_rates_cache():
+    with _lock:
+        _cached.update(rates=None, loaded_at=0.0)
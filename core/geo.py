@@ -0,0 +1,89 @@
+"""
+Geohash encoding and radius lookups that work on any database.
+
+Listings store a 12-character geohash in an indexed column. A radius query
+picks the longest geohash precision whose cells are still at least as large
+as the radius, so the 3×3 block of cells around the centre covers the whole
+circle. Each cell becomes a range scan on the index; exact distances are
+only computed for the rows those cells return.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_LENGTH = 12
+EARTH_RADIUS_M = 6371008.8
+
+# Cell height and width in metres (at the equator) for each precision.
+CELL_SIZES_M = {
+    1: (5003530, 5009400),
+    2: (625441, 1252300),
+    3: (156360, 156500),
+    4: (19545, 39100),
+    5: (4886, 4890),
+    6: (610.8, 1220),
+    7: (152.7, 152.9),
+    8: (19.1, 38.2),
+}
+
+
+def encode(latitude, longitude, precision=GEOHASH_LENGTH):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        target, current = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (target[0] + target[1]) / 2
+        value <<= 1
+        if current >= middle:
+            value |= 1
+            target[0] = middle
+        else:
+            target[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def precision_for_radius(radius_m, latitude):
+    shrink = max(math.cos(math.radians(latitude)), 0.01)
+    best = 1
+    for precision, (height, width) in sorted(CELL_SIZES_M.items()):
+        if min(height, width * shrink) >= radius_m:
+            best = precision
+    return best
+
+
+def covering_cells(latitude, longitude, radius_m):
+    """Geohash prefixes of the 3×3 cell block around the point."""
+    precision = precision_for_radius(radius_m, latitude)
+    height, width = CELL_SIZES_M[precision]
+    d_lat = height / 111320.0
+    d_lon = width / 111320.0
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lon_step in (-1, 0, 1):
+            lat = min(max(latitude + lat_step * d_lat, -90.0), 90.0)
+            lon = (longitude + lon_step * d_lon + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lon, precision))
+    return sorted(cells)
+
+
+def bounding_box(latitude, longitude, radius_m):
+    d_lat = math.degrees(radius_m / EARTH_RADIUS_M)
+    d_lon = math.degrees(radius_m / (EARTH_RADIUS_M * max(math.cos(math.radians(latitude)), 0.01)))
+    return latitude - d_lat, latitude + d_lat, longitude - d_lon, longitude + d_lon
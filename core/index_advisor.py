@@ -0,0 +1,263 @@
+"""
+Index advisor.
+
+Replays captured SQL statements through ``EXPLAIN`` and proposes the indexes
+missing for the filters and orderings the application actually runs.
+Statements come from a JSON-lines log (``{"sql": ..., "params": [...]}``) or
+are captured live by running the benchmark flows (see :mod:`core.benchmark`).
+
+For every table a plan reads without a fitting index, the advisor takes the
+columns the statement compares for equality on that table. It then adds the
+``ORDER BY`` columns (or the first range column). The result is a composite
+index proposal. Proposals already served by a leading prefix of an existing
+index are dropped. The remaining ones are ranked by how many captured
+statements they would serve. Proposals are hints to review, not a
+substitute for reading the plan.
+"""
+import json
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+
+from django.apps import apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, connection, transaction
+
+from .profiling import fingerprint
+
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+SUPPORTED_VENDORS = ('sqlite', 'postgresql')
+
+_COLUMN = r'(?:"(?P<table>\w+)"|(?P<alias>[A-Z]\d+))\."(?P<column>\w+)"'
+_COLUMN_RE = re.compile(_COLUMN)
+_PREDICATE_RE = re.compile(_COLUMN + r'\s*(?P<op>=|IN \(|IS NULL|>=|<=|>|<)')
+_ALIAS_RE = re.compile(r'(?:FROM|JOIN) "(\w+)" (?:AS )?"?([A-Z]\d+)"?')
+_ORDER_RE = re.compile(r'ORDER BY (.+?)(?: LIMIT | OFFSET |\)|$)')
+_SQLITE_SEARCH_RE = re.compile(r'^SEARCH (\w+)(?: AS (\w+))? USING (COVERING )?(?:INDEX \w+|INTEGER PRIMARY KEY)(?: \((.*?)\))?')
+_SEEK_RE = re.compile(r'(?:^|[(.\s])(\w+) ?= ?(?!\s*ANY)')
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)(?: AS (\w+))?( USING (?:COVERING )?INDEX \w+)?')
+
+
+class StatementLog:
+    """Execute wrapper that keeps the first ``(sql, params)`` of every fingerprint and counts the rest."""
+
+    def __init__(self):
+        self.samples = {}
+        self.counts = Counter()
+
+    def add(self, sql, params):
+        key = fingerprint(sql)
+        self.counts[key] += 1
+        self.samples.setdefault(key, (sql, list(params or ())))
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many:
+            self.add(sql, params)
+        return execute(sql, params, many, context)
+
+    def load(self, fp):
+        for line in fp:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            self.add(row['sql'], row.get('params'))
+        return self
+
+    def dump(self, fp):
+        for key, (sql, params) in self.samples.items():
+            for _ in range(self.counts[key]):
+                fp.write(json.dumps({'sql': sql, 'params': params}, cls=DjangoJSONEncoder) + '\n')
+
+
+def capture(flows, requests=20, seed=0):
+    """Runs the benchmark flows once per request and returns the statements they issued."""
+    from .benchmark import BenchmarkDriver
+
+    log = StatementLog()
+    driver = BenchmarkDriver(seed=seed)
+    with transaction.atomic():
+        driver.setup()
+        with connection.execute_wrapper(log):
+            for flow in flows:
+                for _ in range(requests):
+                    driver.send(flow)
+        transaction.set_rollback(True)
+    return log
+
+
+@dataclass
+class Access:
+    """How a plan reads one table: a full ``scan`` or an index ``search``, and whether rows are sorted after."""
+    table: str
+    alias: str
+    kind: str
+    matched: int = 0
+    covering: bool = False
+    sort: bool = False
+    seek: list = field(default_factory=list)
+
+
+@dataclass
+class Proposal:
+    table: str
+    columns: tuple
+    statements: int = 0
+    examples: list = field(default_factory=list)
+
+    def as_code(self):
+        model = _models_by_table().get(self.table)
+        if model is None:
+            return f'{self.table}({", ".join(self.columns)})'
+        names = {f.column: f.name for f in model._meta.concrete_fields}
+        fields = ', '.join(repr(names.get(column, column)) for column in self.columns)
+        return f'{model._meta.label}: models.Index(fields=[{fields}])'
+
+
+def _models_by_table():
+    return {model._meta.db_table: model for model in apps.get_models(include_auto_created=True)}
+
+
+def explain(sql, params):
+    """The tables a statement reads and how, from the database's own plan."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            return _sqlite_accesses([row[3] for row in cursor.fetchall()])
+        if connection.vendor == 'postgresql':
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            accesses = []
+            _postgres_accesses(plan[0]['Plan'], accesses, sort=False)
+            return accesses
+    raise NotImplementedError(f'EXPLAIN is not supported on {connection.vendor}')
+
+
+def _sqlite_accesses(details):
+    accesses = []
+    sort = False
+    for detail in details:
+        if detail.startswith('USE TEMP B-TREE FOR') and detail.endswith('ORDER BY'):
+            sort = True
+        elif match := _SQLITE_SEARCH_RE.match(detail):
+            table, alias, covering, terms = match.groups()
+            seek = [column for column in _SEEK_RE.findall(terms or '') if column != 'rowid']
+            accesses.append(Access(table, alias or table, 'search', len(seek), bool(covering), seek=seek))
+        elif match := _SQLITE_SCAN_RE.match(detail):
+            table, alias, via_index = match.groups()
+            accesses.append(Access(table, alias or table, 'index_scan' if via_index else 'scan'))
+    # SQLite does not say which table the sort is for; predicate_columns() finds the ORDER BY columns per table.
+    for access in accesses:
+        access.sort = sort
+    return accesses
+
+
+def _postgres_accesses(node, accesses, sort):
+    node_type = node['Node Type']
+    sort = sort or node_type in ('Sort', 'Incremental Sort')
+    if 'Relation Name' in node:
+        table, alias = node['Relation Name'], node.get('Alias', node['Relation Name'])
+        if node_type == 'Seq Scan':
+            accesses.append(Access(table, alias, 'scan', sort=sort))
+        else:
+            seek = _SEEK_RE.findall(node.get('Index Cond') or node.get('Recheck Cond') or '')
+            # A residual filter means the index matched fewer columns than the statement compares.
+            accesses.append(Access(
+                table, alias, 'search', matched=len(seek) if 'Filter' not in node else 0,
+                covering=node_type == 'Index Only Scan', sort=sort, seek=seek,
+            ))
+        sort = False
+    for child in node.get('Plans', ()):
+        _postgres_accesses(child, accesses, sort)
+
+
+def predicate_columns(sql, alias):
+    """``(equality, range, order, referenced)`` column lists the statement uses on ``alias``."""
+    where = sql.split(' WHERE ', 1)[1] if ' WHERE ' in sql else ''
+    equality, ranges, order = [], [], []
+    for match in _PREDICATE_RE.finditer(where):
+        if (match.group('table') or match.group('alias')) != alias:
+            continue
+        column = match.group('column')
+        # ``NOT (x IN ...)`` excludes values; an index on x cannot seek to the remaining rows.
+        excluded = where[:match.start()].endswith('NOT (')
+        target = equality if match.group('op') in ('=', 'IN (', 'IS NULL') and not excluded else ranges
+        if column not in equality and column not in target:
+            target.append(column)
+    for clause in _ORDER_RE.findall(sql):
+        for match in _COLUMN_RE.finditer(clause):
+            if (match.group('table') or match.group('alias')) == alias and match.group('column') not in order:
+                order.append(match.group('column'))
+    referenced = []
+    for match in _COLUMN_RE.finditer(sql):
+        if (match.group('table') or match.group('alias')) == alias and match.group('column') not in referenced:
+            referenced.append(match.group('column'))
+    return equality, ranges, order, referenced
+
+
+def existing_indexes(table):
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+    return [
+        tuple(info['columns']) for info in constraints.values()
+        if (info['index'] or info['primary_key'] or info['unique']) and info['columns']
+    ]
+
+
+def covered(columns, equality, indexes):
+    """Whether an existing index has the equality columns (any order) followed by the rest as a prefix."""
+    for index in indexes:
+        head, tail = index[:len(equality)], index[len(equality):len(columns)]
+        if set(head) == set(equality) and tuple(tail) == tuple(columns[len(equality):]):
+            return True
+    return False
+
+
+def propose(sql, access, pk_column='id'):
+    """The index columns ``access`` is missing, or ``None`` if its plan is already fine."""
+    equality, ranges, order, referenced = predicate_columns(sql, access.alias)
+    # Join keys the plan seeks on count as equality columns of the inner table.
+    equality += [column for column in access.seek if column not in equality]
+    if access.kind in ('scan', 'index_scan') and equality:
+        return tuple(equality + (order or ranges[:1]))
+    if access.kind == 'search' and access.matched < len(equality):
+        return tuple(equality + (order or ranges[:1]))
+    if access.sort and order and equality:
+        return tuple(equality + order)
+    # Aggregates over a few columns per key are answered from the index alone once it holds them.
+    extra = [column for column in referenced if column not in equality and column != pk_column]
+    if access.kind == 'search' and not access.covering and equality and 'GROUP BY' in sql and 0 < len(extra) <= 2:
+        return tuple(equality + extra)
+    return None
+
+
+def advise(log):
+    """Ranks the index proposals for the statements in ``log``."""
+    proposals = {}
+    indexes = {}
+    for key, (sql, params) in log.samples.items():
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            continue
+        try:
+            accesses = explain(sql, params)
+        except DatabaseError:
+            continue
+        aliases = {name: source for source, name in _ALIAS_RE.findall(sql)}
+        for access in accesses:
+            table = aliases.get(access.table, access.table)
+            model = _models_by_table().get(table)
+            columns = propose(sql, access, model._meta.pk.column if model else 'id')
+            if not columns:
+                continue
+            if table not in indexes:
+                indexes[table] = existing_indexes(table)
+            equality = [column for column in columns if column in predicate_columns(sql, access.alias)[0] + access.seek]
+            if covered(columns, equality, indexes[table]):
+                continue
+            proposal = proposals.setdefault((table, columns), Proposal(table, columns))
+            proposal.statements += log.counts[key]
+            if len(proposal.examples) < 3:
+                proposal.examples.append(key)
+    return sorted(proposals.values(), key=lambda proposal: proposal.statements, reverse=True)
@@ -0,0 +1,117 @@
+import json
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test.utils import setup_databases, setup_test_environment, teardown_databases, teardown_test_environment
+
+from core.benchmark import FLOWS, BenchmarkDriver, compare
+from core.snapshots import MANIFEST, SnapshotError, restore_snapshot, take_snapshot
+from core.synthetic import SyntheticDataGenerator, is_seeded, volumes_for_scale
+
+
+class Command(BaseCommand):
+    help = 'Drives the main API flows in-process and reports latency percentiles and queries per request'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=int, default=2000, help='Synthetic data scale for the throwaway database')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--use-current-db', action='store_true',
+                            help='Benchmark the configured database (seeded with populate_db --scale) instead of a throwaway one')
+        parser.add_argument('--keepdb', action='store_true', help='Reuse the throwaway database between runs')
+        parser.add_argument('--snapshot', default=None,
+                            help='Restore the throwaway database from this snapshot directory, or save one after seeding')
+        parser.add_argument('--requests', type=int, default=100, help='Measured requests per flow')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per flow')
+        parser.add_argument('--flows', nargs='+', choices=FLOWS, default=list(FLOWS))
+        parser.add_argument('--warm-cache', action='store_true', help='Keep the response cache between requests')
+        parser.add_argument('--baseline', default=None, help='Fail if results regress against this baseline file')
+        parser.add_argument('--save-baseline', default=None, help='Write the results to this baseline file')
+        parser.add_argument('--latency-tolerance', type=float, default=0.25,
+                            help='Allowed relative p95 growth over the baseline')
+
+    def handle(self, *args, **options):
+        verbosity = options['verbosity']
+        setup_test_environment()
+        old_config = None
+        try:
+            if not options['use_current_db']:
+                old_config = setup_databases(verbosity=max(verbosity - 1, 0), interactive=False, keepdb=options['keepdb'])
+                self.seed_database(options)
+            results = self.run_flows(options)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=max(verbosity - 1, 0), keepdb=options['keepdb'])
+            teardown_test_environment()
+
+        self.report(results)
+        report = {
+            'scale': None if options['use_current_db'] else options['scale'],
+            'seed': options['seed'], 'requests': options['requests'], 'flows': results,
+        }
+        if options['save_baseline']:
+            path = options['save_baseline']
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as fp:
+                json.dump(report, fp, indent=2, sort_keys=True)
+                fp.write('\n')
+            self.stdout.write(f'Baseline written to {path}')
+        if options['baseline']:
+            self.check_baseline(report, options)
+
+    def seed_database(self, options):
+        snapshot = options['snapshot']
+        if snapshot and os.path.exists(os.path.join(snapshot, MANIFEST)):
+            try:
+                restore_snapshot(snapshot)
+            except SnapshotError as exc:
+                raise CommandError(str(exc))
+            self.stdout.write(f'Restored throwaway database from {snapshot}')
+            return
+        if is_seeded(options['seed']):
+            return
+        self.stdout.write(f"Seeding throwaway database at scale {options['scale']}...")
+        log = self.stdout.write if options['verbosity'] > 1 else None
+        SyntheticDataGenerator(seed=options['seed'], log=log).generate(volumes_for_scale(options['scale']))
+        if snapshot:
+            take_snapshot(snapshot)
+            self.stdout.write(f'Saved snapshot to {snapshot}')
+
+    def run_flows(self, options):
+        driver = BenchmarkDriver(seed=options['seed'], warm_cache=options['warm_cache'])
+        # Everything the flows write is rolled back, so the database is left as it was.
+        with transaction.atomic():
+            try:
+                return driver.run(options['flows'], options['requests'], options['warmup'])
+            except LookupError as exc:
+                raise CommandError(str(exc))
+            finally:
+                transaction.set_rollback(True)
+
+    def report(self, results):
+        self.stdout.write(
+            f"{'flow':<22} {'n':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+            f"{'q/req':>6} {'max q':>6}"
+        )
+        for flow, stats in results.items():
+            self.stdout.write(
+                f"{flow:<22} {stats['requests']:>5} {stats['errors']:>4} {stats['p50_ms']:>8.1f} "
+                f"{stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} {stats['max_ms']:>8.1f} "
+                f"{stats['mean_queries']:>6.1f} {stats['max_queries']:>6}"
+            )
+
+    def check_baseline(self, report, options):
+        try:
+            with open(options['baseline'], encoding='utf-8') as fp:
+                baseline = json.load(fp)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Cannot read baseline {options['baseline']}: {exc}")
+        if (baseline.get('scale'), baseline.get('seed')) != (report['scale'], report['seed']):
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded at scale {baseline.get('scale')} seed {baseline.get('seed')}; "
+                f"this run used scale {report['scale']} seed {report['seed']}"
+            ))
+        regressions = compare(report['flows'], baseline.get('flows', {}), options['latency_tolerance'])
+        if regressions:
+            raise CommandError('Performance regressions:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS('No regressions against the baseline'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.scoring import ScoringEngine
+
+
+class Command(BaseCommand):
+    help = 'Recomputes candidate-vacancy match scores and application scores'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vacancy-batch',
+            type=int,
+            default=256,
+            help='Number of vacancies scored per matrix product',
+        )
+        parser.add_argument(
+            '--candidate-chunk',
+            type=int,
+            default=4096,
+            help='Number of candidate vectors densified at a time',
+        )
+
+    def handle(self, *args, **options):
+        engine = ScoringEngine(
+            vacancy_batch=options['vacancy_batch'],
+            candidate_chunk=options['candidate_chunk'],
+        )
+        started = time.monotonic()
+        pairs = engine.score()
+        elapsed = time.monotonic() - started
+        rate = pairs / elapsed if elapsed else pairs
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {pairs} candidate-vacancy pairs in {elapsed:.2f}s ({rate:,.0f} pairs/s)'
+        ))
@@ -0,0 +1,46 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.expenses import ExpenseEstimator
+from core.fx import get_rates
+
+
+class Command(BaseCommand):
+    help = 'Creates expense estimates for relocation suggestions that have none yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--currency',
+            default='EUR',
+            help='Currency the estimates are expressed in',
+        )
+        parser.add_argument(
+            '--food-per-day',
+            type=Decimal,
+            default=Decimal('20.00'),
+            help='Daily food budget in the target currency',
+        )
+        parser.add_argument(
+            '--commute-cost-per-minute',
+            type=Decimal,
+            default=Decimal('0.08'),
+            help='Commute cost per minute of travel, each way',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='Number of suggestions estimated per chunk',
+        )
+
+    def handle(self, *args, **options):
+        if options['currency'] not in get_rates().rates:
+            raise CommandError(f"No FX rate for {options['currency']}")
+        estimator = ExpenseEstimator(
+            currency=options['currency'],
+            food_per_day=options['food_per_day'],
+            commute_cost_per_minute=options['commute_cost_per_minute'],
+        )
+        created, seconds = estimator.estimate_suggestions(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} expense estimates in {seconds:.2f}s'))
@@ -0,0 +1,48 @@
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+
+from core.relocation import SuggestionGenerator
+
+
+class Command(BaseCommand):
+    help = 'Suggests housing for accepted applications that have no relocation suggestions yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--per-application',
+            type=int,
+            default=3,
+            help='Number of listings suggested per application',
+        )
+        parser.add_argument(
+            '--budget-ratio',
+            type=Decimal,
+            default=Decimal('0.4'),
+            help='Maximum monthly rent as a share of the vacancy salary',
+        )
+        parser.add_argument(
+            '--max-commute',
+            type=int,
+            default=60,
+            help='Maximum commute in minutes',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Number of applications processed per chunk',
+        )
+
+    def handle(self, *args, **options):
+        generator = SuggestionGenerator(
+            per_application=options['per_application'],
+            budget_ratio=options['budget_ratio'],
+            max_commute_minutes=options['max_commute'],
+            chunk_size=options['chunk_size'],
+        )
+        stats = generator.run()
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {stats.suggestions} suggestions for {stats.applications} applications '
+            f'in {stats.seconds:.2f}s ({stats.rate:,.0f} applications/s)'
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmark import FLOWS
+from core.index_advisor import SUPPORTED_VENDORS, StatementLog, advise, capture
+
+
+class Command(BaseCommand):
+    help = 'Replays captured SQL through EXPLAIN and proposes missing indexes (see core/index_advisor.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None,
+                            help='JSON-lines statement log to replay (default: capture the benchmark flows)')
+        parser.add_argument('--save-log', default=None, help='Write the captured statements to this file')
+        parser.add_argument('--flows', nargs='+', choices=FLOWS, default=list(FLOWS))
+        parser.add_argument('--requests', type=int, default=20, help='Captured requests per flow')
+        parser.add_argument('--seed', type=int, default=0, help='Seed the database was populated with')
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        if connection.vendor not in SUPPORTED_VENDORS:
+            raise CommandError(f'The index advisor cannot read {connection.vendor} plans')
+        if options['log']:
+            try:
+                with open(options['log'], encoding='utf-8') as fp:
+                    log = StatementLog().load(fp)
+            except OSError as exc:
+                raise CommandError(f"Cannot read {options['log']}: {exc}")
+        else:
+            setup_test_environment()
+            try:
+                log = capture(options['flows'], options['requests'], options['seed'])
+            except LookupError as exc:
+                raise CommandError(str(exc))
+            finally:
+                teardown_test_environment()
+        if options['save_log']:
+            with open(options['save_log'], 'w', encoding='utf-8') as fp:
+                log.dump(fp)
+
+        self.stdout.write(f'{sum(log.counts.values())} statements, {len(log.samples)} distinct')
+        proposals = advise(log)
+        if not proposals:
+            self.stdout.write(self.style.SUCCESS('No missing indexes found'))
+            return
+        for proposal in proposals[:options['limit']]:
+            self.stdout.write(f'{proposal.statements:>6}  {proposal.as_code()}')
+            for example in proposal.examples:
+                self.stdout.write(self.style.WARNING(f'        {example[:160]}'))
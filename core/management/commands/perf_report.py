@@ -0,0 +1,67 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.profiling import empty_stats, merge_stats, percentile
+
+SORT_KEYS = {
+    'total': lambda stats: stats['total_ms'],
+    'avg': lambda stats: stats['total_ms'] / stats['count'],
+    'p95': lambda stats: percentile(stats['buckets'], 0.95) or float('inf'),
+    'queries': lambda stats: stats['queries'] / stats['count'],
+    'sql': lambda stats: stats['sql_ms'],
+    'duplicates': lambda stats: stats['duplicates'] / stats['count'],
+}
+
+
+class Command(BaseCommand):
+    help = 'Summarizes sampled request profiles (see core/profiling.py) and prints the worst endpoints'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=None, help='Profile file (default: PROFILING_FILE)')
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total')
+        parser.add_argument('--limit', type=int, default=15)
+        parser.add_argument('--since', type=float, default=None, help='Only samples from the last N hours')
+        parser.add_argument('--fingerprints', type=int, default=3, help='Duplicated statements shown per endpoint')
+
+    def handle(self, *args, **options):
+        path = options['file'] or os.fspath(settings.PROFILING_FILE)
+        if not os.path.exists(path):
+            raise CommandError(f'No profile data at {path}; set PROFILING_SAMPLE_RATE to collect some')
+        cutoff = time.time() - options['since'] * 3600 if options['since'] else None
+
+        endpoints = {}
+        with open(path, encoding='utf-8') as fp:
+            for line in fp:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    continue
+                if cutoff is not None and row.get('ts', 0) < cutoff:
+                    continue
+                stats = endpoints.setdefault(row['endpoint'], empty_stats())
+                merge_stats(stats, row)
+        if not endpoints:
+            self.stdout.write('No samples in range')
+            return
+
+        ranked = sorted(endpoints.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+        self.stdout.write(
+            f"{'endpoint':<60} {'n':>6} {'avg ms':>8} {'p95 ms':>8} {'max ms':>8} "
+            f"{'q/req':>6} {'max q':>6} {'sql ms':>8} {'dup/req':>7}"
+        )
+        for endpoint, stats in ranked[:options['limit']]:
+            count = stats['count']
+            p95 = percentile(stats['buckets'], 0.95)
+            self.stdout.write(
+                f"{endpoint[:60]:<60} {count:>6} {stats['total_ms'] / count:>8.1f} "
+                f"{p95 if p95 is not None else '>10000':>8} {stats['max_ms']:>8.1f} "
+                f"{stats['queries'] / count:>6.1f} {stats['max_queries']:>6} "
+                f"{stats['sql_ms'] / count:>8.1f} {stats['duplicates'] / count:>7.1f}"
+            )
+            top = sorted(stats['fingerprints'].items(), key=lambda item: item[1], reverse=True)
+            for sql, repeats in top[:options['fingerprints']]:
+                self.stdout.write(self.style.WARNING(f'    {repeats:>6}x {sql[:140]}'))
@@ -1,10 +1,11 @@
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth import get_user_model
 from core.models import (
     Employer, CandidateProfile, Vacancy, Application, Document,
     VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate,
     AIAssistantInteraction
 )
+from core.synthetic import SyntheticDataGenerator, is_seeded, volumes_for_counts, volumes_for_scale
 from decimal import Decimal
 from django.utils import timezone
 from datetime import timedelta
@@ -21,6 +22,27 @@ class Command(BaseCommand):
             action='store_true',
             help='Clear existing data before creating new ones',
         )
+        parser.add_argument(
+            '--scale',
+            type=int,
+            default=None,
+            help='Generate synthetic data for N applications (see core/synthetic.py) instead of the fixtures',
+        )
+        parser.add_argument('--users', type=int, default=None, help='Synthetic users to generate')
+        parser.add_argument('--vacancies', type=int, default=None, help='Synthetic vacancies to generate')
+        parser.add_argument('--applications', type=int, default=None, help='Synthetic applications to generate')
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Random seed for the synthetic data; the same seed and counts give the same rows',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Rows per INSERT for the synthetic data',
+        )
 
     def handle(self, *args, **options):
         if options['clear']:
@@ -38,6 +60,11 @@ class Command(BaseCommand):
             User.objects.filter(is_superuser=False).delete()
             self.stdout.write(self.style.SUCCESS('Data cleared'))
 
+        counts = {name: options[name] for name in ('users', 'vacancies', 'applications') if options[name]}
+        if options['scale'] or counts:
+            self.generate_synthetic(options, counts)
+            return
+
         self.stdout.write('Creating test data...')
         
         # Creating users
@@ -169,6 +196,7 @@ class Command(BaseCommand):
                 'currency': 'EUR',
                 'location': 'Nicosia, Cyprus',
                 'remote': True,
+                'skills': ['Python', 'Django', 'PostgreSQL', 'Docker'],
                 'status': 'open',
                 'expires_at': timezone.now() + timedelta(days=30),
             },
@@ -180,6 +208,7 @@ class Command(BaseCommand):
                 'currency': 'EUR',
                 'location': 'Limassol, Cyprus',
                 'remote': False,
+                'skills': ['JavaScript', 'React', 'CSS', 'HTML'],
                 'status': 'open',
                 'expires_at': timezone.now() + timedelta(days=45),
             },
@@ -191,6 +220,7 @@ class Command(BaseCommand):
                 'currency': 'EUR',
                 'location': 'Paphos, Cyprus',
                 'remote': True,
+                'skills': ['Python', 'JavaScript', 'React', 'AWS'],
                 'status': 'open',
                 'expires_at': timezone.now() + timedelta(days=60),
             },
@@ -304,10 +334,13 @@ class Command(BaseCommand):
         ]
         
         for visa_data in visa_cases_data:
+            steps = visa_data.pop('steps')
             visa_case, created = VisaCase.objects.get_or_create(
                 application=visa_data['application'],
                 defaults=visa_data
             )
+            if created:
+                visa_case.add_steps(steps, visa_data['assigned_officer'])
             self.stdout.write(f'Created visa case for application: {visa_case.application.id}')
         
         # Creating housing listings
@@ -469,3 +502,14 @@ class Command(BaseCommand):
                 f'- AI Interactions: {AIAssistantInteraction.objects.count()}'
             )
         )
+
+    def generate_synthetic(self, options, counts):
+        if options['scale'] and counts:
+            raise CommandError('Pass either --scale or --users/--vacancies/--applications')
+        if is_seeded(options['seed']):
+            raise CommandError(f"Synthetic data for seed {options['seed']} already exists; use --clear or another --seed")
+        volumes = volumes_for_scale(options['scale']) if options['scale'] else volumes_for_counts(**counts)
+        self.stdout.write('Generating synthetic data: ' + ', '.join(f'{name}={count}' for name, count in volumes.items()))
+        generator = SyntheticDataGenerator(seed=options['seed'], batch_size=options['batch_size'], log=self.stdout.write)
+        generator.generate(volumes)
+        self.stdout.write(self.style.SUCCESS('Synthetic data created'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from core.processing import Worker
+
+
+class Command(BaseCommand):
+    help = 'Runs background processing jobs (thumbnails, metadata extraction, match re-scoring)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=2,
+            help='Size of the process pool doing file work (0 runs jobs inline)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=8,
+            help='Number of jobs claimed at a time',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Seconds to wait when the queue is empty',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling',
+        )
+
+    def handle(self, *args, **options):
+        worker = Worker(
+            processes=options['processes'],
+            batch_size=options['batch_size'],
+            poll_interval=options['poll_interval'],
+        )
+        processed = worker.run(once=options['once'])
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} jobs'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.authentication import purge_expired_revocations
+
+
+class Command(BaseCommand):
+    help = 'Deletes token revocations whose tokens have expired'
+
+    def handle(self, *args, **options):
+        count = purge_expired_revocations()
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} expired token revocations'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.uploads import purge_expired_sessions
+
+
+class Command(BaseCommand):
+    help = 'Deletes expired, unfinished upload sessions and their partial files'
+
+    def handle(self, *args, **options):
+        count = purge_expired_sessions()
+        self.stdout.write(self.style.SUCCESS(f'Purged {count} expired upload sessions'))
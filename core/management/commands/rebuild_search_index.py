@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import Vacancy
+from core.search import get_backend, index_in_batches
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the full-text vacancy search index'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of vacancies indexed per batch',
+        )
+
+    def handle(self, *args, **options):
+        backend = get_backend(connection)
+        if backend is None:
+            raise CommandError(f'Full-text search is not supported on {connection.vendor}')
+
+        batch_size = options['batch_size']
+        rows = Vacancy.objects.values_list('id', 'title', 'location', 'description')
+        with transaction.atomic():
+            backend.drop()
+            backend.create()
+            total = index_in_batches(backend, rows.iterator(chunk_size=batch_size), batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} vacancies'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recomputes materialized dashboard counters and repairs any drift'
+
+    def handle(self, *args, **options):
+        repaired = reconcile_counters()
+        if repaired:
+            self.stdout.write(self.style.WARNING(f'Repaired {repaired} drifted counter rows'))
+        else:
+            self.stdout.write(self.style.SUCCESS('Dashboard counters are consistent'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from core.workload import reconcile_workloads
+
+
+class Command(BaseCommand):
+    help = 'Recomputes visa officer workload rows (open cases, next due date) from the case table'
+
+    def handle(self, *args, **options):
+        written = reconcile_workloads()
+        self.stdout.write(self.style.SUCCESS(f'Reconciled workload for {written} officers'))
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from core.snapshots import SnapshotError, restore_snapshot, take_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Saves the database to a snapshot directory or restores it from one (see core/snapshots.py)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=('save', 'restore'))
+        parser.add_argument('path', help='Snapshot directory')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Restore without asking for confirmation',
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        try:
+            if options['action'] == 'save':
+                manifest = take_snapshot(options['path'], using=options['database'])
+                self.stdout.write(self.style.SUCCESS(
+                    f"Saved {manifest['vendor']} snapshot to {options['path']} in {time.monotonic() - started:.1f}s"
+                ))
+                return
+            if options['interactive']:
+                name = connections[options['database']].settings_dict['NAME']
+                answer = input(f'This replaces all data in {name} with the snapshot. Type "yes" to continue: ')
+                if answer != 'yes':
+                    raise CommandError('Restore cancelled')
+                started = time.monotonic()
+            restore_snapshot(options['path'], using=options['database'])
+        except SnapshotError as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(self.style.SUCCESS(
+            f"Restored {options['path']} in {time.monotonic() - started:.1f}s"
+        ))
@@ -0,0 +1,135 @@
+"""
+File inspection for the document processing pipeline.
+
+These functions only touch ``default_storage``, never the database, so
+``core.processing`` can run them in worker processes. Images get downscaled
+JPEG and WebP variants; PDFs get page count and page size. ``pypdf`` is used
+for PDFs when installed, otherwise a streaming scan of the file's objects.
+"""
+import io
+import re
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+try:
+    import pypdf
+except ImportError:  # pragma: no cover - optional dependency
+    pypdf = None
+
+# Variant name -> (longest side in pixels, format).
+IMAGE_VARIANTS = {
+    'thumb': (256, 'JPEG'),
+    'thumb_webp': (256, 'WEBP'),
+    'medium_webp': (1024, 'WEBP'),
+}
+EXTENSIONS = {'JPEG': 'jpg', 'WEBP': 'webp'}
+SCAN_BLOCK = 256 * 1024
+
+_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+_MEDIABOX_RE = re.compile(rb'/MediaBox\s*\[\s*([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\s*\]')
+
+
+def human_size(size):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f'{size:.0f} {unit}' if unit == 'B' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+def inspect_file(name, variant_prefix):
+    """Returns the metadata for the stored file ``name``; image variants are written under ``variant_prefix``."""
+    info = {'size': default_storage.size(name)}
+    info['file_size'] = human_size(info['size'])
+    with default_storage.open(name, 'rb') as fp:
+        if fp.read(5) == b'%PDF-':
+            fp.seek(0)
+            info.update(content_type='application/pdf', **pdf_info(fp))
+        else:
+            fp.seek(0)
+            info.update(image_info(fp, variant_prefix))
+    return info
+
+
+def image_info(fp, variant_prefix):
+    try:
+        image = Image.open(fp)
+    except UnidentifiedImageError:
+        return {'content_type': 'application/octet-stream'}
+
+    info = {
+        'content_type': Image.MIME.get(image.format, 'application/octet-stream'),
+        'width': image.width,
+        'height': image.height,
+    }
+    largest = max(size for size, _ in IMAGE_VARIANTS.values())
+    # Lets the JPEG decoder downscale while decoding instead of after.
+    image.draft('RGB', (largest, largest))
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+    variants = {}
+    for variant, (size, image_format) in IMAGE_VARIANTS.items():
+        name = f'{variant_prefix}/{variant}.{EXTENSIONS[image_format]}'
+        if not default_storage.exists(name):
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+            if image_format == 'JPEG' and resized.mode != 'RGB':
+                resized = resized.convert('RGB')
+            buffer = io.BytesIO()
+            resized.save(buffer, image_format, quality=82, optimize=image_format == 'JPEG')
+            name = default_storage.save(name, ContentFile(buffer.getvalue()))
+        variants[variant] = name
+    info['variants'] = variants
+    return info
+
+
+def pdf_info(fp):
+    if pypdf is not None:
+        try:
+            reader = pypdf.PdfReader(fp)
+            box = reader.pages[0].mediabox if reader.pages else None
+            return {
+                'pages': len(reader.pages),
+                'page_size': [float(box.width), float(box.height)] if box is not None else None,
+            }
+        except Exception:
+            fp.seek(0)
+    return scan_pdf(fp)
+
+
+def scan_pdf(fp):
+    """
+    Counts page objects block by block, so memory stays at ``SCAN_BLOCK``.
+    Pages hidden in compressed object streams are not seen; ``pages`` is
+    ``None`` rather than a wrong zero in that case.
+    """
+    pages = 0
+    page_size = None
+    carry = b''
+    while True:
+        block = fp.read(SCAN_BLOCK)
+        data = carry + block
+        # Matches starting in the last 64 bytes are counted with the next block.
+        cutoff = len(data) if not block else max(len(data) - 64, 0)
+        pages += sum(1 for match in _PAGE_RE.finditer(data) if match.start() < cutoff)
+        if page_size is None:
+            box = _MEDIABOX_RE.search(data)
+            if box:
+                x0, y0, x1, y1 = (float(value) for value in box.groups())
+                page_size = [abs(x1 - x0), abs(y1 - y0)]
+        if not block:
+            break
+        carry = data[cutoff:]
+    return {'pages': pages or None, 'page_size': page_size}
+
+
+def variant_urls(variants, request=None):
+    """Storage names from ``metadata['variants']`` -> URLs, without opening any file."""
+    urls = {}
+    for variant, name in (variants or {}).items():
+        url = default_storage.url(name)
+        urls[variant] = request.build_absolute_uri(url) if request is not None else url
+    return urls
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:28
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='aiassistantinteraction',
+            index=models.Index(fields=['created_at', 'id'], name='core_aiassi_created_bd2a49_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiassistantinteraction',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='core_aiassi_user_id_21a5d0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['submitted_at', 'id'], name='core_applic_submitt_41e525_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['created_at', 'id'], name='core_vacanc_created_a49898_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+from core.search import get_backend, index_in_batches
+
+
+def create_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    backend.create()
+    Vacancy = apps.get_model('core', 'Vacancy')
+    rows = Vacancy.objects.values_list('id', 'title', 'location', 'description')
+    index_in_batches(backend, rows.iterator(chunk_size=1000))
+
+
+def drop_search_index(apps, schema_editor):
+    backend = get_backend(schema_editor.connection)
+    if backend is not None:
+        backend.drop()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,54 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:31
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_vacancy_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchScore',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('score', models.FloatField()),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='skills',
+            field=models.JSONField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vacancy', 'score'], name='core_applic_vacancy_01924f_idx'),
+        ),
+        migrations.AddField(
+            model_name='matchscore',
+            name='candidate',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='core.candidateprofile'),
+        ),
+        migrations.AddField(
+            model_name='matchscore',
+            name='vacancy',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_scores', to='core.vacancy'),
+        ),
+        migrations.AddIndex(
+            model_name='matchscore',
+            index=models.Index(fields=['vacancy', '-score'], name='core_matchs_vacancy_5ee0b8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchscore',
+            index=models.Index(fields=['candidate', '-score'], name='core_matchs_candida_be9404_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='matchscore',
+            unique_together={('vacancy', 'candidate')},
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:33
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_match_scores'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('is_employer', models.BooleanField(default=False)),
+                ('is_candidate', models.BooleanField(default=False)),
+                ('employer_total_vacancies', models.IntegerField(default=0)),
+                ('employer_open_vacancies', models.IntegerField(default=0)),
+                ('employer_total_applications', models.IntegerField(default=0)),
+                ('employer_pending_applications', models.IntegerField(default=0)),
+                ('candidate_total_applications', models.IntegerField(default=0)),
+                ('candidate_pending_applications', models.IntegerField(default=0)),
+                ('candidate_accepted_applications', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
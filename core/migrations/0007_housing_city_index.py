@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:37
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_geospatial_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='housinglisting',
+            index=models.Index(django.db.models.functions.text.Lower('city'), name='core_housing_city_lower_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_housing_city_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='visacase',
+            index=models.Index(fields=['created_at', 'id'], name='core_visaca_created_aa50eb_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visacase',
+            index=models.Index(fields=['assigned_officer', 'created_at', 'id'], name='core_visaca_assigne_de8f77_idx'),
+        ),
+    ]
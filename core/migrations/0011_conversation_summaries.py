@@ -0,0 +1,53 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:53
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_processing_jobs'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConversationSummary',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('summary', models.TextField(blank=True)),
+                ('turns', models.PositiveIntegerField(default=0)),
+                ('covered_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='aiassistantinteraction',
+            index=models.Index(fields=['application', 'created_at', 'id'], name='core_aiassi_applica_0493de_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='aiassistantinteraction',
+            index=models.Index(fields=['user', 'application', 'created_at', 'id'], name='core_aiassi_user_id_43f0a7_idx'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to='core.application'),
+        ),
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversation_summaries', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('application__isnull', False)), fields=('user', 'application'), name='conversation_summary_user_application'),
+        ),
+        migrations.AddConstraint(
+            model_name='conversationsummary',
+            constraint=models.UniqueConstraint(condition=models.Q(('application__isnull', True)), fields=('user',), name='conversation_summary_user_general'),
+        ),
+    ]
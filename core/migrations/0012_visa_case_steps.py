@@ -0,0 +1,77 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:55
+
+import django.db.models.deletion
+import django.utils.timezone
+import uuid
+from django.conf import settings
+from datetime import timedelta
+
+from django.db import migrations, models
+
+
+def step_times(case, steps):
+    """
+    ``created_at`` plus the list index, so the legacy list order is kept and
+    every later step sorts after it. A step's own ``date`` may be a planned
+    appointment in the future, so it stays in ``data`` only.
+    """
+    for index in range(len(steps)):
+        yield case.created_at + timedelta(microseconds=index)
+
+
+def backfill_steps(apps, schema_editor):
+    VisaCase = apps.get_model('core', 'VisaCase')
+    VisaCaseStep = apps.get_model('core', 'VisaCaseStep')
+    batch = []
+    for case in VisaCase.objects.only('id', 'steps', 'created_at').iterator(chunk_size=500):
+        steps = [step for step in case.steps or [] if isinstance(step, dict)]
+        for step, moment in zip(steps, step_times(case, steps)):
+            batch.append(VisaCaseStep(
+                case_id=case.pk, data=step, created_at=moment,
+                name=str(step.get('step', ''))[:64], status=str(step.get('status', ''))[:64],
+            ))
+        if len(batch) >= 1000:
+            VisaCaseStep.objects.bulk_create(batch)
+            batch = []
+    VisaCaseStep.objects.bulk_create(batch)
+
+
+def restore_steps(apps, schema_editor):
+    VisaCase = apps.get_model('core', 'VisaCase')
+    VisaCaseStep = apps.get_model('core', 'VisaCaseStep')
+    steps = {}
+    for case_id, data in VisaCaseStep.objects.order_by('case', 'created_at', 'id').values_list('case_id', 'data'):
+        steps.setdefault(case_id, []).append(data)
+    for case_id, case_steps in steps.items():
+        VisaCase.objects.filter(pk=case_id).update(steps=case_steps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_conversation_summaries'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisaCaseStep',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=64)),
+                ('status', models.CharField(blank=True, max_length=64)),
+                ('data', models.JSONField(default=dict)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='visa_case_steps', to=settings.AUTH_USER_MODEL)),
+                ('case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='step_log', to='core.visacase')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['case', 'created_at', 'id'], name='core_visaca_case_id_6f11bd_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_steps, restore_steps),
+        migrations.RemoveField(
+            model_name='visacase',
+            name='steps',
+        ),
+    ]
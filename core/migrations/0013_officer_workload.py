@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 11:58
+
+import django.db.models.deletion
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_due_dates(apps, schema_editor):
+    VisaCase = apps.get_model('core', 'VisaCase')
+    VisaCase.objects.filter(due_at__isnull=True).update(
+        due_at=F('created_at') + timedelta(days=settings.VISA_CASE_SLA_DAYS),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_visa_case_steps'),
+        ('users', '0002_user_profile_pic_variants'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfficerWorkload',
+            fields=[
+                ('officer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='workload', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('open_cases', models.IntegerField(default=0)),
+                ('next_due_at', models.DateTimeField(blank=True, null=True)),
+                ('last_assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='visacase',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='visacase',
+            index=models.Index(fields=['assigned_officer', 'status', 'due_at'], name='core_visaca_assigne_0c1222_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='officerworkload',
+            index=models.Index(fields=['open_cases', 'next_due_at'], name='core_office_open_ca_a2f15a_idx'),
+        ),
+        migrations.RunPython(backfill_due_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_officer_workload'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='application',
+            name='core_applic_vacancy_01924f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='uploadsession',
+            name='core_upload_status_ee95ef_idx',
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vacancy', 'score', 'submitted_at'], name='core_applic_vacancy_6936d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['vacancy', 'status'], name='core_applic_vacancy_c11c30_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['candidate', 'status'], name='core_applic_candida_dc4f68_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='document',
+            index=models.Index(fields=['owner', 'uploaded_at', 'id'], name='core_docume_owner_i_fd676b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='uploadsession',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['expires_at'], name='core_upload_open_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['employer', 'status'], name='core_vacanc_employe_bea201_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='visacase',
+            index=models.Index(fields=['assigned_officer', 'due_at', 'created_at', 'id'], name='core_visaca_assigne_bd984d_idx'),
+        ),
+    ]
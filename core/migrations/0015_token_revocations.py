@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:38
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_query_pattern_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TokenRevocation',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('jti', models.CharField(blank=True, max_length=255)),
+                ('user_pk', models.BigIntegerField(blank=True, null=True)),
+                ('issued_before', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_at'], name='core_tokenr_created_162ee0_idx'), models.Index(fields=['expires_at'], name='core_tokenr_expires_e9de73_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.db import migrations
+
+from core.search import get_backend, index_in_batches
+
+
+def rebuild_search_index(apps, schema_editor):
+    # Drops the PostgreSQL foreign key to core_vacancy and moves SQLite onto the rowid table.
+    backend = get_backend(schema_editor.connection)
+    if backend is None:
+        return
+    backend.drop()
+    backend.create()
+    Vacancy = apps.get_model('core', 'Vacancy')
+    rows = Vacancy.objects.values_list('id', 'title', 'location', 'description')
+    index_in_batches(backend, rows.iterator(chunk_size=1000))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_token_revocations'),
+    ]
+
+    operations = [
+        migrations.RunPython(rebuild_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.6 on 2026-10-17 12:53
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_search_index_without_fk'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='aiassistantinteraction',
+            name='application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ai_interactions', to='core.application'),
+        ),
+    ]
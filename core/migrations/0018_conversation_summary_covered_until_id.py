@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-17 13:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_ai_interaction_application_cascade'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversationsummary',
+            name='covered_until_id',
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -1,12 +1,15 @@
 import uuid
+from datetime import timedelta
 from django.db import models
 from decimal import Decimal
 from django.conf import settings
 from django.db.models import JSONField
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 from users.models import User
+from .geo import encode as geohash_encode
 
 CURRENCY_CHOICES = [
     ('EUR', 'Euro'),
@@ -72,7 +75,10 @@ class Vacancy(models.Model):
     salary = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
     currency = models.CharField(max_length=3, choices=CURRENCY_CHOICES, default='EUR')
     location = models.CharField(max_length=255)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90.0), MaxValueValidator(90.0)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180.0), MaxValueValidator(180.0)])
     remote = models.BooleanField(default=False)
+    skills = models.JSONField(blank=True, null=True)
     status = models.CharField(max_length=16, choices=VACANCY_STATUS, default='open')
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField(null=True, blank=True)
@@ -80,6 +86,8 @@ class Vacancy(models.Model):
     class Meta:
         indexes = [
             models.Index(fields=['status', 'created_at']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['employer', 'status']),
         ]
 
     def __str__(self):
@@ -98,44 +106,172 @@ class Application(models.Model):
 
     class Meta:
         unique_together = ('vacancy', 'candidate')
+        indexes = [
+            models.Index(fields=['submitted_at', 'id']),
+            models.Index(fields=['vacancy', 'score', 'submitted_at']),
+            models.Index(fields=['vacancy', 'status']),
+            models.Index(fields=['candidate', 'status']),
+        ]
 
     def __str__(self):
         return f"{self.candidate} -> {self.vacancy} ({self.status})"
 
 
+class MatchScore(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    vacancy = models.ForeignKey(Vacancy, on_delete=models.CASCADE, related_name='match_scores')
+    candidate = models.ForeignKey(CandidateProfile, on_delete=models.CASCADE, related_name='match_scores')
+    score = models.FloatField()
+    computed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('vacancy', 'candidate')
+        indexes = [
+            models.Index(fields=['vacancy', '-score']),
+            models.Index(fields=['candidate', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.candidate} ~ {self.vacancy}: {self.score:.1f}"
+
+
+class DocumentBlob(models.Model):
+    """One stored file per distinct content; documents with identical bytes share it."""
+    sha256 = models.CharField(max_length=64, primary_key=True)
+    file = models.FileField(upload_to='blobs/')
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256} ({self.size} bytes)"
+
+
 class Document(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='documents')
     application = models.ForeignKey(Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='documents')
     doc_type = models.CharField(max_length=32, choices=DOCUMENT_TYPES)
     file = models.FileField(upload_to='documents/%Y/%m/%d/')
+    blob = models.ForeignKey(DocumentBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='documents')
     metadata = models.JSONField(blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'uploaded_at', 'id']),
+        ]
+
     def __str__(self):
         return f"{self.owner} - {self.doc_type}"
 
 
+UPLOAD_STATUS = [
+    ('open', 'Open'),
+    ('complete', 'Complete'),
+]
+
+
+class UploadSession(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_sessions')
+    application = models.ForeignKey(Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_sessions')
+    doc_type = models.CharField(max_length=32, choices=DOCUMENT_TYPES)
+    metadata = models.JSONField(blank=True, null=True)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    sha256 = models.CharField(max_length=64, blank=True)
+    received = models.BigIntegerField(default=0)
+    status = models.CharField(max_length=16, choices=UPLOAD_STATUS, default='open')
+    document = models.OneToOneField(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='upload_session')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires_at'], condition=models.Q(status='open'), name='core_upload_open_expiry_idx'),
+        ]
+
+    def __str__(self):
+        return f"Upload {self.filename} ({self.received}/{self.size})"
+
+
 class VisaCase(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='visa_case')
     assigned_officer = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='assigned_cases')
     status = models.CharField(max_length=64, default='initiated')
-    steps = models.JSONField(default=list, blank=True)
     instructions = models.TextField(blank=True, null=True)
+    due_at = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
-    def add_step(self, step: dict):
-        s = self.steps or []
-        s.append(step)
-        self.steps = s
-        self.save(update_fields=['steps', 'updated_at'])
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['assigned_officer', 'created_at', 'id']),
+            models.Index(fields=['assigned_officer', 'status', 'due_at']),
+            models.Index(fields=['assigned_officer', 'due_at', 'created_at', 'id']),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.due_at is None and self._state.adding:
+            self.due_at = timezone.now() + timedelta(days=settings.VISA_CASE_SLA_DAYS)
+        super().save(*args, **kwargs)
+
+    @property
+    def steps(self):
+        """Step dicts oldest first; served from the ``step_log`` prefetch when present."""
+        if 'step_log' in getattr(self, '_prefetched_objects_cache', {}):
+            rows = self.step_log.all()
+        else:
+            rows = self.step_log.order_by('created_at', 'id')
+        return [row.data for row in rows]
+
+    def add_steps(self, steps, author=None):
+        """Appends with one INSERT; existing steps are never read or rewritten."""
+        now = timezone.now()
+        rows = VisaCaseStep.objects.bulk_create([
+            VisaCaseStep.from_data(self, step, author, created_at=now + timedelta(microseconds=offset))
+            for offset, step in enumerate(steps)
+        ])
+        VisaCase.objects.filter(pk=self.pk).update(updated_at=now)
+        getattr(self, '_prefetched_objects_cache', {}).pop('step_log', None)
+        return rows
+
+    def add_step(self, step: dict, author=None):
+        return self.add_steps([step], author)[0]
 
     def __str__(self):
         return f"VisaCase for {self.application}"
 
 
+class VisaCaseStep(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    case = models.ForeignKey(VisaCase, on_delete=models.CASCADE, related_name='step_log')
+    name = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=64, blank=True)
+    data = models.JSONField(default=dict)
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='visa_case_steps')
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['case', 'created_at', 'id']),
+        ]
+
+    @classmethod
+    def from_data(cls, case, data, author=None, **kwargs):
+        return cls(
+            case=case, data=data, author=author,
+            name=str(data.get('step', ''))[:64], status=str(data.get('status', ''))[:64],
+            **kwargs,
+        )
+
+    def __str__(self):
+        return f"{self.name or 'step'} ({self.status}) for {self.case_id}"
+
+
 class HousingListing(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     provider_name = models.CharField(max_length=255, blank=True, null=True)
@@ -148,9 +284,29 @@ class HousingListing(models.Model):
     url = models.URLField(blank=True, null=True)
     distance_to_work_m = models.IntegerField(null=True, blank=True)
     commute_minutes = models.IntegerField(null=True, blank=True)
+    latitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-90.0), MaxValueValidator(90.0)])
+    longitude = models.FloatField(null=True, blank=True, validators=[MinValueValidator(-180.0), MaxValueValidator(180.0)])
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False, db_index=True)
     listed_at = models.DateTimeField(default=timezone.now)
     metadata = models.JSONField(blank=True, null=True)
 
+    class Meta:
+        indexes = [
+            models.Index(Lower('city'), name='core_housing_city_lower_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return None
+        return geohash_encode(self.latitude, self.longitude)
+
     def __str__(self):
         return f"{self.address} — {self.price} {self.currency}"
 
@@ -181,8 +337,15 @@ class ExpenseEstimate(models.Model):
 
     @property
     def daily_total(self):
+        # Querysets from ``core.expenses.annotate_totals`` compute this in SQL.
+        if '_daily_total' in self.__dict__:
+            return self._daily_total
         return (self.daily_commute_cost or Decimal('0.00')) + (self.daily_food_cost or Decimal('0.00'))
 
+    @daily_total.setter
+    def daily_total(self, value):
+        self._daily_total = value
+
     def __str__(self):
         return f"ExpenseEstimate {self.application} = {self.daily_total} {self.currency}"
 
@@ -190,11 +353,134 @@ class ExpenseEstimate(models.Model):
 class AIAssistantInteraction(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_interactions')
-    application = models.ForeignKey(Application, on_delete=models.SET_NULL, null=True, blank=True, related_name='ai_interactions')
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, null=True, blank=True, related_name='ai_interactions')
     role = models.CharField(max_length=32, choices=[('assistant','assistant'), ('user','user')], default='assistant')
     message = models.TextField()
     metadata = models.JSONField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['application', 'created_at', 'id']),
+            models.Index(fields=['user', 'application', 'created_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"AI msg to {self.user} at {self.created_at}"
+
+
+class ConversationSummary(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversation_summaries')
+    application = models.ForeignKey(Application, on_delete=models.CASCADE, null=True, blank=True, related_name='conversation_summaries')
+    summary = models.TextField(blank=True)
+    turns = models.PositiveIntegerField(default=0)
+    covered_until = models.DateTimeField()
+    # Id of the last covered message, to split messages sharing the covered_until timestamp.
+    covered_until_id = models.UUIDField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'application'], condition=models.Q(application__isnull=False),
+                name='conversation_summary_user_application',
+            ),
+            models.UniqueConstraint(
+                fields=['user'], condition=models.Q(application__isnull=True),
+                name='conversation_summary_user_general',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Summary of {self.turns} turns for {self.user}"
+
+
+class DashboardCounters(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='dashboard_counters')
+    is_employer = models.BooleanField(default=False)
+    is_candidate = models.BooleanField(default=False)
+    employer_total_vacancies = models.IntegerField(default=0)
+    employer_open_vacancies = models.IntegerField(default=0)
+    employer_total_applications = models.IntegerField(default=0)
+    employer_pending_applications = models.IntegerField(default=0)
+    candidate_total_applications = models.IntegerField(default=0)
+    candidate_pending_applications = models.IntegerField(default=0)
+    candidate_accepted_applications = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Dashboard counters for {self.user}"
+
+
+class OfficerWorkload(models.Model):
+    officer = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='workload')
+    open_cases = models.IntegerField(default=0)
+    next_due_at = models.DateTimeField(null=True, blank=True)
+    last_assigned_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['open_cases', 'next_due_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.officer}: {self.open_cases} open cases"
+
+
+JOB_STATUS = [
+    ('queued', 'Queued'),
+    ('running', 'Running'),
+    ('done', 'Done'),
+    ('failed', 'Failed'),
+]
+
+
+class ProcessingJob(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(max_length=32)
+    target_id = models.CharField(max_length=64)
+    status = models.CharField(max_length=16, choices=JOB_STATUS, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=64, blank=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+            models.Index(fields=['kind', 'target_id']),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} job for {self.target_id} ({self.status})"
+
+
+class TokenRevocation(models.Model):
+    """
+    A revoked JWT (``jti``), or a user whose tokens issued before
+    ``issued_before`` carry stale claims. Rows outlive the tokens they affect
+    only until ``expires_at``; see core/authentication.py.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    jti = models.CharField(max_length=255, blank=True)
+    # Not a foreign key: the marker must survive the user being deleted.
+    user_pk = models.BigIntegerField(null=True, blank=True)
+    issued_before = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at']),
+            models.Index(fields=['expires_at']),
+        ]
+
     def __str__(self):
-        return f"AI msg to {self.user} at {self.created_at}"
\ No newline at end of file
+        return f"Revoked token {self.jti}" if self.jti else f"Stale claims for user {self.user_pk}"
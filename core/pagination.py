@@ -0,0 +1,137 @@
+import base64
+import json
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(LimitOffsetPagination):
+    """
+    Limit/offset by default; keyset pagination when the client opts in with
+    ``?pagination=cursor`` or sends a ``cursor``.
+
+    Both modes follow the view's ``ordering`` (field names, ``-`` for
+    descending; the primary key is appended as the tie-breaker) with NULLs
+    last. Keyset pages of views without one are newest first on
+    ``(ordering_field, pk)``. Keyset pages seek past the last row with a
+    comparison the matching index serves directly and never run COUNT.
+    """
+
+    ordering_field = 'created_at'
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def use_keyset(self, request):
+        return (request.query_params.get(self.mode_query_param) == 'cursor'
+                or self.cursor_query_param in request.query_params)
+
+    def get_ordering(self, view):
+        ordering = tuple(getattr(view, 'ordering', None) or (f'-{self.ordering_field}', '-pk'))
+        if ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering += ('-pk' if ordering[-1].startswith('-') else 'pk',)
+        return ordering
+
+    def get_keys(self, model, view):
+        """``(name, descending, model field)`` for each entry of the view's ordering."""
+        keys = []
+        for name in self.get_ordering(view):
+            descending, name = name.startswith('-'), name.lstrip('-')
+            keys.append((name, descending, model._meta.pk if name == 'pk' else model._meta.get_field(name)))
+        return keys
+
+    @staticmethod
+    def order_expression(name, descending, field):
+        if not field.null:
+            return f'-{name}' if descending else name
+        return F(name).desc(nulls_last=True) if descending else F(name).asc(nulls_last=True)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keys = self.get_keys(queryset.model, view)
+        self.keyset = self.use_keyset(request)
+        if self.keyset or getattr(view, 'ordering', None):
+            queryset = queryset.order_by(*(self.order_expression(*key) for key in self.keys))
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.after(position))
+
+        results = list(queryset[:self.limit + 1])
+        self.has_next = len(results) > self.limit
+        results = results[:self.limit]
+        self.next_position = None
+        if self.has_next:
+            last = results[-1]
+            self.next_position = [getattr(last, name) for name, _, _ in self.keys]
+        return results
+
+    def after(self, position):
+        """Rows past ``position``: equal on a prefix of the keys and past it on the next one."""
+        condition = Q(pk__in=[])
+        equal = Q()
+        for (name, descending, field), value in zip(self.keys, position):
+            if value is None:
+                # NULLs sort last, so only rows that are also NULL here can come later.
+                equal &= Q(**{f'{name}__isnull': True})
+                continue
+            past = Q(**{f"{name}__{'lt' if descending else 'gt'}": value})
+            if field.null:
+                past |= Q(**{f'{name}__isnull': True})
+            condition |= equal & past
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if self.next_position is None:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.mode_query_param, 'cursor')
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def encode_cursor(self, position):
+        values = [value.isoformat() if isinstance(value, datetime) else value for value in position]
+        payload = json.dumps(values, separators=(',', ':'), cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            if not isinstance(values, list) or len(values) != len(self.keys):
+                raise ValueError
+            position = [field.to_python(value) for (_, _, field), value in zip(self.keys, values)]
+        except (TypeError, ValueError, ValidationError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if position[-1] is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+
+class ApplicationKeysetPagination(KeysetPagination):
+    ordering_field = 'submitted_at'
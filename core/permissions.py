@@ -0,0 +1,51 @@
+"""
+Object-level permissions shared by views.
+
+:class:`IsApplicationParticipant` authorizes the ``applications/<application_id>/``
+views with one indexed ``EXISTS`` against the request principal (see
+:mod:`core.principals`) instead of loading the application with its candidate,
+vacancy and employer. Visa cases are scoped the same way: outside staff, a
+user only sees and opens cases on applications they take part in.
+"""
+from django.db.models import Q
+from django.http import Http404
+from rest_framework import permissions
+
+from .models import Application, VisaCase
+from .principals import get_principal
+
+
+def participant_applications(principal):
+    """Applications the principal takes part in, as candidate or as the vacancy's employer."""
+    scope = Q()
+    if principal.candidate_id is not None:
+        scope |= Q(candidate_id=principal.candidate_id)
+    if principal.employer_id is not None:
+        scope |= Q(vacancy__employer_id=principal.employer_id)
+    return Application.objects.filter(scope) if scope else Application.objects.none()
+
+
+def visible_visa_cases(principal):
+    """Every case for staff; otherwise the cases on the principal's applications or assigned to them."""
+    if principal.is_staff:
+        return VisaCase.objects.all()
+    return VisaCase.objects.filter(
+        Q(application__in=participant_applications(principal).values('pk')) | Q(assigned_officer_id=principal.user_id)
+    )
+
+
+class IsApplicationParticipant(permissions.BasePermission):
+    """
+    Allows views under ``applications/<application_id>/`` to the application's
+    candidate and employer with one ``EXISTS`` on the primary key. Everyone
+    else, and unknown applications, get a 404 so ids are not disclosed.
+    Views without an ``application_id`` are not restricted.
+    """
+
+    def has_permission(self, request, view):
+        application_id = view.kwargs.get('application_id')
+        if application_id is None:
+            return True
+        if not participant_applications(get_principal(request)).filter(pk=application_id).exists():
+            raise Http404
+        return True
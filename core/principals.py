@@ -0,0 +1,87 @@
+"""
+Request-scoped principal.
+
+A :class:`Principal` carries what views need to authorize a request: the
+user id, the role, and the ids of the user's employer and candidate profiles.
+:func:`get_principal` builds it once per request. The profile ids are cached
+per user for ``PRINCIPAL_CACHE_TTL`` seconds, so most requests resolve them
+without a query. The ``Employer``/``CandidateProfile`` signal handlers in
+``core.signals`` drop the cached ids when a profile is created or deleted.
+
+:func:`employer_or_404` and :func:`candidate_or_404` replace
+``get_object_or_404(Employer, user=request.user)``. They return a stub with
+only ``id`` and ``user_id`` loaded, which is enough to use as a foreign key
+value.
+"""
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import Http404
+
+from users.models import User
+from .models import CandidateProfile, Employer
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    is_staff: bool
+    employer_id: object = None
+    candidate_id: object = None
+
+    @property
+    def role(self):
+        if self.is_staff:
+            return 'staff'
+        if self.employer_id is not None:
+            return 'employer'
+        if self.candidate_id is not None:
+            return 'candidate'
+        return 'user'
+
+
+def principal_key(user_id):
+    return f'principal:{user_id}'
+
+
+def forget_principal(user_id):
+    cache.delete(principal_key(user_id))
+
+
+def build_principal(user):
+    if user.pk is None:
+        return Principal(None, False)
+    key = principal_key(user.pk)
+    profile_ids = cache.get(key)
+    if profile_ids is None:
+        # One query; both profiles are LEFT JOINed one-to-one relations.
+        profile_ids = User.objects.filter(pk=user.pk).values_list(
+            'employer_profile__id', 'candidate_profile__id',
+        ).first() or (None, None)
+        cache.set(key, profile_ids, settings.PRINCIPAL_CACHE_TTL)
+    return Principal(user.pk, user.is_staff, *profile_ids)
+
+
+def get_principal(request):
+    """The request's principal, built on first use and kept on the underlying ``HttpRequest``."""
+    http_request = getattr(request, '_request', request)
+    principal = getattr(http_request, '_principal', None)
+    if principal is None or principal.user_id != request.user.pk:
+        principal = http_request._principal = build_principal(request.user)
+    return principal
+
+
+def employer_or_404(request):
+    principal = get_principal(request)
+    if principal.employer_id is None:
+        raise Http404('No Employer matches the given query.')
+    return Employer.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id'], [principal.employer_id, principal.user_id])
+
+
+def candidate_or_404(request):
+    principal = get_principal(request)
+    if principal.candidate_id is None:
+        raise Http404('No CandidateProfile matches the given query.')
+    return CandidateProfile.from_db(DEFAULT_DB_ALIAS, ['id', 'user_id'], [principal.candidate_id, principal.user_id])
@@ -0,0 +1,222 @@
+"""
+Background processing: document and profile picture files, and match
+re-scoring.
+
+Jobs live in the ``ProcessingJob`` table and are claimed by ``manage.py
+process_jobs`` workers. A worker locks a batch of due jobs, sends the file
+work (``core.media.inspect_file``) to a process pool, and writes the results
+back itself, so pool processes never hold database connections. Failed jobs
+are retried with exponential backoff up to ``settings.PROCESSING_MAX_ATTEMPTS``
+times; jobs left ``running`` by a crashed worker are reclaimed once their lock
+is older than ``settings.PROCESSING_LOCK_TIMEOUT`` seconds, and marked failed
+instead once they have used up their attempts.
+
+Each job kind names a handler. File handlers have ``prepare(target_id)``,
+returning the stored file name and the storage prefix for its variants
+(``None`` when there is nothing to do), and ``apply(target_id, name, info)``.
+Handlers with ``run(target_id)`` do all their work in the worker process.
+"""
+import hashlib
+import logging
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+import django
+from django.conf import settings
+from django.db import connection, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from users.models import User
+from .media import inspect_file
+from .models import CandidateProfile, Document, ProcessingJob, Vacancy
+from .scoring import score_candidates, score_vacancies
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentHandler:
+    def prepare(self, target_id):
+        document = Document.objects.filter(pk=target_id).select_related('blob').first()
+        if document is None or not document.file:
+            return None
+        # Content-addressed files share their variants.
+        key = document.blob_id or f'documents/{document.pk}'
+        return document.file.name, f'variants/{key}'
+
+    def apply(self, target_id, name, info):
+        with transaction.atomic():
+            document = Document.objects.select_for_update().filter(pk=target_id).first()
+            if document is None or document.file.name != name:
+                return
+            document.metadata = {**(document.metadata or {}), **info, 'processed_at': timezone.now().isoformat()}
+            document.save(update_fields=['metadata'])
+
+
+class ProfilePicHandler:
+    def prepare(self, target_id):
+        user = User.objects.filter(pk=target_id).only('profile_pic').first()
+        if user is None or not user.profile_pic:
+            return None
+        digest = hashlib.sha1(user.profile_pic.name.encode()).hexdigest()[:16]
+        return user.profile_pic.name, f'variants/profile_pics/{user.pk}/{digest}'
+
+    def apply(self, target_id, name, info):
+        User.objects.filter(pk=target_id, profile_pic=name).update(profile_pic_variants=info.get('variants'))
+
+
+class ScoringHandler:
+    """Re-scores one vacancy or candidate profile against every row on the other side."""
+
+    def __init__(self, model, score):
+        self.model = model
+        self.score = score
+
+    def run(self, target_id):
+        self.score(self.model.objects.filter(pk=target_id))
+
+
+HANDLERS = {
+    'document': DocumentHandler(),
+    'profile_pic': ProfilePicHandler(),
+    'score_vacancy': ScoringHandler(Vacancy, score_vacancies),
+    'score_candidate': ScoringHandler(CandidateProfile, score_candidates),
+}
+
+
+def enqueue(kind, target_id):
+    """Queues a job unless an identical one is already waiting."""
+    target_id = str(target_id)
+    if not ProcessingJob.objects.filter(kind=kind, target_id=target_id, status='queued').exists():
+        ProcessingJob.objects.create(kind=kind, target_id=target_id)
+
+
+def enqueue_many(kind, target_ids):
+    """:func:`enqueue` for many targets in two queries."""
+    target_ids = {str(target_id) for target_id in target_ids}
+    waiting = set(ProcessingJob.objects.filter(
+        kind=kind, target_id__in=target_ids, status='queued',
+    ).values_list('target_id', flat=True))
+    ProcessingJob.objects.bulk_create([
+        ProcessingJob(kind=kind, target_id=target_id) for target_id in sorted(target_ids - waiting)
+    ])
+
+
+def enqueue_on_commit(kind, target_id):
+    transaction.on_commit(lambda: enqueue(kind, target_id))
+
+
+def _init_pool_process():
+    # Only needed for the "spawn" start method; forked children inherit setup.
+    django.setup()
+
+
+def describe_error(exc):
+    return f'{type(exc).__name__}: {exc}'
+
+
+class Worker:
+    def __init__(self, processes=2, batch_size=8, poll_interval=2.0, name=None):
+        self.processes = processes
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.name = name or f'{socket.gethostname()}:{os.getpid()}'
+
+    def claim(self):
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.PROCESSING_LOCK_TIMEOUT)
+        max_attempts = settings.PROCESSING_MAX_ATTEMPTS
+        with transaction.atomic():
+            # A job whose worker died on every attempt is given up on, not reclaimed again.
+            ProcessingJob.objects.filter(status='running', locked_at__lt=stale, attempts__gte=max_attempts).update(
+                status='failed', last_error='Worker did not finish the job', locked_at=None,
+            )
+            due = (
+                ProcessingJob.objects
+                .filter(
+                    Q(status='queued', run_after__lte=now)
+                    | Q(status='running', locked_at__lt=stale, attempts__lt=max_attempts)
+                )
+                .order_by('run_after')
+            )
+            if connection.features.has_select_for_update_skip_locked:
+                due = due.select_for_update(skip_locked=True)
+            jobs = list(due[:self.batch_size])
+            ProcessingJob.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status='running', locked_by=self.name, locked_at=now, attempts=F('attempts') + 1,
+            )
+        return jobs
+
+    def finish(self, job, error=None):
+        if error is None:
+            ProcessingJob.objects.filter(pk=job.pk).update(status='done', last_error='', locked_at=None)
+            return
+        attempts = job.attempts + 1
+        failed = attempts >= settings.PROCESSING_MAX_ATTEMPTS
+        ProcessingJob.objects.filter(pk=job.pk).update(
+            status='failed' if failed else 'queued',
+            last_error=error,
+            locked_at=None,
+            run_after=timezone.now() + timedelta(seconds=2 ** attempts),
+        )
+        logger.warning('Processing job %s (%s %s) failed: %s', job.pk, job.kind, job.target_id, error)
+
+    def run_once(self, pool=None):
+        """Processes one batch; returns the number of jobs claimed."""
+        jobs = self.claim()
+        pending = []
+        for job in jobs:
+            handler = HANDLERS.get(job.kind)
+            if handler is None:
+                self.finish(job, f'Unknown job kind {job.kind!r}')
+                continue
+            try:
+                if hasattr(handler, 'run'):
+                    handler.run(job.target_id)
+                    prepared = None
+                else:
+                    prepared = handler.prepare(job.target_id)
+                if prepared is not None:
+                    name, prefix = prepared
+                    result = pool.submit(inspect_file, name, prefix) if pool is not None else None
+            except Exception as exc:
+                self.finish(job, describe_error(exc))
+                continue
+            if prepared is None:
+                self.finish(job)
+                continue
+            pending.append((job, handler, name, prefix, result))
+
+        for job, handler, name, prefix, result in pending:
+            try:
+                info = result.result() if result is not None else inspect_file(name, prefix)
+                handler.apply(job.target_id, name, info)
+            except Exception as exc:
+                self.finish(job, describe_error(exc))
+            else:
+                self.finish(job)
+        return len(jobs)
+
+    def run(self, once=False):
+        """Polls for jobs until interrupted, or until the queue is empty with ``once``."""
+        if not self.processes:
+            return self._loop(None, once)
+        # Children must not inherit open database connections.
+        connections.close_all()
+        context = multiprocessing.get_context()
+        with ProcessPoolExecutor(self.processes, mp_context=context, initializer=_init_pool_process) as pool:
+            return self._loop(pool, once)
+
+    def _loop(self, pool, once):
+        processed = 0
+        while True:
+            claimed = self.run_once(pool)
+            processed += claimed
+            if not claimed:
+                if once:
+                    return processed
+                time.sleep(self.poll_interval)
@@ -0,0 +1,225 @@
+"""
+Sampled request profiling.
+
+:class:`ProfilingMiddleware` times a random ``PROFILING_SAMPLE_RATE`` share of
+requests. For each sampled request it records wall time, the number of SQL
+queries, total SQL time, and any statement fingerprint that ran more than once
+(the usual sign of an N+1). Samples are aggregated in memory per
+``METHOD route``. Every ``PROFILING_FLUSH_INTERVAL`` seconds each process
+appends one JSON line per endpoint to ``PROFILING_FILE``.
+``manage.py perf_report`` merges those lines and prints the worst endpoints.
+
+Wall time runs until the view returns its response, so streamed bodies are
+not included. Queries are caught by a wrapper that ``core.signals`` installs
+on every new connection. The wrapper finds the current request's recorder
+through a context variable, so queries that sync views run in ASGI executor
+threads are counted too.
+"""
+import atexit
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+# Upper bounds (ms) of the latency histogram; the last bucket is open-ended.
+LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)')
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Collapses literals, placeholder lists and whitespace so repeated statements compare equal."""
+    sql = _LITERAL_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def bucket_index(elapsed_ms):
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if elapsed_ms <= bound:
+            return index
+    return len(LATENCY_BUCKETS)
+
+
+def percentile(buckets, fraction):
+    """Upper bound of the bucket holding the ``fraction`` quantile; ``None`` past the last bound."""
+    total = sum(buckets)
+    if not total:
+        return 0
+    seen = 0
+    for index, count in enumerate(buckets):
+        seen += count
+        if seen >= total * fraction:
+            return LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS) else None
+    return None
+
+
+class QueryRecorder:
+    """Counts a request's statements, their time and their fingerprints."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    def duplicates(self):
+        return {sql: count for sql, count in self.fingerprints.items() if count > 1}
+
+
+_recorder = ContextVar('profiling_recorder', default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = _recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_hook(connection):
+    # Innermost, so ``connection.execute_wrapper()`` blocks still pop their own wrapper.
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+def empty_stats():
+    return {
+        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+        'queries': 0, 'max_queries': 0, 'sql_ms': 0.0, 'duplicates': 0,
+        'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'fingerprints': {},
+    }
+
+
+def merge_stats(stats, other, max_fingerprints=None):
+    stats['count'] += other['count']
+    stats['total_ms'] += other['total_ms']
+    stats['max_ms'] = max(stats['max_ms'], other['max_ms'])
+    stats['queries'] += other['queries']
+    stats['max_queries'] = max(stats['max_queries'], other['max_queries'])
+    stats['sql_ms'] += other['sql_ms']
+    stats['duplicates'] += other['duplicates']
+    stats['buckets'] = [a + b for a, b in zip(stats['buckets'], other['buckets'])]
+    fingerprints = Counter(stats['fingerprints'])
+    fingerprints.update(other['fingerprints'])
+    stats['fingerprints'] = dict(fingerprints.most_common(max_fingerprints))
+    return stats
+
+
+class Aggregator:
+    """Per-process in-memory totals, appended to ``PROFILING_FILE`` at most once per flush interval."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.last_flush = time.monotonic()
+
+    def record(self, endpoint, elapsed_ms, recorder):
+        duplicates = recorder.duplicates()
+        sample = empty_stats()
+        sample.update(
+            count=1, total_ms=elapsed_ms, max_ms=elapsed_ms,
+            queries=recorder.count, max_queries=recorder.count, sql_ms=recorder.seconds * 1000,
+            duplicates=sum(count - 1 for count in duplicates.values()), fingerprints=duplicates,
+        )
+        sample['buckets'][bucket_index(elapsed_ms)] = 1
+        with self.lock:
+            stats = self.stats.setdefault(endpoint, empty_stats())
+            merge_stats(stats, sample, settings.PROFILING_MAX_FINGERPRINTS)
+            due = time.monotonic() - self.last_flush >= settings.PROFILING_FLUSH_INTERVAL
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            stats, self.stats = self.stats, {}
+            self.last_flush = time.monotonic()
+        if not stats:
+            return 0
+        now = time.time()
+        lines = [
+            json.dumps({
+                'ts': round(now, 3), 'pid': os.getpid(), 'endpoint': endpoint,
+                'sample_rate': settings.PROFILING_SAMPLE_RATE, **values,
+            })
+            for endpoint, values in stats.items()
+        ]
+        path = os.fspath(settings.PROFILING_FILE)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as fp:
+            fp.write('\n'.join(lines) + '\n')
+        return len(lines)
+
+
+aggregator = Aggregator()
+
+
+@atexit.register
+def flush_at_exit():
+    if settings.configured and aggregator.stats:
+        aggregator.flush()
+
+
+def endpoint_name(request):
+    match = getattr(request, 'resolver_match', None)
+    route = match.route if match is not None else 'unresolved'
+    return f'{request.method} {route}'
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        rate = settings.PROFILING_SAMPLE_RATE
+        return rate > 0 and (rate >= 1 or random.random() < rate)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        aggregator.record(endpoint_name(request), (time.perf_counter() - started) * 1000, recorder)
+        return response
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        token = _recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _recorder.reset(token)
+        aggregator.record(endpoint_name(request), (time.perf_counter() - started) * 1000, recorder)
+        return response
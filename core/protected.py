@@ -0,0 +1,131 @@
+"""
+Authorized media downloads.
+
+Document files are not publicly reachable. :func:`serve_file` answers a
+request that already passed the permission check. With
+``settings.MEDIA_ACCEL_REDIRECT`` the response is an empty
+``X-Accel-Redirect`` to an ``internal`` nginx location, and nginx transfers
+the bytes, ranges included. Without it (development, tests), Django serves
+the file itself with single-range and ``If-None-Match`` support.
+"""
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.crypto import salted_hmac
+from django.utils.http import content_disposition_header, quote_etag
+
+READ_SIZE = 64 * 1024
+_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def can_access_document(user, document):
+    if user.is_staff or document.owner_id == user.pk:
+        return True
+    application = document.application
+    if application is None:
+        return False
+    visa_case = getattr(application, 'visa_case', None)
+    return user.pk in (
+        application.candidate.user_id,
+        application.vacancy.employer.user_id,
+        visa_case.assigned_officer_id if visa_case is not None else None,
+    )
+
+
+def file_etag(name, digest=None):
+    """
+    Content-addressed files use an HMAC of their digest, so the ETag does not
+    reveal the content hash; others fall back to size and mtime.
+    """
+    if digest:
+        return quote_etag(salted_hmac('core.protected.file_etag', digest).hexdigest())
+    modified = default_storage.get_modified_time(name)
+    return quote_etag(f'{default_storage.size(name):x}-{int(modified.timestamp()):x}')
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == '*':
+        return True
+    candidates = [tag.strip().removeprefix('W/') for tag in header.split(',')]
+    return etag in candidates
+
+
+def parse_range(header, size):
+    """Returns ``(start, end)`` inclusive for a single ``bytes=`` range, or ``None``."""
+    match = _RANGE_RE.match(header or '')
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first == '':
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable
+    return start, end
+
+
+def _read_range(fp, start, length):
+    try:
+        fp.seek(start)
+        while length > 0:
+            block = fp.read(min(READ_SIZE, length))
+            if not block:
+                break
+            length -= len(block)
+            yield block
+    finally:
+        fp.close()
+
+
+def serve_file(request, name, filename, content_type, etag):
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        # nginx decodes the URI, so legacy names with spaces, '?', '#' or '%' must be escaped.
+        response['X-Accel-Redirect'] = f'{settings.MEDIA_ACCEL_PREFIX}{quote(name)}'
+    else:
+        response = _serve_from_django(request, name, content_type, etag)
+
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = content_disposition_header(False, filename)
+    return response
+
+
+def _serve_from_django(request, name, content_type, etag):
+    size = default_storage.size(name)
+    if_range = request.headers.get('If-Range')
+    byte_range = None
+    if if_range is None or if_range == etag:
+        try:
+            byte_range = parse_range(request.headers.get('Range'), size)
+        except RangeNotSatisfiable:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    fp = default_storage.open(name, 'rb')
+    if byte_range is None:
+        return FileResponse(fp, content_type=content_type)
+
+    start, end = byte_range
+    response = StreamingHttpResponse(_read_range(fp, start, end - start + 1), status=206, content_type=content_type)
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Content-Length'] = str(end - start + 1)
+    return response
@@ -0,0 +1,45 @@
+"""
+Query planning for serializer-driven views.
+
+Serializers declare the relation paths their output walks in ``Meta``::
+
+    class Meta:
+        select_related = ['vacancy__employer', 'candidate__user']
+        prefetch_related = ['documents']
+
+and views mixing in :class:`QueryPlanMixin` apply them to every queryset they
+serialize, so ``StringRelatedField`` / ``__str__`` chains are resolved by
+joins instead of one lazy load per row.
+"""
+
+# Relation paths walked by ``Application.__str__``. Reused by every serializer
+# that renders an application through ``StringRelatedField``.
+APPLICATION_RELATED = ['vacancy__employer', 'candidate__user']
+
+
+def related_paths(prefix, paths):
+    return [f'{prefix}__{path}' for path in paths]
+
+
+def get_query_plan(serializer_class):
+    meta = getattr(serializer_class, 'Meta', None)
+    select = list(getattr(meta, 'select_related', ()))
+    prefetch = list(getattr(meta, 'prefetch_related', ()))
+    return select, prefetch
+
+
+def apply_query_plan(queryset, serializer_class):
+    select, prefetch = get_query_plan(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    return queryset
+
+
+class QueryPlanMixin:
+    """Applies the serializer's declared relation paths to the view queryset."""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_query_plan(queryset, self.get_serializer_class())
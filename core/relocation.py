@@ -0,0 +1,142 @@
+"""
+Batch generation of ``RelocationSuggestion`` rows.
+
+Accepted applications without suggestions are walked in primary-key chunks.
+For each chunk the housing listings of the chunk's cities are loaded once,
+every application picks its best listings by commute and price within its
+budget, and the suggestions are written with one ``bulk_create`` per chunk.
+Memory is bounded by the chunk size plus the listings of its cities.
+"""
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.db.models import Exists, OuterRef
+from django.db.models.functions import Lower
+
+from .fx import UnknownCurrency, get_rates
+from .models import Application, HousingListing, RelocationSuggestion
+
+UNKNOWN_COMMUTE = 10 ** 6
+
+
+@dataclass
+class GenerationStats:
+    applications: int = 0
+    suggestions: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self):
+        return self.applications / self.seconds if self.seconds else float(self.applications)
+
+
+def vacancy_city(location):
+    """``'Nicosia, Cyprus'`` -> ``'nicosia'``; listings are matched on this."""
+    return (location or '').split(',')[0].strip().lower()
+
+
+class SuggestionGenerator:
+    def __init__(self, per_application=3, budget_ratio=Decimal('0.4'), max_commute_minutes=60, chunk_size=500):
+        self.per_application = per_application
+        self.budget_ratio = Decimal(budget_ratio)
+        self.max_commute_minutes = max_commute_minutes
+        self.chunk_size = chunk_size
+
+    def pending_applications(self):
+        has_suggestions = RelocationSuggestion.objects.filter(application=OuterRef('pk'))
+        return (
+            Application.objects
+            .filter(status='accepted')
+            .filter(~Exists(has_suggestions))
+            .order_by('pk')
+            .values('pk', 'vacancy__location', 'vacancy__salary', 'vacancy__currency')
+        )
+
+    def chunks(self):
+        queryset = self.pending_applications()
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk[:self.chunk_size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1]['pk']
+
+    def listings_by_city(self, cities):
+        listings = (
+            HousingListing.objects
+            .annotate(city_key=Lower('city'))
+            .filter(city_key__in=cities)
+            .values('pk', 'city', 'price', 'currency', 'commute_minutes')
+        )
+        if self.max_commute_minutes is not None:
+            listings = listings.exclude(commute_minutes__gt=self.max_commute_minutes)
+
+        by_city = {}
+        for listing in listings:
+            by_city.setdefault(listing['city'].strip().lower(), []).append(listing)
+        for city_listings in by_city.values():
+            city_listings.sort(key=self.rank_key)
+        return by_city
+
+    @staticmethod
+    def rank_key(listing):
+        commute = listing['commute_minutes']
+        return (commute if commute is not None else UNKNOWN_COMMUTE, listing['price'])
+
+    def pick(self, application, listings):
+        salary = application['vacancy__salary']
+        currency = application['vacancy__currency']
+        budget = salary * self.budget_ratio if salary else None
+        rates = get_rates()
+        picked = []
+        for listing in listings:
+            if budget is not None:
+                try:
+                    price = rates.convert(listing['price'], listing['currency'], currency)
+                except UnknownCurrency:
+                    continue
+                if price > budget:
+                    continue
+            picked.append(listing)
+            if len(picked) == self.per_application:
+                break
+        return picked
+
+    def reason(self, application, listing):
+        parts = [f"In {listing['city']}"]
+        if listing['commute_minutes'] is not None:
+            parts.append(f"{listing['commute_minutes']} min commute")
+        parts.append(f"{listing['price']} {listing['currency']}/month")
+        salary = application['vacancy__salary']
+        if salary:
+            try:
+                price = get_rates().convert(listing['price'], listing['currency'], application['vacancy__currency'])
+            except UnknownCurrency:
+                price = None
+            if price is not None:
+                parts.append(f"{price / salary:.0%} of salary")
+        return ', '.join(parts)
+
+    def run(self):
+        stats = GenerationStats()
+        started = time.monotonic()
+        for chunk in self.chunks():
+            cities = {vacancy_city(application['vacancy__location']) for application in chunk}
+            by_city = self.listings_by_city(cities)
+            suggestions = [
+                RelocationSuggestion(
+                    application_id=application['pk'],
+                    housing_id=listing['pk'],
+                    reason=self.reason(application, listing),
+                )
+                for application in chunk
+                for listing in self.pick(application, by_city.get(vacancy_city(application['vacancy__location']), []))
+            ]
+            RelocationSuggestion.objects.bulk_create(suggestions, ignore_conflicts=True)
+            stats.applications += len(chunk)
+            stats.suggestions += len(suggestions)
+        stats.seconds = time.monotonic() - started
+        return stats
@@ -0,0 +1,166 @@
+"""
+Candidate–vacancy match scoring.
+
+Skills are normalized into a shared vocabulary and every candidate and
+vacancy becomes a sparse vector of vocabulary indices. Scores are computed
+in NumPy batches as the share of a vacancy's skills a candidate covers
+(0–100), so one vacancy is scored against every candidate with a single
+matrix product. Non-zero scores are stored in ``MatchScore`` and copied onto
+``Application.score`` so list views can sort without recomputing.
+"""
+import numpy as np
+from django.db import transaction
+from django.db.models import FloatField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from .models import Application, CandidateProfile, MatchScore, Vacancy
+
+SKILL_ALIASES = {
+    'golang': 'go',
+    'js': 'javascript',
+    'k8s': 'kubernetes',
+    'node': 'node.js',
+    'nodejs': 'node.js',
+    'postgres': 'postgresql',
+    'py': 'python',
+    'reactjs': 'react',
+    'ts': 'typescript',
+    'vue': 'vue.js',
+    'vuejs': 'vue.js',
+}
+
+
+def normalize_skill(name):
+    term = ' '.join(str(name).lower().split())
+    return SKILL_ALIASES.get(term, term)
+
+
+def normalize_skills(raw):
+    """Accepts the shapes found in ``skills`` JSON: lists, ``{name: level}`` dicts or comma-separated strings."""
+    if not raw:
+        return []
+    if isinstance(raw, str):
+        items = raw.replace(';', ',').split(',')
+    elif isinstance(raw, dict):
+        items = raw.keys()
+    else:
+        items = [item.get('name', '') if isinstance(item, dict) else item for item in raw]
+    return sorted({normalize_skill(item) for item in items if str(item).strip()})
+
+
+class SkillVocabulary:
+    def __init__(self, terms=()):
+        self.index = {}
+        for term in terms:
+            self.add(term)
+
+    def __len__(self):
+        return len(self.index)
+
+    def add(self, term):
+        return self.index.setdefault(term, len(self.index))
+
+    def vector(self, skills):
+        """Sparse vector: sorted vocabulary indices of the known skills."""
+        indices = [self.index[term] for term in normalize_skills(skills) if term in self.index]
+        return np.array(sorted(indices), dtype=np.int32)
+
+    def matrix(self, vectors):
+        dense = np.zeros((len(vectors), len(self)), dtype=np.float32)
+        if vectors:
+            rows = np.repeat(np.arange(len(vectors)), [len(v) for v in vectors])
+            dense[rows, np.concatenate(vectors)] = 1.0
+        return dense
+
+
+def coverage_scores(candidates, vacancies):
+    """Scores for every (candidate, vacancy) pair as a candidates × vacancies array."""
+    overlap = candidates @ vacancies.T
+    required = vacancies.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = np.where(required > 0, 100.0 * overlap / required, 0.0)
+    return scores.astype(np.float32)
+
+
+class ScoringEngine:
+    """
+    Scores vacancy batches against candidate chunks so memory stays bounded
+    by ``candidate_chunk × vacancy_batch`` regardless of table sizes; only
+    one chunk of candidate vectors is densified at a time.
+    """
+
+    def __init__(self, vacancy_batch=256, candidate_chunk=4096):
+        self.vacancy_batch = vacancy_batch
+        self.candidate_chunk = candidate_chunk
+
+    def build(self, vacancies, candidates):
+        vacancy_ids, vacancy_skills = self._unzip(vacancies.values_list('id', 'skills'))
+        candidate_ids, candidate_skills = self._unzip(candidates.values_list('id', 'skills'))
+        vocabulary = SkillVocabulary(term for skills in vacancy_skills for term in normalize_skills(skills))
+        vacancy_vectors = [vocabulary.vector(skills) for skills in vacancy_skills]
+        candidate_vectors = [vocabulary.vector(skills) for skills in candidate_skills]
+        return vocabulary, vacancy_ids, vacancy_vectors, candidate_ids, candidate_vectors
+
+    def iter_scores(self, vocabulary, vacancy_ids, vacancy_vectors, candidate_ids, candidate_vectors):
+        """Yields ``(vacancy_id, candidate_id, score)`` for every non-zero pair."""
+        for v_start in range(0, len(vacancy_ids), self.vacancy_batch):
+            vacancy_matrix = vocabulary.matrix(vacancy_vectors[v_start:v_start + self.vacancy_batch])
+            for c_start in range(0, len(candidate_ids), self.candidate_chunk):
+                candidate_matrix = vocabulary.matrix(candidate_vectors[c_start:c_start + self.candidate_chunk])
+                scores = coverage_scores(candidate_matrix, vacancy_matrix)
+                for row, col in zip(*np.nonzero(scores)):
+                    yield vacancy_ids[v_start + col], candidate_ids[c_start + row], round(float(scores[row, col]), 2)
+
+    def score(self, vacancies=None, candidates=None):
+        """
+        Recomputes and stores scores for the given vacancies against all
+        candidates, or for the given candidates against all vacancies.
+        Returns the number of pairs evaluated.
+        """
+        scoped_vacancies = vacancies is not None
+        vacancies = vacancies if vacancies is not None else Vacancy.objects.all()
+        candidates = candidates if candidates is not None else CandidateProfile.objects.all()
+        built = self.build(vacancies, candidates)
+
+        with transaction.atomic():
+            if scoped_vacancies:
+                MatchScore.objects.filter(vacancy__in=vacancies).delete()
+            else:
+                MatchScore.objects.filter(candidate__in=candidates).delete()
+
+            batch = []
+            for vacancy_id, candidate_id, score in self.iter_scores(*built):
+                batch.append(MatchScore(vacancy_id=vacancy_id, candidate_id=candidate_id, score=score))
+                if len(batch) >= 1000:
+                    MatchScore.objects.bulk_create(batch)
+                    batch = []
+            MatchScore.objects.bulk_create(batch)
+
+            if scoped_vacancies:
+                applications = Application.objects.filter(vacancy__in=vacancies)
+            else:
+                applications = Application.objects.filter(candidate__in=candidates)
+            sync_application_scores(applications)
+
+        _, vacancy_ids, _, candidate_ids, _ = built
+        return len(vacancy_ids) * len(candidate_ids)
+
+    @staticmethod
+    def _unzip(rows):
+        rows = list(rows)
+        return [pk for pk, _ in rows], [skills for _, skills in rows]
+
+
+def sync_application_scores(applications):
+    match = MatchScore.objects.filter(vacancy=OuterRef('vacancy'), candidate=OuterRef('candidate'))
+    return applications.update(score=Coalesce(
+        Subquery(match.values('score')[:1]), Value(0.0), output_field=FloatField(),
+    ))
+
+
+def score_vacancies(vacancies):
+    return ScoringEngine().score(vacancies=vacancies)
+
+
+def score_candidates(candidates):
+    return ScoringEngine().score(candidates=candidates)
@@ -0,0 +1,294 @@
+"""
+Full-text vacancy search.
+
+The inverted index lives in its own table, ``core_vacancysearch``:
+
+* PostgreSQL: a weighted ``tsvector`` per vacancy behind a GIN index, ranked
+  with ``ts_rank_cd`` and highlighted with ``ts_headline``.
+* SQLite: an FTS5 virtual table ranked with ``bm25`` and highlighted with
+  ``highlight``/``snippet``.
+
+Rows are kept current by the ``post_save``/``post_delete`` handlers in
+``core.signals``. Paths that bypass signals (``bulk_create``, raw SQL) must
+call :func:`index_vacancies` themselves, or run ``manage.py
+rebuild_search_index``. The table has no foreign key to ``core_vacancy``, so
+``flush`` and ``TRUNCATE`` are unaffected; rows whose vacancy is gone
+drop out of the join and are cleared by the next rebuild.
+"""
+import re
+
+from django.db import connection as default_connection
+
+SEARCH_TABLE = 'core_vacancysearch'
+SEARCH_CONFIG = 'simple'
+HIGHLIGHT_START = '<mark>'
+HIGHLIGHT_STOP = '</mark>'
+SEARCHABLE_STATUSES = ('open',)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class PostgresSearchBackend:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ('
+                ' vacancy_id uuid PRIMARY KEY,'
+                ' document tsvector NOT NULL)'
+            )
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_gin'
+                f' ON {SEARCH_TABLE} USING gin (document)'
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+
+    def index(self, rows):
+        sql = (
+            f'INSERT INTO {SEARCH_TABLE} (vacancy_id, document) VALUES (%s,'
+            " setweight(to_tsvector(%s, coalesce(%s, '')), 'A') ||"
+            " setweight(to_tsvector(%s, coalesce(%s, '')), 'B') ||"
+            " setweight(to_tsvector(%s, coalesce(%s, '')), 'C'))"
+            ' ON CONFLICT (vacancy_id) DO UPDATE SET document = EXCLUDED.document'
+        )
+        params = [
+            (pk, SEARCH_CONFIG, title, SEARCH_CONFIG, location, SEARCH_CONFIG, description)
+            for pk, title, location, description in rows
+        ]
+        if params:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+
+    def remove(self, pks):
+        if pks:
+            with self.connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE vacancy_id = ANY(%s)', [list(pks)])
+
+    def _where(self):
+        return (
+            f' FROM {SEARCH_TABLE} s JOIN core_vacancy v ON v.id = s.vacancy_id,'
+            ' websearch_to_tsquery(%s, %s) q'
+            ' WHERE s.document @@ q AND v.status = ANY(%s)'
+        )
+
+    def count(self, query):
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*)' + self._where(), [SEARCH_CONFIG, query, list(SEARCHABLE_STATUSES)])
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit, offset):
+        # Rank and page first so ts_headline only runs for the returned rows.
+        options = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}'
+        sql = (
+            'SELECT p.id, p.rank,'
+            " ts_headline(%s, p.title, q, %s),"
+            " ts_headline(%s, p.location, q, %s),"
+            " ts_headline(%s, p.description, q, %s)"
+            ' FROM (SELECT v.id, v.title, v.location, v.description, v.created_at,'
+            ' ts_rank_cd(s.document, q) AS rank' + self._where() +
+            ' ORDER BY rank DESC, v.created_at DESC LIMIT %s OFFSET %s) p,'
+            ' websearch_to_tsquery(%s, %s) q'
+            ' ORDER BY p.rank DESC, p.created_at DESC'
+        )
+        params = [
+            SEARCH_CONFIG, options + ', HighlightAll=true',
+            SEARCH_CONFIG, options + ', HighlightAll=true',
+            SEARCH_CONFIG, options,
+            SEARCH_CONFIG, query, list(SEARCHABLE_STATUSES), limit, offset,
+            SEARCH_CONFIG, query,
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+class SQLiteSearchBackend:
+    # bm25 weights for (vacancy_id, title, location, description).
+    weights = (0.0, 10.0, 5.0, 1.0)
+    # FTS5 can only look rows up by rowid, so each vacancy id is given one here.
+    rowid_table = f'{SEARCH_TABLE}_rowid'
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def create(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+                " vacancy_id UNINDEXED, title, location, description,"
+                " tokenize = 'unicode61 remove_diacritics 2')"
+            )
+            cursor.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.rowid_table} ('
+                ' id integer PRIMARY KEY, vacancy_id char(32) NOT NULL UNIQUE)'
+            )
+
+    def drop(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {SEARCH_TABLE}')
+            cursor.execute(f'DROP TABLE IF EXISTS {self.rowid_table}')
+
+    def _rowid(self):
+        return f'(SELECT id FROM {self.rowid_table} WHERE vacancy_id = %s)'
+
+    def index(self, rows):
+        rows = list(rows)
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT OR IGNORE INTO {self.rowid_table} (vacancy_id) VALUES (%s)',
+                [(pk.hex,) for pk, *_ in rows],
+            )
+            cursor.executemany(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid = {self._rowid()}',
+                [(pk.hex,) for pk, *_ in rows],
+            )
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, vacancy_id, title, location, description)'
+                f' VALUES ({self._rowid()}, %s, %s, %s, %s)',
+                [
+                    (pk.hex, pk.hex, title or '', location or '', description or '')
+                    for pk, title, location, description in rows
+                ],
+            )
+
+    def remove(self, pks):
+        if pks:
+            with self.connection.cursor() as cursor:
+                cursor.executemany(
+                    f'DELETE FROM {SEARCH_TABLE} WHERE rowid = {self._rowid()}',
+                    [(pk.hex,) for pk in pks],
+                )
+                cursor.executemany(
+                    f'DELETE FROM {self.rowid_table} WHERE vacancy_id = %s',
+                    [(pk.hex,) for pk in pks],
+                )
+
+    @staticmethod
+    def match_expression(query):
+        # Quote every token so user input cannot inject FTS5 syntax; the
+        # trailing * gives prefix matching for search-as-you-type.
+        return ' '.join(f'"{token}"*' for token in _TOKEN_RE.findall(query))
+
+    def _where(self):
+        placeholders = ', '.join(['%s'] * len(SEARCHABLE_STATUSES))
+        return (
+            f' FROM {SEARCH_TABLE} f JOIN core_vacancy v ON v.id = f.vacancy_id'
+            f' WHERE {SEARCH_TABLE} MATCH %s AND v.status IN ({placeholders})'
+        )
+
+    def count(self, query):
+        match = self.match_expression(query)
+        if not match:
+            return 0
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*)' + self._where(), [match, *SEARCHABLE_STATUSES])
+            return cursor.fetchone()[0]
+
+    def search(self, query, limit, offset):
+        match = self.match_expression(query)
+        if not match:
+            return []
+        weights = ', '.join(str(w) for w in self.weights)
+        sql = (
+            f'SELECT f.vacancy_id, -bm25({SEARCH_TABLE}, {weights}) AS rank,'
+            f' highlight({SEARCH_TABLE}, 1, %s, %s),'
+            f' highlight({SEARCH_TABLE}, 2, %s, %s),'
+            f" snippet({SEARCH_TABLE}, 3, %s, %s, '…', 24)"
+            + self._where() +
+            ' ORDER BY rank DESC, v.created_at DESC LIMIT %s OFFSET %s'
+        )
+        params = [
+            HIGHLIGHT_START, HIGHLIGHT_STOP,
+            HIGHLIGHT_START, HIGHLIGHT_STOP,
+            HIGHLIGHT_START, HIGHLIGHT_STOP,
+            match, *SEARCHABLE_STATUSES, limit, offset,
+        ]
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+
+BACKENDS = {
+    'postgresql': PostgresSearchBackend,
+    'sqlite': SQLiteSearchBackend,
+}
+
+
+def get_backend(connection=None):
+    connection = connection or default_connection
+    backend_class = BACKENDS.get(connection.vendor)
+    return backend_class(connection) if backend_class else None
+
+
+def index_in_batches(backend, rows, batch_size=1000):
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            backend.index(batch)
+            total += len(batch)
+            batch = []
+    backend.index(batch)
+    return total + len(batch)
+
+
+def index_vacancies(vacancies):
+    backend = get_backend()
+    if backend is not None:
+        backend.index((v.pk, v.title, v.location, v.description) for v in vacancies)
+
+
+def remove_vacancies(pks):
+    backend = get_backend()
+    if backend is not None:
+        backend.remove(list(pks))
+
+
+class SearchResults:
+    """
+    Lazy, sliceable search result set so the regular DRF paginators can page
+    it: ``count()`` runs the COUNT and slicing runs one ranked query plus one
+    bulk fetch of the matching vacancies.
+    """
+
+    def __init__(self, query, queryset, backend=None):
+        self.query = query
+        self.queryset = queryset
+        self.backend = backend or get_backend()
+
+    def count(self):
+        return self.backend.count(self.query)
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice) or item.step is not None:
+            raise TypeError('SearchResults only supports slicing')
+        offset = item.start or 0
+        limit = (item.stop - offset) if item.stop is not None else self.count() - offset
+        if limit <= 0:
+            return []
+
+        hits = self.backend.search(self.query, limit, offset)
+        vacancies = self.queryset.in_bulk([self._pk(hit[0]) for hit in hits])
+        results = []
+        for pk, rank, title, location, description in hits:
+            vacancy = vacancies.get(self._pk(pk))
+            if vacancy is None:
+                continue
+            vacancy.rank = rank
+            vacancy.highlights = {'title': title, 'location': location, 'description': description}
+            results.append(vacancy)
+        return results
+
+    def _pk(self, value):
+        return self.queryset.model._meta.pk.to_python(value)
@@ -1,11 +1,17 @@
+from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from decimal import Decimal
 from django.core.validators import MinValueValidator
 from .models import (
     Employer, CandidateProfile, Vacancy, Application, Document, 
-    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate, 
-    AIAssistantInteraction
+    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate, UploadSession,
+    AIAssistantInteraction, MatchScore, OfficerWorkload
 )
+from .permissions import participant_applications
+from .principals import get_principal
+from .querying import APPLICATION_RELATED, related_paths
+from .visa import steps_prefetch
 from users.models import User
 
 
@@ -24,6 +30,7 @@ class EmployerSerializer(serializers.ModelSerializer):
             'country', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ['user']
 
 
 class CandidateProfileSerializer(serializers.ModelSerializer):
@@ -41,6 +48,7 @@ class CandidateProfileSerializer(serializers.ModelSerializer):
             'skills', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ['user']
 
 
 class VacancySerializer(serializers.ModelSerializer):
@@ -54,7 +62,10 @@ class VacancySerializer(serializers.ModelSerializer):
         ('USD', 'US Dollar'),
     ], default='EUR')
     location = serializers.CharField(max_length=255)
+    latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90.0, max_value=90.0)
+    longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180.0, max_value=180.0)
     remote = serializers.BooleanField(default=False)
+    skills = serializers.JSONField(required=False, allow_null=True)
     status = serializers.ChoiceField(choices=[
         ('open', 'Open'),
         ('closed', 'Closed'),
@@ -67,9 +78,19 @@ class VacancySerializer(serializers.ModelSerializer):
         model = Vacancy
         fields = [
             'id', 'employer', 'title', 'description', 'salary', 'currency',
-            'location', 'remote', 'status', 'created_at', 'expires_at'
+            'location', 'latitude', 'longitude', 'remote', 'skills', 'status',
+            'created_at', 'expires_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ['employer']
+
+
+class VacancySearchResultSerializer(VacancySerializer):
+    rank = serializers.FloatField(read_only=True)
+    highlights = serializers.DictField(child=serializers.CharField(), read_only=True)
+
+    class Meta(VacancySerializer.Meta):
+        fields = VacancySerializer.Meta.fields + ['rank', 'highlights']
 
 
 class ApplicationSerializer(serializers.ModelSerializer):
@@ -86,7 +107,7 @@ class ApplicationSerializer(serializers.ModelSerializer):
     ], default='applied')
     submitted_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
-    score = serializers.FloatField(required=False, allow_null=True)
+    score = serializers.FloatField(read_only=True)
 
     class Meta:
         model = Application
@@ -94,7 +115,32 @@ class ApplicationSerializer(serializers.ModelSerializer):
             'id', 'vacancy', 'candidate', 'cover_letter', 'status',
             'submitted_at', 'updated_at', 'score'
         ]
-        read_only_fields = ['id', 'submitted_at', 'updated_at']
+        read_only_fields = ['id', 'submitted_at', 'updated_at', 'score']
+        select_related = APPLICATION_RELATED
+
+
+class ApplicationBulkSerializer(ApplicationSerializer):
+    vacancy = serializers.UUIDField(source='vacancy_id')
+
+
+class VacancyMatchSerializer(serializers.ModelSerializer):
+    vacancy = VacancySerializer(read_only=True)
+
+    class Meta:
+        model = MatchScore
+        fields = ['vacancy', 'score', 'computed_at']
+        read_only_fields = fields
+        select_related = ['vacancy__employer']
+
+
+class CandidateMatchSerializer(serializers.ModelSerializer):
+    candidate = CandidateProfileSerializer(read_only=True)
+
+    class Meta:
+        model = MatchScore
+        fields = ['candidate', 'score', 'computed_at']
+        read_only_fields = fields
+        select_related = ['candidate__user']
 
 
 class DocumentSerializer(serializers.ModelSerializer):
@@ -110,22 +156,75 @@ class DocumentSerializer(serializers.ModelSerializer):
     ])
     file = serializers.FileField()
     metadata = serializers.JSONField(required=False, allow_null=True)
+    thumbnails = serializers.SerializerMethodField()
     uploaded_at = serializers.DateTimeField(read_only=True)
 
     class Meta:
         model = Document
         fields = [
             'id', 'owner', 'application', 'doc_type', 'file',
-            'metadata', 'uploaded_at'
+            'metadata', 'thumbnails', 'uploaded_at'
         ]
         read_only_fields = ['id', 'uploaded_at']
+        select_related = ['owner', *related_paths('application', APPLICATION_RELATED)]
+
+    def download_url(self, document, variant=None):
+        url = reverse('document-download', args=[document.pk])
+        if variant:
+            url = f'{url}?variant={variant}'
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request is not None else url
+
+    def get_thumbnails(self, document):
+        variants = (document.metadata or {}).get('variants') or {}
+        return {variant: self.download_url(document, variant) for variant in variants}
+
+    def to_representation(self, document):
+        # Document files are only reachable through the authorized download view.
+        data = super().to_representation(document)
+        if document.file:
+            data['file'] = self.download_url(document)
+        return data
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    application = serializers.PrimaryKeyRelatedField(
+        queryset=Application.objects.all(), required=False, allow_null=True,
+    )
+    size = serializers.IntegerField(min_value=1)
+    sha256 = serializers.RegexField(r'^[0-9a-fA-F]{64}$', required=False, allow_blank=True)
+    metadata = serializers.JSONField(required=False, allow_null=True)
+    document = DocumentSerializer(read_only=True)
+
+    class Meta:
+        model = UploadSession
+        fields = [
+            'id', 'application', 'doc_type', 'metadata', 'filename', 'size', 'sha256',
+            'received', 'status', 'document', 'created_at', 'expires_at'
+        ]
+        read_only_fields = ['id', 'received', 'status', 'document', 'created_at', 'expires_at']
+        select_related = ['document__owner', 'document__application']
+
+    def validate_application(self, application):
+        user = self.context['request'].user
+        if application is not None and user.pk not in (
+            application.candidate.user_id, application.vacancy.employer.user_id,
+        ):
+            raise serializers.ValidationError('You cannot attach documents to this application.')
+        return application
 
 
 class VisaCaseSerializer(serializers.ModelSerializer):
     application = serializers.StringRelatedField(read_only=True)
+    application_id = serializers.PrimaryKeyRelatedField(
+        queryset=Application.objects.all(), source='application', write_only=True, required=False,
+        validators=[UniqueValidator(VisaCase.objects.all(), 'This application already has a visa case.')],
+    )
     assigned_officer = serializers.StringRelatedField(read_only=True)
     status = serializers.CharField(max_length=64, default='initiated')
-    steps = serializers.JSONField(default=list)
+    due_at = serializers.DateTimeField(required=False)
+    steps = serializers.ListField(child=serializers.DictField(), required=False)
+    latest_step = serializers.SerializerMethodField()
     instructions = serializers.CharField(required=False, allow_blank=True, allow_null=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
@@ -133,10 +232,58 @@ class VisaCaseSerializer(serializers.ModelSerializer):
     class Meta:
         model = VisaCase
         fields = [
-            'id', 'application', 'assigned_officer', 'status', 'steps',
-            'instructions', 'created_at', 'updated_at'
+            'id', 'application', 'application_id', 'assigned_officer', 'status', 'steps', 'latest_step',
+            'instructions', 'due_at', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        select_related = ['assigned_officer', *related_paths('application', APPLICATION_RELATED)]
+        prefetch_related = [steps_prefetch()]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is not None and not request.user.is_staff:
+            # Other applications read as unknown ids.
+            fields['application_id'].queryset = participant_applications(get_principal(request))
+        return fields
+
+    def get_latest_step(self, obj):
+        steps = obj.steps
+        return steps[-1] if steps else None
+
+    def validate(self, attrs):
+        if self.instance is None and 'application' not in attrs:
+            raise serializers.ValidationError({'application_id': 'This field is required.'})
+        return attrs
+
+    def validate_steps(self, steps):
+        """Steps are append-only: an update must resend the stored steps unchanged, then any new ones."""
+        if self.instance is not None:
+            current = self.instance.steps
+            if steps[:len(current)] != current:
+                raise serializers.ValidationError(
+                    'Existing steps cannot be changed or removed; send them unchanged followed by new steps.'
+                )
+            return steps[len(current):]
+        return steps
+
+    def create(self, validated_data):
+        steps = validated_data.pop('steps', [])
+        case = super().create(validated_data)
+        if steps:
+            case.add_steps(steps, self._author())
+        return case
+
+    def update(self, instance, validated_data):
+        steps = validated_data.pop('steps', [])
+        instance = super().update(instance, validated_data)
+        if steps:
+            instance.add_steps(steps, self._author())
+        return instance
+
+    def _author(self):
+        request = self.context.get('request')
+        return request.user if request is not None and request.user.is_authenticated else None
 
 
 class HousingListingSerializer(serializers.ModelSerializer):
@@ -154,6 +301,8 @@ class HousingListingSerializer(serializers.ModelSerializer):
     url = serializers.URLField(required=False, allow_blank=True, allow_null=True)
     distance_to_work_m = serializers.IntegerField(required=False, allow_null=True)
     commute_minutes = serializers.IntegerField(required=False, allow_null=True)
+    latitude = serializers.FloatField(required=False, allow_null=True, min_value=-90.0, max_value=90.0)
+    longitude = serializers.FloatField(required=False, allow_null=True, min_value=-180.0, max_value=180.0)
     listed_at = serializers.DateTimeField(read_only=True)
     metadata = serializers.JSONField(required=False, allow_null=True)
 
@@ -162,11 +311,18 @@ class HousingListingSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'provider_name', 'address', 'city', 'price', 'currency',
             'rooms', 'area_sqm', 'url', 'distance_to_work_m', 'commute_minutes',
-            'listed_at', 'metadata'
+            'latitude', 'longitude', 'listed_at', 'metadata'
         ]
         read_only_fields = ['id', 'listed_at']
 
 
+class HousingNearbySerializer(HousingListingSerializer):
+    distance_m = serializers.IntegerField(read_only=True)
+
+    class Meta(HousingListingSerializer.Meta):
+        fields = HousingListingSerializer.Meta.fields + ['distance_m']
+
+
 class RelocationSuggestionSerializer(serializers.ModelSerializer):
     application = serializers.StringRelatedField(read_only=True)
     housing = serializers.StringRelatedField(read_only=True)
@@ -179,6 +335,7 @@ class RelocationSuggestionSerializer(serializers.ModelSerializer):
             'id', 'application', 'housing', 'reason', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ['housing', *related_paths('application', APPLICATION_RELATED)]
 
 
 class ExpenseEstimateSerializer(serializers.ModelSerializer):
@@ -193,15 +350,28 @@ class ExpenseEstimateSerializer(serializers.ModelSerializer):
     ], default='EUR')
     assumptions = serializers.JSONField(required=False, allow_null=True)
     created_at = serializers.DateTimeField(read_only=True)
-    daily_total = serializers.ReadOnlyField()
+    daily_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    # Only present when the list is requested with ``?currency=``.
+    converted_daily_total = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
 
     class Meta:
         model = ExpenseEstimate
         fields = [
             'id', 'application', 'housing', 'daily_commute_cost', 'daily_food_cost',
-            'currency', 'assumptions', 'created_at', 'daily_total'
+            'currency', 'assumptions', 'created_at', 'daily_total', 'converted_daily_total'
         ]
         read_only_fields = ['id', 'created_at', 'daily_total']
+        select_related = ['housing', *related_paths('application', APPLICATION_RELATED)]
+
+
+class ExpenseCohortSerializer(serializers.Serializer):
+    vacancy_id = serializers.UUIDField()
+    vacancy_title = serializers.CharField()
+    estimates = serializers.IntegerField()
+    avg_daily_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    min_daily_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    max_daily_total = serializers.DecimalField(max_digits=12, decimal_places=2)
+    sum_daily_total = serializers.DecimalField(max_digits=14, decimal_places=2)
 
 
 class AIAssistantInteractionSerializer(serializers.ModelSerializer):
@@ -219,3 +389,27 @@ class AIAssistantInteractionSerializer(serializers.ModelSerializer):
             'metadata', 'created_at'
         ]
         read_only_fields = ['id', 'created_at']
+        select_related = ['user', *related_paths('application', APPLICATION_RELATED)]
+
+
+class ConversationMessageSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AIAssistantInteraction
+        fields = ['id', 'role', 'message', 'metadata', 'created_at']
+        read_only_fields = fields
+
+
+class ConversationWindowSerializer(serializers.Serializer):
+    summary = serializers.CharField()
+    summarized_turns = serializers.IntegerField()
+    messages = ConversationMessageSerializer(many=True)
+
+
+class OfficerWorkloadSerializer(serializers.ModelSerializer):
+    officer = serializers.StringRelatedField(read_only=True)
+
+    class Meta:
+        model = OfficerWorkload
+        fields = ['officer_id', 'officer', 'open_cases', 'next_due_at', 'last_assigned_at']
+        read_only_fields = fields
+        select_related = ['officer']
@@ -0,0 +1,238 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from . import counters
+from .authentication import expire_claims
+from .caching import invalidate_tags_on_commit
+from users.models import User
+from users.signals import claims_changed
+from .models import Employer, Vacancy, CandidateProfile, Application, MatchScore, HousingListing, Document, VisaCase
+from .principals import forget_principal
+from .processing import enqueue_on_commit
+from .profiling import install_query_hook
+from .search import index_vacancies, remove_vacancies
+from .workload import assign_case, is_open, reconcile_workloads, workload_changed
+
+
+@receiver(post_save, sender=Vacancy)
+def index_vacancy_on_save(sender, instance, **kwargs):
+    index_vacancies([instance])
+
+
+@receiver(post_delete, sender=Vacancy)
+def remove_vacancy_on_delete(sender, instance, **kwargs):
+    remove_vacancies([instance.pk])
+
+
+@receiver(post_init, sender=Vacancy)
+@receiver(post_init, sender=CandidateProfile)
+def remember_scored_skills(sender, instance, **kwargs):
+    instance._scored_skills = instance.__dict__.get('skills')
+
+
+def _skills_changed(instance, created):
+    # A deferred skills field that was never loaded cannot have changed.
+    skills = instance.__dict__.get('skills', instance._scored_skills)
+    changed = bool(skills) if created else skills != instance._scored_skills
+    instance._scored_skills = skills
+    return changed
+
+
+@receiver(post_save, sender=Vacancy)
+def score_vacancy_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw and _skills_changed(instance, created):
+        enqueue_on_commit('score_vacancy', instance.pk)
+
+
+@receiver(post_save, sender=CandidateProfile)
+def score_candidate_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw and _skills_changed(instance, created):
+        enqueue_on_commit('score_candidate', instance.pk)
+
+
+@receiver(post_save, sender=Application)
+def score_application_on_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        score = MatchScore.objects.filter(
+            vacancy_id=instance.vacancy_id, candidate_id=instance.candidate_id,
+        ).values_list('score', flat=True).first()
+        instance.score = score or 0.0
+        Application.objects.filter(pk=instance.pk).update(score=instance.score)
+
+
+@receiver(post_init, sender=Vacancy)
+@receiver(post_init, sender=Application)
+def remember_counted_status(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred status never triggers a query here.
+    instance._counted_status = instance.__dict__.get('status')
+
+
+@receiver(post_save, sender=Vacancy)
+def count_vacancy_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_status = None if created else instance._counted_status
+    if old_status != instance.status or created:
+        counters.vacancy_changed(instance.employer_id, old_status, instance.status)
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=Vacancy)
+def count_vacancy_on_delete(sender, instance, **kwargs):
+    counters.vacancy_changed(instance.employer_id, instance.status, None)
+
+
+@receiver(post_save, sender=Application)
+def count_application_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_status = None if created else instance._counted_status
+    if old_status != instance.status or created:
+        counters.application_changed(instance.vacancy_id, instance.candidate_id, old_status, instance.status)
+    instance._counted_status = instance.status
+
+
+@receiver(post_delete, sender=Application)
+def count_application_on_delete(sender, instance, **kwargs):
+    counters.application_changed(instance.vacancy_id, instance.candidate_id, instance.status, None)
+
+
+@receiver(post_save, sender=Employer)
+@receiver(post_save, sender=CandidateProfile)
+def reconcile_counters_on_profile_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        counters.reconcile_counters([instance.user_id])
+
+
+@receiver(post_delete, sender=Employer)
+@receiver(post_delete, sender=CandidateProfile)
+def reconcile_counters_on_profile_delete(sender, instance, **kwargs):
+    counters.reconcile_counters([instance.user_id])
+
+
+@receiver(post_save, sender=Employer)
+@receiver(post_save, sender=CandidateProfile)
+def forget_principal_on_profile_create(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        forget_principal(instance.user_id)
+        expire_claims(instance.user_id)
+
+
+@receiver(post_delete, sender=Employer)
+@receiver(post_delete, sender=CandidateProfile)
+def forget_principal_on_profile_delete(sender, instance, **kwargs):
+    forget_principal(instance.user_id)
+    expire_claims(instance.user_id)
+
+
+@receiver(post_init, sender=User)
+def remember_claimed_state(sender, instance, **kwargs):
+    values = instance.__dict__
+    instance._claimed_state = (values.get('is_staff'), values.get('is_active'))
+
+
+@receiver(post_save, sender=User)
+def add_officer_workload(sender, instance, created, raw=False, **kwargs):
+    # Connected before expire_claims_on_user_change, which moves the snapshot on.
+    if not raw and instance.is_staff and instance.is_active and (created or not all(instance._claimed_state)):
+        pk = instance.pk
+        transaction.on_commit(lambda: reconcile_workloads([pk]))
+
+
+@receiver(post_save, sender=User)
+def expire_claims_on_user_change(sender, instance, created, raw=False, **kwargs):
+    state = (instance.is_staff, instance.is_active)
+    if not (created or raw) and state != instance._claimed_state:
+        expire_claims(instance.pk)
+    instance._claimed_state = state
+
+
+@receiver(post_delete, sender=User)
+def expire_claims_on_user_delete(sender, instance, **kwargs):
+    expire_claims(instance.pk)
+
+
+@receiver(claims_changed, sender=User)
+def expire_claims_on_user_update(sender, user_ids, **kwargs):
+    if user_ids:
+        expire_claims(*user_ids)
+        transaction.on_commit(lambda: reconcile_workloads(user_ids))
+
+
+def _file_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+@receiver(post_init, sender=Document)
+def remember_document_file(sender, instance, **kwargs):
+    instance._processed_file = _file_name(instance.__dict__.get('file'))
+
+
+@receiver(post_save, sender=Document)
+def process_document_on_save(sender, instance, created, raw=False, **kwargs):
+    name = _file_name(instance.file)
+    if not raw and name and (created or name != instance._processed_file):
+        enqueue_on_commit('document', instance.pk)
+    instance._processed_file = name
+
+
+@receiver(post_init, sender=User)
+def remember_profile_pic(sender, instance, **kwargs):
+    instance._processed_profile_pic = _file_name(instance.__dict__.get('profile_pic'))
+
+
+@receiver(post_save, sender=User)
+def process_profile_pic_on_save(sender, instance, raw=False, **kwargs):
+    name = _file_name(instance.profile_pic)
+    if not raw and name and name != instance._processed_profile_pic:
+        enqueue_on_commit('profile_pic', instance.pk)
+    instance._processed_profile_pic = name
+
+
+@receiver(post_init, sender=VisaCase)
+def remember_workload_state(sender, instance, **kwargs):
+    values = instance.__dict__
+    instance._workload_state = (values.get('assigned_officer_id'), is_open(values.get('status')), values.get('due_at'))
+
+
+@receiver(post_save, sender=VisaCase)
+def update_workload_on_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old_officer, old_open, old_due = (None, False, None) if created else instance._workload_state
+    state = (instance.assigned_officer_id, is_open(instance.status), instance.due_at)
+    if state != (old_officer, old_open, old_due):
+        workload_changed(old_officer, state[0], old_open, state[1], due_changed=old_due != state[2])
+    instance._workload_state = state
+    if created and instance.assigned_officer_id is None and settings.VISA_CASE_AUTO_ASSIGN:
+        assign_case(instance)
+
+
+@receiver(post_delete, sender=VisaCase)
+def update_workload_on_delete(sender, instance, **kwargs):
+    workload_changed(instance.assigned_officer_id, None, is_open(instance.status), False)
+
+
+# Model -> cache tags its rows appear under; see core.caching.
+CACHE_TAGS = {
+    Vacancy: lambda instance: ['vacancies', f'vacancy:{instance.pk}'],
+    Employer: lambda instance: ['employers'],
+    HousingListing: lambda instance: ['housing', f'housing:{instance.pk}'],
+}
+
+
+def invalidate_cached_responses(sender, instance, **kwargs):
+    invalidate_tags_on_commit(*CACHE_TAGS[sender](instance))
+
+
+for model in CACHE_TAGS:
+    post_save.connect(invalidate_cached_responses, sender=model, dispatch_uid=f'cache-save-{model.__name__}')
+    post_delete.connect(invalidate_cached_responses, sender=model, dispatch_uid=f'cache-delete-{model.__name__}')
+
+
+@receiver(connection_created)
+def install_profiling_hook(sender, connection, **kwargs):
+    install_query_hook(connection)
@@ -0,0 +1,151 @@
+"""
+Database snapshots for test and staging resets.
+
+``loaddata`` deserializes a fixture and saves each object on its own. A
+snapshot instead copies the database in its native format, so restoring a
+large data set takes seconds. A snapshot is a directory holding
+``manifest.json`` and the data:
+
+- SQLite: ``database.sqlite3``, a page copy made with the backup API and
+  restored the same way.
+- PostgreSQL: one ``<table>.copy`` file per table, the search index
+  included, in ``COPY ... (FORMAT binary)`` format. Restore truncates the tables, loads them with ``COPY FROM
+  STDIN`` in one transaction (Django's foreign keys are deferred, so table
+  order does not matter), then resets the sequences.
+
+The manifest records the applied migrations. A snapshot only restores onto
+the same schema; otherwise :class:`SnapshotError` is raised.
+"""
+import json
+import os
+import sqlite3
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.recorder import MigrationRecorder
+
+from core.search import SEARCH_TABLE
+
+MANIFEST = 'manifest.json'
+SQLITE_FILE = 'database.sqlite3'
+COPY_BLOCK = 1 << 20
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def applied_migrations(connection):
+    return sorted([app, name] for app, name in MigrationRecorder(connection).applied_migrations())
+
+
+def read_manifest(path):
+    try:
+        with open(os.path.join(path, MANIFEST), encoding='utf-8') as fp:
+            return json.load(fp)
+    except (OSError, ValueError) as exc:
+        raise SnapshotError(f'{path} is not a snapshot: {exc}')
+
+
+def _data_tables(connection):
+    tables = set(connection.introspection.django_table_names(only_existing=True, include_views=False))
+    # The search index is created outside the models (see core/search.py).
+    if SEARCH_TABLE in connection.introspection.table_names(include_views=False):
+        tables.add(SEARCH_TABLE)
+    return sorted(table for table in tables if table != MigrationRecorder.Migration._meta.db_table)
+
+
+def _copy_out(cursor, sql, fp):
+    if hasattr(cursor, 'copy'):  # psycopg 3
+        with cursor.copy(sql) as copy:
+            for block in copy:
+                fp.write(block)
+    else:
+        cursor.copy_expert(sql, fp)
+
+
+def _copy_in(cursor, sql, fp):
+    if hasattr(cursor, 'copy'):  # psycopg 3
+        with cursor.copy(sql) as copy:
+            while block := fp.read(COPY_BLOCK):
+                copy.write(block)
+    else:
+        cursor.copy_expert(sql, fp)
+
+
+def take_snapshot(path, using='default'):
+    """Writes the database to the snapshot directory ``path``; returns the manifest."""
+    connection = connections[using]
+    os.makedirs(path, exist_ok=True)
+    connection.ensure_connection()
+    manifest = {
+        'vendor': connection.vendor, 'created_at': time.time(),
+        'migrations': applied_migrations(connection), 'tables': {},
+    }
+    if connection.vendor == 'sqlite':
+        target = sqlite3.connect(os.path.join(path, SQLITE_FILE))
+        try:
+            connection.connection.backup(target)
+        finally:
+            target.close()
+    elif connection.vendor == 'postgresql':
+        quote = connection.ops.quote_name
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            # One snapshot of every table, even while other sessions write.
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+            for table in _data_tables(connection):
+                with open(os.path.join(path, f'{table}.copy'), 'wb') as fp:
+                    _copy_out(cursor.cursor, f'COPY {quote(table)} TO STDOUT (FORMAT binary)', fp)
+                manifest['tables'][table] = os.path.getsize(fp.name)
+    else:
+        raise SnapshotError(f'Snapshots are not supported on {connection.vendor}')
+    with open(os.path.join(path, MANIFEST), 'w', encoding='utf-8') as fp:
+        json.dump(manifest, fp, indent=2)
+    return manifest
+
+
+def restore_snapshot(path, using='default'):
+    """Replaces the database contents with the snapshot at ``path``; returns its manifest."""
+    connection = connections[using]
+    manifest = read_manifest(path)
+    if manifest['vendor'] != connection.vendor:
+        raise SnapshotError(f"Snapshot was taken on {manifest['vendor']}, not {connection.vendor}")
+    connection.ensure_connection()
+    if connection.vendor == 'sqlite':
+        # The whole file is replaced, schema included, so compare with the migrations on disk.
+        expected = sorted([app, name] for app, name in MigrationLoader(None, ignore_no_migrations=True).graph.nodes)
+    else:
+        expected = applied_migrations(connection)
+    if manifest['migrations'] != expected:
+        raise SnapshotError('Snapshot schema does not match this database; migrate and take a new snapshot')
+
+    if connection.vendor == 'sqlite':
+        if connection.in_atomic_block:
+            raise SnapshotError('Cannot restore a SQLite snapshot inside a transaction')
+        source = sqlite3.connect(os.path.join(path, SQLITE_FILE))
+        try:
+            source.backup(connection.connection)
+        finally:
+            source.close()
+    else:
+        quote = connection.ops.quote_name
+        tables = _data_tables(connection)
+        missing = set(manifest['tables']) - set(tables)
+        if missing:
+            raise SnapshotError(f"Snapshot has tables this database lacks: {', '.join(sorted(missing))}")
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(quote(table) for table in tables)} RESTART IDENTITY CASCADE")
+            for table in manifest['tables']:
+                with open(os.path.join(path, f'{table}.copy'), 'rb') as fp:
+                    _copy_in(cursor.cursor, f'COPY {quote(table)} FROM STDIN (FORMAT binary)', fp)
+            for sql in connection.ops.sequence_reset_sql(no_style(), apps.get_models(include_auto_created=True)):
+                cursor.execute(sql)
+
+    # Cached responses and content types describe the old rows.
+    cache.clear()
+    apps.get_model('contenttypes', 'ContentType').objects.clear_cache()
+    return manifest
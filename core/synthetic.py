@@ -0,0 +1,248 @@
+"""
+Deterministic synthetic data for benchmarks and staging databases.
+
+:class:`SyntheticDataGenerator` builds rows in memory from a seeded RNG and
+writes them with ``bulk_create`` in batches inside one transaction. All users
+share a single pre-hashed password (:data:`SHARED_PASSWORD`). ``bulk_create``
+skips ``save()`` and the signal handlers, so the generator does their work in
+bulk afterwards: geohashes, the search index, match scores, dashboard
+counters and officer workloads. The same seed and volumes always produce the
+same rows.
+"""
+import random
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from users.models import User
+from .counters import reconcile_counters
+from .geo import encode as geohash_encode
+from .models import (
+    APPLICATION_STATUS, Application, CandidateProfile, Document, Employer, HousingListing, Vacancy, VisaCase,
+)
+from .scoring import ScoringEngine, sync_application_scores
+from .search import get_backend, index_in_batches
+from .workload import reconcile_workloads
+
+SHARED_PASSWORD = 'bench-password-1'
+EMAIL_DOMAIN = 'bench.test'
+
+CITIES = {
+    'Nicosia': (35.1856, 33.3823),
+    'Limassol': (34.7071, 33.0226),
+    'Larnaca': (34.9003, 33.6232),
+    'Paphos': (34.7720, 32.4297),
+    'Famagusta': (35.1149, 33.9192),
+    'Kyrenia': (35.3417, 33.3192),
+}
+SKILLS = [
+    'python', 'django', 'react', 'sql', 'welding', 'nursing', 'cooking', 'driving',
+    'english', 'turkish', 'greek', 'accounting', 'logistics', 'sales', 'plumbing',
+]
+TITLES = [
+    'Backend Developer', 'Nurse', 'Chef', 'Truck Driver', 'Accountant', 'Welder',
+    'Sales Associate', 'Warehouse Operative', 'Plumber', 'Hotel Receptionist',
+]
+FIRST_NAMES = ['Ali', 'Maria', 'John', 'Elena', 'Mehmet', 'Sofia', 'Andreas', 'Ayse', 'Nikos', 'Irina']
+LAST_NAMES = ['Yilmaz', 'Georgiou', 'Smith', 'Ivanova', 'Demir', 'Christou', 'Kaya', 'Petrou', 'Brown', 'Ozturk']
+APPLICATION_STATUSES = [status for status, _ in APPLICATION_STATUS]
+APPLICATION_STATUS_WEIGHTS = [50, 20, 12, 6, 4, 8]
+VISA_STATUSES = ['initiated', 'processing', 'interview_scheduled', 'approved', 'rejected']
+
+
+def volumes_for_scale(scale):
+    """Row counts for ``scale`` applications, in roughly production proportions."""
+    scale = max(int(scale), 1)
+    return {
+        'employers': max(scale // 200, 1),
+        'candidates': max(scale // 4, 1),
+        'officers': max(scale // 5000, 1),
+        'vacancies': max(scale // 10, 1),
+        'applications': scale,
+        'documents': max(scale // 2, 1),
+        'housing': max(scale // 20, 1),
+        'visa_cases': max(scale // 20, 1),
+    }
+
+
+def volumes_for_counts(users=None, vacancies=None, applications=None):
+    """Volumes with explicit user, vacancy and application counts; the rest follow :func:`volumes_for_scale`."""
+    scale = applications or (vacancies * 10 if vacancies else None) or (users * 4 if users else 1)
+    volumes = volumes_for_scale(scale)
+    if users:
+        officers = max(users // 1000, 1)
+        employers = max(users // 50, 1)
+        volumes.update(officers=officers, employers=employers, candidates=max(users - officers - employers, 1))
+    if vacancies:
+        volumes['vacancies'] = vacancies
+    if applications:
+        volumes['applications'] = applications
+    return volumes
+
+
+def bench_email(kind, index, seed):
+    return f'{kind}{index}.s{seed}@{EMAIL_DOMAIN}'
+
+
+def is_seeded(seed):
+    """Whether a generator run with ``seed`` has already written to this database."""
+    return User.objects.filter(email=bench_email('candidate', 0, seed)).exists()
+
+
+class SyntheticDataGenerator:
+    def __init__(self, seed=0, batch_size=2000, log=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        self.now = timezone.now()
+        self.password = make_password(SHARED_PASSWORD)
+
+    def generate(self, volumes):
+        """Creates the rows described by ``volumes``; returns ``{kind: rows created}``."""
+        started = time.monotonic()
+        with transaction.atomic():
+            employer_users = self.users('employer', volumes['employers'])
+            candidate_users = self.users('candidate', volumes['candidates'])
+            officers = self.users('officer', volumes['officers'], is_staff=True)
+            employers = self.employers(employer_users)
+            candidates = self.candidates(candidate_users)
+            vacancies = self.vacancies(employers, volumes['vacancies'])
+            applications = self.applications(candidates, vacancies, volumes['applications'])
+            documents = self.documents(candidates, volumes['documents'])
+            housing = self.housing(volumes['housing'])
+            visa_cases = self.visa_cases(applications, officers, volumes['visa_cases'])
+            self.derive(vacancies)
+        created = {
+            'users': len(employer_users) + len(candidate_users) + len(officers),
+            'employers': len(employers), 'candidates': len(candidates), 'vacancies': len(vacancies),
+            'applications': len(applications), 'documents': len(documents), 'housing': len(housing),
+            'visa_cases': len(visa_cases),
+        }
+        self.log(f'Generated {sum(created.values())} rows in {time.monotonic() - started:.1f}s')
+        return created
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def bulk(self, model, rows):
+        model.objects.bulk_create(rows, batch_size=self.batch_size)
+        self.log(f'  {model.__name__}: {len(rows)}')
+        return rows
+
+    def users(self, kind, count, is_staff=False):
+        rng = self.rng
+        return self.bulk(User, [
+            User(
+                email=bench_email(kind, index, self.seed), password=self.password, is_staff=is_staff,
+                first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                is_verified=True, member_since=self.now, date_joined=self.now,
+            )
+            for index in range(count)
+        ])
+
+    def employers(self, users):
+        return self.bulk(Employer, [
+            Employer(
+                id=self.uuid(), user=user, company_name=f'{user.last_name} {self.rng.choice(TITLES).split()[-1]} Ltd',
+                contact_email=user.email, country='CY',
+            )
+            for user in users
+        ])
+
+    def candidates(self, users):
+        rng = self.rng
+        return self.bulk(CandidateProfile, [
+            CandidateProfile(
+                id=self.uuid(), user=user, current_country=rng.choice(['TR', 'GE', 'UA', 'IN', 'PH']),
+                skills=rng.sample(SKILLS, rng.randint(2, 5)),
+                resume=f'{rng.randint(1, 15)} years of experience.',
+            )
+            for user in users
+        ])
+
+    def vacancies(self, employers, count):
+        rng = self.rng
+        rows = []
+        for _ in range(count):
+            city, (lat, lon) = rng.choice(list(CITIES.items()))
+            title = rng.choice(TITLES)
+            rows.append(Vacancy(
+                id=self.uuid(), employer=rng.choice(employers), title=title, location=city,
+                description=f'{title} in {city}. ' + ' '.join(rng.sample(SKILLS, 4)),
+                salary=Decimal(rng.randrange(900, 4500, 50)), currency='EUR',
+                latitude=lat + rng.uniform(-0.05, 0.05), longitude=lon + rng.uniform(-0.05, 0.05),
+                remote=rng.random() < 0.1, skills=rng.sample(SKILLS, rng.randint(2, 4)),
+                status=rng.choices(['open', 'closed', 'paused'], [80, 15, 5])[0],
+                expires_at=self.now + timedelta(days=rng.randint(7, 90)),
+            ))
+        return self.bulk(Vacancy, rows)
+
+    def applications(self, candidates, vacancies, count):
+        rng = self.rng
+        count = min(count, len(candidates) * len(vacancies))
+        per_candidate, extra = divmod(count, len(candidates))
+        rows = []
+        for index, candidate in enumerate(candidates):
+            wanted = min(per_candidate + (index < extra), len(vacancies))
+            for vacancy in rng.sample(vacancies, wanted):
+                rows.append(Application(
+                    id=self.uuid(), vacancy=vacancy, candidate=candidate, cover_letter='Please consider my application.',
+                    status=rng.choices(APPLICATION_STATUSES, APPLICATION_STATUS_WEIGHTS)[0],
+                ))
+        return self.bulk(Application, rows)
+
+    def documents(self, candidates, count):
+        rng = self.rng
+        rows = []
+        for index in range(count):
+            candidate = candidates[index % len(candidates)]
+            doc_type = rng.choice(['passport', 'cv', 'photo', 'visa_form'])
+            rows.append(Document(
+                id=self.uuid(), owner_id=candidate.user_id, doc_type=doc_type,
+                file=f'documents/synthetic/{candidate.pk}/{doc_type}-{index}.pdf',
+                metadata={'filename': f'{doc_type}.pdf', 'size': rng.randint(20_000, 2_000_000), 'synthetic': True},
+            ))
+        return self.bulk(Document, rows)
+
+    def housing(self, count):
+        rng = self.rng
+        rows = []
+        for index in range(count):
+            city, (lat, lon) = rng.choice(list(CITIES.items()))
+            listing = HousingListing(
+                id=self.uuid(), provider_name=f'{city} Rentals', address=f'{rng.randint(1, 200)} Street {index}', city=city,
+                price=Decimal(rng.randrange(350, 2500, 25)), currency='EUR', rooms=rng.randint(1, 4),
+                area_sqm=rng.randint(25, 140), latitude=lat + rng.uniform(-0.08, 0.08),
+                longitude=lon + rng.uniform(-0.08, 0.08), listed_at=self.now - timedelta(days=rng.randint(0, 60)),
+            )
+            listing.geohash = geohash_encode(listing.latitude, listing.longitude)
+            rows.append(listing)
+        return self.bulk(HousingListing, rows)
+
+    def visa_cases(self, applications, officers, count):
+        rng = self.rng
+        accepted = [application for application in applications if application.status in ('offered', 'accepted')]
+        pool = accepted if len(accepted) >= count else applications
+        return self.bulk(VisaCase, [
+            VisaCase(
+                id=self.uuid(), application=application, assigned_officer=officers[index % len(officers)],
+                status=rng.choice(VISA_STATUSES), due_at=self.now + timedelta(days=rng.randint(-5, 30)),
+            )
+            for index, application in enumerate(rng.sample(pool, min(count, len(pool))))
+        ])
+
+    def derive(self, vacancies):
+        """Work the skipped signal handlers would have done, done once in bulk."""
+        backend = get_backend()
+        if backend is not None:
+            index_in_batches(backend, ((v.pk, v.title, v.location, v.description) for v in vacancies))
+        ScoringEngine().score()
+        sync_application_scores(Application.objects.all())
+        reconcile_counters()
+        reconcile_workloads()
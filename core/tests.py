@@ -1,3 +1,1301 @@
-from django.test import TestCase
+import csv
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import F
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from users.models import User
+from . import bulk, profiling
+from .authentication import PrincipalAccessToken, TokenRevocations
+from .benchmark import FLOWS, LATENCY_FLOOR_MS, BenchmarkDriver, compare, nearest_rank
+from .caching import response_cache
+from .conversations import compact, window
+from .counters import reconcile_counters
+from .expenses import ExpenseEstimator
+from .geo import covering_cells, encode, haversine_m
+from .index_advisor import _sqlite_accesses, covered, predicate_columns, propose
+from .models import (
+    Employer, CandidateProfile, Vacancy, Application, Document,
+    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate,
+    AIAssistantInteraction, ConversationSummary, DashboardCounters, DocumentBlob, MatchScore, OfficerWorkload,
+    ProcessingJob, VisaCaseStep
+)
+from .processing import HANDLERS, Worker
+from .relocation import SuggestionGenerator
+from .profiling import QueryRecorder, fingerprint
+from .search import get_backend
+from .snapshots import SnapshotError, restore_snapshot, take_snapshot
+from .synthetic import SyntheticDataGenerator, volumes_for_counts, volumes_for_scale
+
+PASSWORD = 'Testpass123!'
+
+
+def make_user(email, **extra):
+    extra.setdefault('first_name', email.split('@')[0])
+    extra.setdefault('last_name', 'Test')
+    return User.objects.create_user(email=email, password=PASSWORD, **extra)
+
+
+class QueryBudgetMixin:
+    """Asserts that a list endpoint costs the same number of queries for any page size."""
+
+    max_queries_per_page = 6
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+    def assertQueryBudget(self, url, small=2, large=20):
+        # Warm per-user caches (e.g. the request principal) so both counts are steady-state.
+        self.client.get(url)
+        small_count = self.count_queries(url, limit=small)
+        large_count = self.count_queries(url, limit=large)
+        self.assertEqual(
+            small_count, large_count,
+            f'{url}: {small_count} queries for {small} rows, {large_count} for {large}',
+        )
+        self.assertLessEqual(large_count, self.max_queries_per_page, url)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ListQueryBudgetTests(QueryBudgetMixin, TestCase):
+    rows = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        cls.employer = Employer.objects.create(
+            user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test',
+        )
+        cls.officer = make_user('officer@example.com', is_staff=True)
+        cls.vacancy = Vacancy.objects.create(
+            employer=cls.employer, title='Engineer', description='Build things', location='Nicosia',
+        )
+        cls.housing = HousingListing.objects.create(
+            address='1 Main Street', city='Nicosia', price=Decimal('900.00'),
+        )
+        cls.applications = []
+        for i in range(cls.rows):
+            user = make_user(f'candidate{i}@example.com')
+            candidate = CandidateProfile.objects.create(user=user)
+            vacancy = Vacancy.objects.create(
+                employer=cls.employer, title=f'Role {i}', description='Role', location='Limassol',
+            )
+            application = Application.objects.create(vacancy=vacancy, candidate=candidate)
+            cls.applications.append(application)
+            Application.objects.create(vacancy=cls.vacancy, candidate=candidate)
+            Document.objects.create(owner=user, application=application, doc_type='cv', file='documents/cv.pdf')
+            VisaCase.objects.create(application=application, assigned_officer=cls.officer)
+            RelocationSuggestion.objects.create(application=application, housing=cls.housing)
+            ExpenseEstimate.objects.create(application=application, housing=cls.housing)
+            AIAssistantInteraction.objects.create(user=user, application=application, message='Hello')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer_user)
+
+    def test_global_list_endpoints(self):
+        for name in [
+            'employer-list-create', 'candidate-list-create', 'vacancy-list-create',
+            'application-list-create', 'document-list-create', 'visa-case-list-create',
+            'housing-list-create', 'relocation-suggestion-list-create',
+            'expense-estimate-list-create', 'ai-interaction-list-create',
+        ]:
+            with self.subTest(name=name):
+                self.assertQueryBudget(reverse(name))
+
+    def test_scoped_list_endpoints(self):
+        self.assertQueryBudget(reverse('employer-vacancies'))
+        self.assertQueryBudget(reverse('vacancy-applications', args=[self.vacancy.id]))
+
+        self.client.force_authenticate(self.officer)
+        self.assertQueryBudget(reverse('officer-visa-cases'))
+
+
+class TempMediaMixin:
+    """Points ``MEDIA_ROOT`` and ``UPLOAD_TEMP_DIR`` at a directory removed after each test."""
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root, UPLOAD_TEMP_DIR=f'{media_root}/uploads')
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ChunkedUploadTests(TempMediaMixin, TestCase):
+    content = b'passport scan ' * 1000
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = make_user('alice@example.com')
+        cls.mallory = make_user('mallory@example.com')
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+
+    def open_session(self, user, content, **extra):
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse('upload-list-create'), {
+            'filename': 'passport.pdf', 'size': len(content), 'doc_type': 'passport', **extra,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.data
+
+    def put_chunk(self, session_id, chunk, offset):
+        return self.client.put(
+            reverse('upload-detail', args=[session_id]), data=chunk,
+            content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def complete(self, session_id):
+        return self.client.post(reverse('upload-complete', args=[session_id]))
+
+    def upload(self, user, content):
+        session = self.open_session(user, content)
+        half = len(content) // 2
+        self.assertEqual(self.put_chunk(session['id'], content[:half], 0).status_code, 200)
+        self.assertEqual(self.put_chunk(session['id'], content[half:], half).status_code, 200)
+        response = self.complete(session['id'])
+        self.assertEqual(response.status_code, 200, response.content)
+        return Document.objects.get(pk=response.data['document']['id'])
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload(self.alice, self.content)
+        second = self.upload(self.mallory, self.content)
+        self.assertEqual(first.blob_id, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(second.blob_id, first.blob_id)
+        self.assertEqual(second.owner, self.mallory)
+        self.assertEqual(DocumentBlob.objects.count(), 1)
+
+    def test_declared_digest_of_existing_blob_does_not_skip_the_upload(self):
+        document = self.upload(self.alice, self.content)
+        session = self.open_session(self.mallory, self.content, sha256=document.blob_id)
+        self.assertEqual(session['status'], 'open')
+        self.assertIsNone(session['document'])
+        self.assertEqual(self.complete(session['id']).status_code, 409)
+        self.assertFalse(Document.objects.filter(owner=self.mallory).exists())
+
+    def test_declared_digest_must_match_received_bytes(self):
+        session = self.open_session(self.alice, self.content, sha256=hashlib.sha256(b'other').hexdigest())
+        self.assertEqual(self.put_chunk(session['id'], self.content, 0).status_code, 200)
+        self.assertEqual(self.complete(session['id']).status_code, 400)
+        self.assertFalse(Document.objects.exists())
+
+    def test_replacing_the_file_changes_blob_and_etag(self):
+        document = self.upload(self.alice, self.content)
+        Document.objects.filter(pk=document.pk).update(metadata={'filename': 'passport.pdf', 'variants': {'thumb': 'x'}})
+        download = reverse('document-download', args=[document.pk])
+        etag = self.client.get(download)['ETag']
+
+        response = self.client.patch(
+            reverse('document-detail', args=[document.pk]),
+            {'file': SimpleUploadedFile('b.txt', b'replacement bytes')}, format='multipart',
+        )
+        self.assertEqual(response.status_code, 200, response.content)
+        document.refresh_from_db()
+        self.assertEqual(document.blob_id, hashlib.sha256(b'replacement bytes').hexdigest())
+        self.assertEqual(document.metadata, {'filename': 'b.txt'})
+        response = self.client.get(download, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(b''.join(response.streaming_content), b'replacement bytes')
+
+    def test_chunk_at_wrong_offset_is_rejected(self):
+        session = self.open_session(self.alice, self.content)
+        response = self.put_chunk(session['id'], self.content[:100], 50)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data['received'], 0)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DocumentDownloadTests(TempMediaMixin, TestCase):
+    name = 'documents/legacy scan #1 100%?.pdf'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.candidate_user = make_user('candidate@example.com')
+        cls.employer_user = make_user('employer@example.com')
+        cls.officer = make_user('officer@example.com', is_staff=True)
+        cls.stranger = make_user('stranger@example.com')
+        employer = Employer.objects.create(user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test')
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        application = Application.objects.create(
+            vacancy=vacancy, candidate=CandidateProfile.objects.create(user=cls.candidate_user),
+        )
+        cls.document = Document.objects.create(
+            owner=cls.candidate_user, application=application, doc_type='passport', file=cls.name,
+        )
+
+    def setUp(self):
+        super().setUp()
+        # Written straight to disk: storage would normalise the legacy name on save.
+        path = default_storage.path(self.name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as fp:
+            fp.write(b'%PDF-1.4 scan')
+        self.client = APIClient()
+        self.url = reverse('document-download', args=[self.document.pk])
+
+    def get(self, user, **extra):
+        self.client.force_authenticate(user)
+        return self.client.get(self.url, **extra)
+
+    def test_participants_and_staff_can_download(self):
+        for user in (self.candidate_user, self.employer_user, self.officer):
+            with self.subTest(user=user.email):
+                response = self.get(user)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(b''.join(response.streaming_content), b'%PDF-1.4 scan')
+
+    def test_other_users_get_404(self):
+        self.assertEqual(self.get(self.stranger).status_code, 404)
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_range_request(self):
+        response = self.get(self.candidate_user, HTTP_RANGE='bytes=0-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'%PDF')
+
+    @override_settings(MEDIA_ACCEL_REDIRECT=True)
+    def test_accel_redirect_escapes_the_file_name(self):
+        response = self.get(self.candidate_user)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['X-Accel-Redirect'], '/protected-media/documents/legacy%20scan%20%231%20100%25%3F.pdf',
+        )
+        self.assertEqual(response.content, b'')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class VisaCaseAssignmentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        employer = Employer.objects.create(user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test')
+        cls.candidate_user = make_user('candidate@example.com')
+        candidate = CandidateProfile.objects.create(user=cls.candidate_user)
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        cls.application = Application.objects.create(vacancy=vacancy, candidate=candidate)
+        cls.stranger = make_user('stranger@example.com')
+        CandidateProfile.objects.create(user=cls.stranger)
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.officer = make_user('officer@example.com', is_staff=True)
+        self.client = APIClient()
+
+    def create(self, user):
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('visa-case-list-create'), {'application_id': str(self.application.pk)}, format='json')
+
+    def list_ids(self, user):
+        self.client.force_authenticate(user)
+        return [case['id'] for case in self.client.get(reverse('visa-case-list-create')).data['results']]
+
+    def test_new_officer_gets_a_workload_row_and_the_case(self):
+        self.assertTrue(OfficerWorkload.objects.filter(pk=self.officer.pk).exists())
+        response = self.create(self.candidate_user)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(VisaCase.objects.get(pk=response.data['id']).assigned_officer_id, self.officer.pk)
+
+    def test_only_participants_and_staff_open_cases(self):
+        response = self.create(self.stranger)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('application_id', response.data)
+        self.assertFalse(VisaCase.objects.exists())
+
+        self.assertEqual(self.create(self.employer_user).status_code, 201)
+        response = self.create(self.officer)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('application_id', response.data)
+
+    def test_cases_are_scoped_to_participants(self):
+        case = VisaCase.objects.create(application=self.application)
+        self.assertEqual(self.list_ids(self.stranger), [])
+        self.assertEqual(self.list_ids(self.candidate_user), [str(case.pk)])
+        self.assertEqual(self.list_ids(self.officer), [str(case.pk)])
+
+        self.client.force_authenticate(self.stranger)
+        self.assertEqual(self.client.get(reverse('visa-case-detail', args=[case.pk])).status_code, 404)
+        self.assertEqual(
+            self.client.patch(reverse('visa-case-detail', args=[case.pk]), {'status': 'closed'}, format='json').status_code,
+            404,
+        )
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class VisaCaseStepBackfillTests(TestCase):
+    def test_legacy_steps_keep_list_order_before_new_steps(self):
+        step_times = import_module('core.migrations.0012_visa_case_steps').step_times
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        candidate = CandidateProfile.objects.create(user=make_user('candidate@example.com'))
+        case = VisaCase.objects.create(application=Application.objects.create(vacancy=vacancy, candidate=candidate))
+        legacy = [
+            {'step': 'interview', 'status': 'scheduled', 'date': '2099-01-01T09:00:00Z'},
+            {'step': 'submitted', 'status': 'done', 'date': '2020-01-01T09:00:00Z'},
+        ]
+        VisaCaseStep.objects.bulk_create([
+            VisaCaseStep.from_data(case, step, created_at=moment) for step, moment in zip(legacy, step_times(case, legacy))
+        ])
+
+        client = APIClient()
+        client.force_authenticate(make_user('officer@example.com', is_staff=True))
+        url = reverse('visa-case-detail', args=[case.pk])
+        response = client.patch(url, {'steps': [*legacy, {'step': 'approved', 'status': 'done'}]}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual([step['step'] for step in response.data['steps']], ['interview', 'submitted', 'approved'])
+        self.assertEqual(client.get(url).data['latest_step']['step'], 'approved')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ExpenseEstimateTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        candidate = CandidateProfile.objects.create(user=make_user('candidate@example.com'))
+        housing = HousingListing.objects.create(
+            address='1 Main Street', city='Nicosia', price=Decimal('900.00'), currency='EUR', commute_minutes=25,
+        )
+        RelocationSuggestion.objects.create(
+            application=Application.objects.create(vacancy=vacancy, candidate=candidate), housing=housing,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(make_user('officer@example.com', is_staff=True))
+
+    def test_projected_and_stored_daily_totals_agree(self):
+        estimator = ExpenseEstimator()
+        projected = estimator.estimate([Decimal('900.00')], ['EUR'], [25])['daily_total'][0]
+        estimator.estimate_suggestions()
+        response = self.client.get(reverse('expense-estimate-list-create'))
+        self.assertEqual(Decimal(response.data['results'][0]['daily_total']), Decimal(str(projected)))
+        self.assertEqual(Decimal(str(projected)), Decimal('24.00'))
+
+    def test_unknown_currency_is_rejected(self):
+        response = self.client.get(reverse('expense-estimate-list-create'), {'currency': 'XXX'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('currency', response.data)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class VacancySearchTests(TestCase):
+    def test_ids_sharing_high_bits_are_indexed_apart(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        # These collided when FTS5 rowids were derived from the top UUID bits.
+        first, _ = (
+            Vacancy.objects.create(
+                id=uuid.UUID(pk), employer=employer, title=title, description='Build', location='Nicosia',
+            )
+            for pk, title in (
+                ('7b5e0c1a-0000-4000-8000-000000000001', 'Python engineer'),
+                ('7b5e0c1a-0000-4000-8000-000000000002', 'Python analyst'),
+            )
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(employer.user)
+        self.assertEqual(self.search('python'), ['Python analyst', 'Python engineer'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.delete()
+        self.assertEqual(self.search('python'), ['Python analyst'])
+
+    def search(self, query):
+        response = self.client.get(reverse('vacancy-search'), {'q': query})
+        return sorted(row['title'] for row in response.data['results'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BulkApplicationTests(TestCase):
+    def test_concurrent_duplicate_is_a_conflict(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        first, second = (
+            Vacancy.objects.create(employer=employer, title=title, description='Build', location='Nicosia')
+            for title in ('Engineer', 'Analyst')
+        )
+        user = make_user('candidate@example.com')
+        candidate = CandidateProfile.objects.create(user=user)
+        client = APIClient()
+        client.force_authenticate(user)
+
+        checked_row_errors = bulk.row_errors
+
+        def row_errors(errors):
+            # Another request applies between the duplicate check and the write.
+            Application.objects.get_or_create(vacancy=second, candidate=candidate)
+            return checked_row_errors(errors)
+
+        with mock.patch('core.bulk.row_errors', row_errors):
+            response = client.post(
+                reverse('application-bulk'), [{'vacancy': str(first.pk)}, {'vacancy': str(second.pk)}], format='json',
+            )
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual([error['row'] for error in response.data['errors']], [1])
+        self.assertEqual(list(Application.objects.values_list('vacancy_id', flat=True)), [second.pk])
+
+
+@override_settings(PROCESSING_MAX_ATTEMPTS=2)
+class ProcessingWorkerTests(TestCase):
+    def test_prepare_errors_fail_the_job_not_the_worker(self):
+        job = ProcessingJob.objects.create(kind='document', target_id=str(uuid.uuid4()))
+        prepare = mock.patch.object(HANDLERS['document'], 'prepare', side_effect=OSError('disk gone'))
+        with prepare, self.assertLogs('core.processing', 'WARNING'):
+            Worker(processes=0).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'queued')
+        self.assertEqual(job.last_error, 'OSError: disk gone')
+
+        ProcessingJob.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        with prepare, self.assertLogs('core.processing', 'WARNING'):
+            Worker(processes=0).run(once=True)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+
+    def test_abandoned_jobs_stop_being_reclaimed(self):
+        long_ago = timezone.now() - timedelta(days=1)
+        retry = ProcessingJob.objects.create(
+            kind='unknown', target_id='1', status='running', attempts=1, locked_at=long_ago,
+        )
+        given_up = ProcessingJob.objects.create(
+            kind='unknown', target_id='2', status='running', attempts=2, locked_at=long_ago,
+        )
+        self.assertEqual(Worker(processes=0).claim(), [retry])
+        given_up.refresh_from_db()
+        self.assertEqual((given_up.status, given_up.last_error), ('failed', 'Worker did not finish the job'))
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        employer = Employer.objects.create(user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test')
+        cls.vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        for i, score in enumerate([50.0, None, 80.0, 50.0, None, 10.0, 50.0]):
+            candidate = CandidateProfile.objects.create(user=make_user(f'candidate{i}@example.com'))
+            application = Application.objects.create(vacancy=cls.vacancy, candidate=candidate)
+            Application.objects.filter(pk=application.pk).update(score=score)
+            AIAssistantInteraction.objects.create(user=cls.employer_user, application=application, message=f'm{i}')
+        cls.application = application
+        for i in range(4):
+            AIAssistantInteraction.objects.create(user=cls.employer_user, application=application, message=f'r{i}')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer_user)
+
+    def pages(self, url):
+        ids, url = [], f'{url}?pagination=cursor&limit=2'
+        while url:
+            data = self.client.get(url).data
+            ids += [row['id'] for row in data['results']]
+            url = data['next']
+        return ids
+
+    def test_cursor_pages_follow_the_view_ordering(self):
+        url = reverse('vacancy-applications', args=[self.vacancy.id])
+        expected = Application.objects.filter(vacancy=self.vacancy).order_by(
+            F('score').desc(nulls_last=True), '-submitted_at', '-pk',
+        )
+        self.assertEqual(self.pages(url), [str(pk) for pk in expected.values_list('pk', flat=True)])
+        self.assertEqual(
+            [row['id'] for row in self.client.get(url, {'limit': 7}).data['results']], self.pages(url),
+        )
+
+        url = reverse('application-ai-interactions', args=[self.application.id])
+        expected = AIAssistantInteraction.objects.filter(application=self.application).order_by('created_at', 'id')
+        self.assertEqual(self.pages(url), [str(pk) for pk in expected.values_list('pk', flat=True)])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ConversationCompactionTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        self.user = make_user('candidate@example.com')
+        candidate = CandidateProfile.objects.create(user=self.user)
+        self.application = Application.objects.create(vacancy=vacancy, candidate=candidate)
+        self.messages = [
+            AIAssistantInteraction.objects.create(
+                user=self.user, application=self.application, role='user', message=f'Question {i}.',
+            )
+            for i in range(10)
+        ]
+
+    def test_compacts_in_batches_up_to_the_window(self):
+        summary = compact(self.user, self.application.pk, keep=2, batch_size=3)
+        self.assertEqual(summary.turns, 8)
+        self.assertEqual(summary.covered_until, self.messages[7].created_at)
+        self.assertEqual(summary.covered_until_id, self.messages[7].pk)
+        self.assertEqual(summary.summary.splitlines()[-1], 'user: Question 7.')
+        self.assertEqual(compact(self.user, self.application.pk, keep=2, batch_size=3).turns, 8)
+
+        recent = window(self.user, self.application.pk, turns=2)
+        self.assertEqual([message.message for message in recent.messages], ['Question 8.', 'Question 9.'])
+        self.assertEqual(recent.pending, 0)
+
+    def test_messages_sharing_a_timestamp_are_split_by_id(self):
+        AIAssistantInteraction.objects.update(created_at=self.messages[0].created_at)
+        ordered = sorted(self.messages, key=lambda message: message.pk)
+        summary = compact(self.user, self.application.pk, keep=2, batch_size=3)
+        self.assertEqual(summary.turns, 8)
+        self.assertEqual(summary.covered_until_id, ordered[7].pk)
+        self.assertEqual(summary.summary.splitlines()[-1], f'user: {ordered[7].message}')
+
+        recent = window(self.user, self.application.pk, turns=2)
+        self.assertEqual(recent.messages, ordered[8:])
+        self.assertEqual(recent.pending, 0)
+
+    def test_deleting_the_application_deletes_its_conversation(self):
+        compact(self.user, self.application.pk, keep=2)
+        self.application.delete()
+        self.assertFalse(ConversationSummary.objects.exists())
+        self.assertFalse(AIAssistantInteraction.objects.exists())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        employer = Employer.objects.create(user=cls.employer_user, company_name='=HYPERLINK("x")', contact_email='hr@acme.test')
+        vacancy = Vacancy.objects.create(employer=employer, title='+Engineer', description='Build', location='Nicosia')
+        other_user = make_user('other@example.com')
+        other = Employer.objects.create(user=other_user, company_name='Other', contact_email='hr@other.test')
+        other_vacancy = Vacancy.objects.create(employer=other, title='Analyst', description='Count', location='Limassol')
+        cls.applications = []
+        for i, (status, day) in enumerate([('applied', 1), ('rejected', 10), ('applied', 20)]):
+            candidate = CandidateProfile.objects.create(user=make_user(f'candidate{i}@example.com'))
+            application = Application.objects.create(vacancy=vacancy, candidate=candidate, status=status)
+            Application.objects.filter(pk=application.pk).update(submitted_at=f'2026-03-{day:02d}T12:00:00Z')
+            cls.applications.append(application)
+            Application.objects.create(vacancy=other_vacancy, candidate=candidate)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.employer_user)
+
+    def export(self, **params):
+        response = self.client.get(reverse('application-export'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def ids(self, **params):
+        return [json.loads(line)['id'] for line in self.export(**params).splitlines()]
+
+    def test_ndjson_lists_only_own_rows_in_date_order(self):
+        self.assertEqual(self.ids(), [str(application.pk) for application in self.applications])
+        row = json.loads(self.export().splitlines()[0])
+        self.assertEqual(row['vacancy_title'], '+Engineer')
+        self.assertEqual(row['candidate_email'], 'candidate0@example.com')
+
+    def test_filters(self):
+        first, second, third = (str(application.pk) for application in self.applications)
+        self.assertEqual(self.ids(status='applied'), [first, third])
+        self.assertEqual(self.ids(status='applied,rejected', since='2026-03-05'), [second, third])
+        self.assertEqual(self.ids(until='2026-03-10'), [first, second])
+        self.assertEqual(self.ids(since='2026-03-10T13:00:00Z', until='2026-03-20'), [third])
+
+    def test_bad_date_and_output_are_rejected(self):
+        response = self.client.get(reverse('application-export'), {'since': 'last week'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', response.data)
+        self.assertEqual(self.client.get(reverse('application-export'), {'until': '2026-02-30'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('application-export'), {'output': 'xlsx'}).status_code, 400)
+
+    def test_csv_neutralizes_formulas(self):
+        rows = list(csv.DictReader(io.StringIO(self.export(output='csv'))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[0]['vacancy_title'], "'+Engineer")
+        self.assertEqual(rows[0]['employer'], '\'=HYPERLINK("x")')
+        self.assertEqual(rows[0]['status'], 'applied')
+
+    def test_non_participants_export_nothing(self):
+        self.client.force_authenticate(make_user('stranger@example.com'))
+        self.assertEqual(self.ids(), [])
+        self.assertEqual(
+            self.client.get(reverse('visa-case-export')).status_code, 200,
+        )
+        VisaCase.objects.create(application=self.applications[0])
+        response = self.client.get(reverse('visa-case-export'))
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SnapshotTests(TransactionTestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+
+    def test_save_and_restore_round_trip(self):
+        employer = Employer.objects.create(user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test')
+        Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        manifest = take_snapshot(self.path)
+        self.assertEqual(manifest['vendor'], connection.vendor)
+
+        Vacancy.objects.all().delete()
+        make_user('late@example.com')
+        cache.set('stale', 'response')
+        restore_snapshot(self.path)
+
+        self.assertEqual(list(Vacancy.objects.values_list('title', flat=True)), ['Engineer'])
+        self.assertFalse(User.objects.filter(email='late@example.com').exists())
+        self.assertIsNone(cache.get('stale'))
+        self.assertEqual(get_backend().count('engineer'), 1)
+
+    def test_restore_rejects_another_schema(self):
+        take_snapshot(self.path)
+        manifest_path = os.path.join(self.path, 'manifest.json')
+        with open(manifest_path, encoding='utf-8') as fp:
+            manifest = json.load(fp)
+        manifest['migrations'].append(['core', '9999_future'])
+        with open(manifest_path, 'w', encoding='utf-8') as fp:
+            json.dump(manifest, fp)
+        with self.assertRaisesMessage(SnapshotError, 'schema does not match'):
+            restore_snapshot(self.path)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SyntheticDataTests(TestCase):
+    volumes = volumes_for_counts(users=40, vacancies=8, applications=60)
+
+    def generate(self):
+        """Runs the generator in a rolled-back savepoint and returns what it wrote."""
+        with transaction.atomic():
+            SyntheticDataGenerator(seed=7, batch_size=25).generate(self.volumes)
+            rows = {
+                'vacancies': list(Vacancy.objects.order_by('pk').values_list('pk', 'title', 'skills', 'employer__user__email')),
+                'applications': list(Application.objects.order_by('pk').values_list(
+                    'pk', 'vacancy_id', 'candidate_id', 'status', 'score',
+                )),
+                'scores': list(MatchScore.objects.order_by('vacancy_id', 'candidate_id').values_list(
+                    'vacancy_id', 'candidate_id', 'score',
+                )),
+                'counters': list(DashboardCounters.objects.order_by('user__email').values_list(
+                    'user__email', 'employer_total_applications', 'employer_pending_applications',
+                    'candidate_total_applications', 'candidate_pending_applications',
+                )),
+            }
+            transaction.set_rollback(True)
+        return rows
+
+    def test_same_seed_gives_the_same_rows_and_scores(self):
+        first = self.generate()
+        self.assertEqual(len(first['applications']), 60)
+        scores = {(vacancy_id, candidate_id): score for vacancy_id, candidate_id, score in first['scores']}
+        self.assertEqual(
+            [score for _, vacancy_id, candidate_id, _, score in first['applications']],
+            [scores.get((vacancy_id, candidate_id), 0.0) for _, vacancy_id, candidate_id, _, _ in first['applications']],
+        )
+        self.assertTrue(any(score > 0 for *_, score in first['applications']))
+        self.assertTrue(first['counters'])
+        self.assertEqual(first, self.generate())
+
+    def test_scale_and_counts_are_exclusive(self):
+        with self.assertRaisesMessage(CommandError, '--scale'):
+            call_command('populate_db', scale=100, users=10, stdout=io.StringIO())
+
+
+class IndexAdvisorTests(SimpleTestCase):
+    def test_full_scan_proposes_equality_then_order(self):
+        sql = (
+            'SELECT "core_vacancy"."id" FROM "core_vacancy" WHERE "core_vacancy"."status" = %s'
+            ' ORDER BY "core_vacancy"."created_at" DESC LIMIT 21'
+        )
+        [access] = _sqlite_accesses(['SCAN core_vacancy'])
+        self.assertEqual((access.table, access.kind, access.sort), ('core_vacancy', 'scan', False))
+        self.assertEqual(propose(sql, access), ('status', 'created_at'))
+
+    def test_partial_index_match_proposes_the_missing_columns(self):
+        sql = (
+            'SELECT "core_application"."id" FROM "core_application" WHERE'
+            ' ("core_application"."vacancy_id" = %s AND "core_application"."status" = %s)'
+        )
+        [access] = _sqlite_accesses(['SEARCH core_application USING INDEX core_application_vacancy_idx (vacancy_id=?)'])
+        self.assertEqual((access.kind, access.matched, access.seek), ('search', 1, ['vacancy_id']))
+        self.assertEqual(propose(sql, access), ('vacancy_id', 'status'))
+
+    def test_sort_after_search_proposes_the_order_columns(self):
+        sql = (
+            'SELECT "core_application"."id" FROM "core_application" WHERE "core_application"."candidate_id" = %s'
+            ' ORDER BY "core_application"."submitted_at" DESC'
+        )
+        search = 'SEARCH core_application USING INDEX core_application_candidate_idx (candidate_id=?)'
+        [sorted_access] = _sqlite_accesses([search, 'USE TEMP B-TREE FOR ORDER BY'])
+        self.assertTrue(sorted_access.sort)
+        self.assertEqual(propose(sql, sorted_access), ('candidate_id', 'submitted_at'))
+        [ordered_access] = _sqlite_accesses([search])
+        self.assertIsNone(propose(sql, ordered_access))
+
+    def test_excluded_values_are_range_columns(self):
+        sql = (
+            'SELECT "core_vacancy"."id" FROM "core_vacancy" WHERE ("core_vacancy"."employer_id" = %s'
+            ' AND NOT ("core_vacancy"."status" IN (%s, %s)) AND "core_vacancy"."expires_at" >= %s)'
+        )
+        equality, ranges, order, referenced = predicate_columns(sql, 'core_vacancy')
+        self.assertEqual(equality, ['employer_id'])
+        self.assertEqual(ranges, ['status', 'expires_at'])
+        self.assertEqual(order, [])
+        self.assertEqual(referenced, ['id', 'employer_id', 'status', 'expires_at'])
+
+    def test_covered_by_an_index_prefix(self):
+        indexes = [('id',), ('employer_id', 'status', 'created_at')]
+        self.assertTrue(covered(('employer_id', 'status'), ['employer_id', 'status'], indexes))
+        self.assertTrue(covered(('status', 'employer_id', 'created_at'), ['status', 'employer_id'], indexes))
+        self.assertFalse(covered(('employer_id', 'created_at'), ['employer_id'], indexes))
+        self.assertFalse(covered(('status',), ['status'], indexes))
+
+    def test_command_rejects_unsupported_databases(self):
+        with mock.patch.object(connection, 'vendor', 'oracle'):
+            with self.assertRaisesMessage(CommandError, 'oracle'):
+                call_command('index_advisor', stdout=io.StringIO())
+
+
+class BenchmarkCompareTests(SimpleTestCase):
+    baseline = {'vacancy_list': {'p95_ms': 40.0, 'max_queries': 5, 'errors': 0}}
+
+    def regressions(self, **stats):
+        return compare({'vacancy_list': {**self.baseline['vacancy_list'], **stats}}, self.baseline)
+
+    def test_nearest_rank(self):
+        values = [5.0, 1.0, 4.0, 2.0, 3.0]
+        self.assertEqual(nearest_rank(values, 0.5), 3.0)
+        self.assertEqual(nearest_rank(values, 0.95), 5.0)
+        self.assertEqual(nearest_rank(values, 0.0), 1.0)
+        self.assertEqual(nearest_rank([], 0.95), 0.0)
+
+    def test_p95_beyond_the_tolerance_regresses(self):
+        self.assertEqual(self.regressions(p95_ms=50.0), [])
+        [regression] = self.regressions(p95_ms=50.5)
+        self.assertIn('vacancy_list: p95 50.5ms > 50.0ms', regression)
+
+    def test_changes_under_the_latency_floor_are_noise(self):
+        baseline = {'dashboard': {'p95_ms': 1.0, 'max_queries': 3}}
+        current = {'dashboard': {'p95_ms': 1.0 + LATENCY_FLOOR_MS, 'max_queries': 3, 'errors': 0}}
+        self.assertEqual(compare(current, baseline), [])
+        current['dashboard']['p95_ms'] += 0.5
+        self.assertEqual(len(compare(current, baseline)), 1)
+
+    def test_extra_queries_and_errors_regress(self):
+        self.assertEqual(self.regressions(max_queries=4), [])
+        self.assertEqual(self.regressions(max_queries=6), ['vacancy_list: 6 queries > baseline 5'])
+        self.assertEqual(self.regressions(errors=2), ['vacancy_list: 2 errors > baseline 0'])
+
+    def test_flows_missing_from_the_baseline_are_skipped(self):
+        self.assertEqual(compare({'apply': {'p95_ms': 900.0, 'max_queries': 90, 'errors': 9}}, self.baseline), [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class BenchmarkDriverTests(TestCase):
+    def test_run_summarizes_every_flow(self):
+        SyntheticDataGenerator(seed=3).generate(volumes_for_scale(400))
+        results = BenchmarkDriver(seed=3).run(requests=3, warmup=1)
+        self.assertEqual(list(results), list(FLOWS))
+        for flow, summary in results.items():
+            with self.subTest(flow=flow):
+                self.assertEqual(summary['requests'], 3)
+                self.assertEqual(summary['errors'], 0)
+                self.assertGreater(summary['max_queries'], 0)
+                self.assertLessEqual(summary['p50_ms'], summary['p95_ms'])
+
+    def test_run_needs_synthetic_users(self):
+        with self.assertRaisesMessage(LookupError, 'populate_db --scale'):
+            BenchmarkDriver(seed=3).run(requests=1)
+
+
+class GeohashTests(SimpleTestCase):
+    def test_encode(self):
+        self.assertEqual(encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(encode(-25.382708, -49.265506, 8), '6gkzwgjz')
+        self.assertEqual(len(encode(35.1856, 33.3823)), 12)
+
+    def test_covering_cells_shrink_with_the_radius(self):
+        latitude, longitude = 35.1856, 33.3823
+        for radius_m, precision in ((100, 7), (1000, 5), (5000, 4), (50000, 3)):
+            with self.subTest(radius_m=radius_m):
+                cells = covering_cells(latitude, longitude, radius_m)
+                self.assertEqual({len(cell) for cell in cells}, {precision})
+                self.assertIn(encode(latitude, longitude, precision), cells)
+                self.assertLessEqual(len(cells), 9)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class HousingNearbyTests(TestCase):
+    center = (35.1856, 33.3823)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('candidate@example.com')
+        latitude, longitude = cls.center
+        # Both lie inside the 5 km bounding box; only the haversine distance tells them apart.
+        cls.inside = HousingListing.objects.create(
+            address='Inside', city='Nicosia', price=Decimal('900'), latitude=latitude + 0.0448, longitude=longitude,
+        )
+        cls.outside = HousingListing.objects.create(
+            address='Corner', city='Nicosia', price=Decimal('800'),
+            latitude=latitude + 0.04, longitude=longitude + 0.04,
+        )
+        HousingListing.objects.create(
+            address='Limassol', city='Limassol', price=Decimal('700'), latitude=34.7071, longitude=33.0226,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def nearby(self, **params):
+        return self.client.get(reverse('housing-nearby'), params)
+
+    def test_radius_is_exact(self):
+        latitude, longitude = self.center
+        response = self.nearby(lat=latitude, lon=longitude, radius_km=5)
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['results']
+        self.assertEqual([row['address'] for row in rows], ['Inside'])
+        self.assertTrue(4900 < rows[0]['distance_m'] <= 5000)
+        self.assertGreater(haversine_m(latitude, longitude, self.outside.latitude, self.outside.longitude), 5000)
+
+        rows = self.nearby(lat=latitude, lon=longitude, radius_km=6).data['results']
+        self.assertEqual([row['address'] for row in rows], ['Inside', 'Corner'])
+
+    def test_bad_coordinates_are_rejected(self):
+        for params in ({}, {'lat': '35.1'}, {'lat': 'north', 'lon': '33.3'}, {'lat': '95', 'lon': '33.3'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.nearby(**params).status_code, 400)
+        self.assertEqual(self.nearby(lat=35.1, lon=33.3, radius_km=500).status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AssistantStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('candidate@example.com')
+        candidate = CandidateProfile.objects.create(user=cls.user)
+        employer = Employer.objects.create(user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test')
+        vacancy = Vacancy.objects.create(employer=employer, title='Engineer', description='Build', location='Nicosia')
+        cls.application = Application.objects.create(vacancy=vacancy, candidate=candidate)
+
+    def setUp(self):
+        self.client = AsyncClient()
+
+    async def post(self, body, token=None):
+        return await self.client.post(
+            reverse('ai-interaction-stream'), data=json.dumps(body), content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'} if token else None,
+        )
+
+    async def test_reply_is_streamed_and_stored(self):
+        token = await sync_to_async(lambda: str(PrincipalAccessToken.for_user(self.user)))()
+        response = await self.post(
+            {'message': 'Which documents?', 'application': str(self.application.pk)}, token,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        body = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        frames = [frame.split('\n', 1) for frame in body.strip().split('\n\n')]
+        self.assertEqual({event for event, _ in frames[:-1]}, {'event: token'})
+        event, data = frames[-1]
+        self.assertEqual(event, 'event: done')
+        done = json.loads(data.removeprefix('data: '))
+        self.assertEqual(done['message'], 'You asked: Which documents? (0 earlier messages in this conversation.)')
+        self.assertEqual(
+            ''.join(json.loads(data.removeprefix('data: '))['text'] for _, data in frames[:-1]), done['message'],
+        )
+
+        stored = [row async for row in AIAssistantInteraction.objects.filter(user=self.user).order_by('role')]
+        self.assertEqual([(row.role, row.message) for row in stored], [
+            ('assistant', done['message']), ('user', 'Which documents?'),
+        ])
+        self.assertEqual(str(stored[0].pk), done['id'])
+        self.assertEqual(stored[0].application_id, self.application.pk)
+        self.assertTrue(stored[0].metadata['complete'])
+
+    async def test_anonymous_requests_are_rejected(self):
+        response = await self.post({'message': 'Hello'})
+        self.assertEqual(response.status_code, 401)
+        response = await self.post({'message': 'Hello'}, 'not-a-token')
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(await AIAssistantInteraction.objects.aexists())
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_and_in_lists_are_collapsed(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM core_vacancy WHERE title = 'it''s' AND salary > 1500.50\n  AND id IN (%s, %s, %s)"),
+            'SELECT * FROM core_vacancy WHERE title = ? AND salary > ? AND id IN (...)',
+        )
+        self.assertEqual(
+            fingerprint('SELECT 1 FROM t WHERE id IN (%s) LIMIT 21'),
+            fingerprint('SELECT 2 FROM t WHERE id IN (%s, %s)  LIMIT 5'),
+        )
+        self.assertEqual(fingerprint('SELECT "core_t2"."id" FROM "core_t2"'), 'SELECT "core_t2"."id" FROM "core_t2"')
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('candidate@example.com')
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'requests.jsonl')
+        override = override_settings(PROFILING_FILE=self.path, PROFILING_FLUSH_INTERVAL=3600)
+        override.enable()
+        self.addCleanup(override.disable)
+        profiling.aggregator.stats = {}
+        self.addCleanup(setattr, profiling.aggregator, 'stats', {})
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_sample_rate_toggles_recording(self):
+        with override_settings(PROFILING_SAMPLE_RATE=0):
+            self.assertEqual(self.client.get(reverse('vacancy-list-create')).status_code, 200)
+        self.assertEqual(profiling.aggregator.stats, {})
+
+        # The first response is cached; sample requests that reach the database.
+        cache.clear()
+        with override_settings(PROFILING_SAMPLE_RATE=1):
+            self.client.get(reverse('vacancy-list-create'))
+            self.client.get(reverse('vacancy-list-create'))
+        [(endpoint, stats)] = profiling.aggregator.stats.items()
+        self.assertEqual(endpoint, 'GET api/vacancies/')
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(sum(stats['buckets']), 2)
+        self.assertGreater(stats['queries'], 0)
+
+    def test_perf_report_merges_flushed_samples(self):
+        def recorder(queries, repeated):
+            recorder = QueryRecorder()
+            recorder.count = queries
+            recorder.fingerprints.update({'SELECT ? FROM core_vacancy': repeated, 'SELECT ? FROM users_user': 1})
+            return recorder
+
+        with override_settings(PROFILING_SAMPLE_RATE=0.5):
+            profiling.aggregator.record('GET api/vacancies/', 4.0, recorder(3, 1))
+            profiling.aggregator.record('GET api/vacancies/', 30.0, recorder(9, 4))
+            self.assertEqual(profiling.aggregator.flush(), 1)
+            profiling.aggregator.record('GET api/vacancies/', 20.0, recorder(6, 3))
+            profiling.aggregator.record('GET api/dashboard/stats/', 1.0, recorder(1, 1))
+            self.assertEqual(profiling.aggregator.flush(), 2)
+
+        out = io.StringIO()
+        call_command('perf_report', file=self.path, sort='queries', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[1].split(), ['GET', 'api/vacancies/', '3', '18.0', '50', '30.0', '6.0', '9', '0.0', '1.7'])
+        self.assertEqual(lines[2].split(), ['7x', 'SELECT', '?', 'FROM', 'core_vacancy'])
+        self.assertEqual(lines[3].split()[:3], ['GET', 'api/dashboard/stats/', '1'])
+
+        with self.assertRaisesMessage(CommandError, 'No profile data'):
+            call_command('perf_report', file=self.path + '.missing', stdout=io.StringIO())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class DashboardCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        employer = Employer.objects.create(user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test')
+        cls.first, cls.second = (
+            Vacancy.objects.create(employer=employer, title=title, description='Build', location='Nicosia')
+            for title in ('Engineer', 'Analyst')
+        )
+        cls.candidate_user = make_user('candidate@example.com')
+        cls.candidate = CandidateProfile.objects.create(user=cls.candidate_user)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def stats(self, user):
+        self.client.force_authenticate(user)
+        response = self.client.get(reverse('dashboard-stats'))
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_signals_keep_counters_current(self):
+        self.assertEqual(self.stats(self.employer_user), {
+            'total_vacancies': 2, 'open_vacancies': 2, 'total_applications': 0, 'pending_applications': 0,
+        })
+        with self.captureOnCommitCallbacks(execute=True):
+            application = Application.objects.create(vacancy=self.first, candidate=self.candidate)
+        self.assertEqual(self.stats(self.employer_user)['pending_applications'], 1)
+        self.assertEqual(self.stats(self.candidate_user), {
+            'total_applications': 1, 'pending_applications': 1, 'accepted_applications': 0,
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application.status = 'accepted'
+            application.save()
+            self.second.status = 'closed'
+            self.second.save()
+        self.assertEqual(self.stats(self.employer_user), {
+            'total_vacancies': 2, 'open_vacancies': 1, 'total_applications': 1, 'pending_applications': 0,
+        })
+        self.assertEqual(self.stats(self.candidate_user), {
+            'total_applications': 1, 'pending_applications': 0, 'accepted_applications': 1,
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            application.delete()
+        self.assertEqual(self.stats(self.candidate_user)['total_applications'], 0)
+        self.assertEqual(self.stats(self.employer_user)['total_applications'], 0)
+
+    def test_bulk_applications_update_counters(self):
+        self.assertEqual(self.stats(self.candidate_user)['total_applications'], 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                reverse('application-bulk'), [{'vacancy': str(self.first.pk)}, {'vacancy': str(self.second.pk)}],
+                format='json',
+            )
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(self.stats(self.candidate_user)['total_applications'], 2)
+        self.assertEqual(self.stats(self.employer_user)['pending_applications'], 2)
+
+    def test_reconcile_repairs_edited_rows(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Application.objects.create(vacancy=self.first, candidate=self.candidate, status='interview')
+        self.assertEqual(reconcile_counters(), 0)
+        DashboardCounters.objects.filter(pk=self.employer_user.pk).update(employer_total_applications=99)
+        self.assertEqual(self.stats(self.employer_user)['total_applications'], 99)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(reconcile_counters(), 1)
+        self.assertEqual(self.stats(self.employer_user)['total_applications'], 1)
+        out = io.StringIO()
+        call_command('reconcile_dashboard_counters', stdout=out)
+        self.assertIn('consistent', out.getvalue())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class RelocationSuggestionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        cls.vacancy = Vacancy.objects.create(
+            employer=employer, title='Engineer', description='Build', location='Nicosia, Cyprus',
+            salary=Decimal('3000'), currency='EUR',
+        )
+        cls.candidates = [
+            CandidateProfile.objects.create(user=make_user(f'candidate{i}@example.com')) for i in range(6)
+        ]
+        cls.accepted = [
+            Application.objects.create(vacancy=cls.vacancy, candidate=candidate, status='accepted')
+            for candidate in cls.candidates[:5]
+        ]
+        Application.objects.create(vacancy=cls.vacancy, candidate=cls.candidates[5], status='applied')
+        for address, city, price, commute in (
+            ('Close', 'Nicosia', '1000', 10), ('Cheap', 'NICOSIA', '900', 20), ('Pricey', 'Nicosia', '1500', 5),
+            ('Far', 'Nicosia', '500', 90), ('Elsewhere', 'Limassol', '400', 5),
+        ):
+            HousingListing.objects.create(
+                address=address, city=city, price=Decimal(price), currency='EUR', commute_minutes=commute,
+            )
+
+    def generate(self, **options):
+        out = io.StringIO()
+        call_command('generate_relocation_suggestions', per_application=2, stdout=out, **options)
+        return out.getvalue()
+
+    def test_suggestions_per_application(self):
+        self.assertIn('Created 10 suggestions for 5 applications', self.generate(chunk_size=2))
+        for application in self.accepted:
+            self.assertEqual(
+                set(application.housing_suggestions.values_list('housing__address', flat=True)), {'Close', 'Cheap'},
+            )
+        reason = RelocationSuggestion.objects.filter(housing__address='Close').values_list('reason', flat=True)[0]
+        self.assertEqual(reason, 'In Nicosia, 10 min commute, 1000.00 EUR/month, 33% of salary')
+        self.assertFalse(RelocationSuggestion.objects.exclude(application__in=self.accepted).exists())
+
+    def test_reruns_only_fill_new_applications(self):
+        self.generate()
+        self.assertIn('Created 0 suggestions for 0 applications', self.generate())
+        self.assertEqual(RelocationSuggestion.objects.count(), 10)
+
+        late = Application.objects.get(candidate=self.candidates[5])
+        late.status = 'accepted'
+        late.save()
+        self.assertIn('Created 2 suggestions for 1 applications', self.generate())
+        self.assertEqual(RelocationSuggestion.objects.count(), 12)
+
+    def test_chunks_split_at_the_chunk_size(self):
+        pks = sorted(application.pk for application in self.accepted)
+        for chunk_size, sizes in ((2, [2, 2, 1]), (5, [5]), (500, [5])):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = list(SuggestionGenerator(chunk_size=chunk_size).chunks())
+                self.assertEqual([len(chunk) for chunk in chunks], sizes)
+                self.assertEqual([application['pk'] for chunk in chunks for application in chunk], pks)
+        with CaptureQueriesContext(connection) as ctx:
+            SuggestionGenerator(chunk_size=2).run()
+        inserts = [query for query in ctx.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MatchRescoreTests(TestCase):
+    def setUp(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        self.candidate = CandidateProfile.objects.create(user=make_user('candidate@example.com'), skills=['python', 'django'])
+        self.vacancy = Vacancy.objects.create(
+            employer=employer, title='Engineer', description='Build things', location='Nicosia', skills=['python'],
+        )
+
+    def queued(self):
+        return list(ProcessingJob.objects.filter(status='queued').values_list('kind', flat=True).order_by('kind'))
+
+    def test_only_skill_changes_queue_a_rescore(self):
+        ProcessingJob.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vacancy.title = 'Senior engineer'
+            self.vacancy.save()
+            Vacancy.objects.get(pk=self.vacancy.pk).save()
+            CandidateProfile.objects.only('id', 'user_id').get(pk=self.candidate.pk).save()
+        self.assertEqual(self.queued(), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vacancy.skills = ['python', 'django']
+            self.vacancy.save()
+            self.vacancy.save()
+            self.candidate.skills = ['python']
+            self.candidate.save()
+        self.assertEqual(self.queued(), ['score_candidate', 'score_vacancy'])
+
+    def test_worker_runs_the_rescore(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vacancy.skills = ['python', 'django']
+            self.vacancy.save()
+        MatchScore.objects.all().delete()
+        Worker(processes=0).run(once=True)
+        self.assertEqual(MatchScore.objects.get(vacancy=self.vacancy, candidate=self.candidate).score, 100.0)
+        self.assertEqual(self.queued(), [])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class CacheInvalidationTests(TestCase):
+    def test_tags_are_bumped_on_commit(self):
+        employer = Employer.objects.create(
+            user=make_user('employer@example.com'), company_name='Acme', contact_email='hr@acme.test',
+        )
+        before = response_cache.versions(['vacancies'])
+        with self.captureOnCommitCallbacks() as callbacks:
+            Vacancy.objects.create(employer=employer, title='Engineer', description='Build things', location='Nicosia')
+            self.assertEqual(response_cache.versions(['vacancies']), before)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(response_cache.versions(['vacancies']), before)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'], JWT_REVOCATION_REFRESH=0,
+)
+class StatelessTokenTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.employer_user = make_user('employer@example.com')
+        cls.employer = Employer.objects.create(
+            user=cls.employer_user, company_name='Acme', contact_email='hr@acme.test',
+        )
+        cls.candidate_user = make_user('candidate@example.com')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def login(self, user):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': user.email, 'password': PASSWORD})
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.data['access'], response.data['refresh']
+
+    def get(self, access, name):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return self.client.get(reverse(name))
+
+    def test_current_claims_authenticate_without_loading_the_user(self):
+        access, _ = self.login(self.employer_user)
+        self.get(access, 'employer-vacancies')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.get(access, 'employer-vacancies')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([query for query in ctx.captured_queries if 'users_user' in query['sql']])
+
+    def test_revoked_access_and_refresh_tokens_are_rejected(self):
+        access, refresh = self.login(self.employer_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('token_revoke'), {'refresh': refresh})
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.get(access, 'employer-vacancies').status_code, 401)
+        self.client.credentials()
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        _, refresh = self.login(self.employer_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 200)
+        self.assertEqual(self.client.post(reverse('token_refresh'), {'refresh': refresh}).status_code, 401)
+
+    def test_revocations_reach_other_processes_without_the_cache(self):
+        access, _ = self.login(self.employer_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('token_revoke'))
+        cache.clear()
+        other_process = TokenRevocations()
+        self.assertTrue(other_process.is_revoked(AccessToken(access).payload))
+
+    def test_deactivation_through_queryset_update_expires_claims(self):
+        access, _ = self.login(self.employer_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.employer_user.pk).update(is_active=False)
+        response = self.get(access, 'employer-vacancies')
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['code'], 'user_inactive')
+
+    def test_new_profile_sends_older_tokens_through_the_database(self):
+        access, refresh = self.login(self.candidate_user)
+        self.assertEqual(self.get(access, 'candidate-applications').status_code, 404)
+        with self.captureOnCommitCallbacks(execute=True):
+            CandidateProfile.objects.create(user=self.candidate_user)
+        self.assertEqual(self.get(access, 'candidate-applications').status_code, 200)
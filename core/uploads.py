@@ -0,0 +1,204 @@
+"""
+Chunked, resumable document uploads with content-addressed storage.
+
+A client opens an ``UploadSession`` declaring the file size, then sends the
+bytes in order as raw ``PUT`` bodies, each carrying its starting offset in
+an ``Upload-Offset`` header. Chunks are streamed straight from the request
+into a part file under ``settings.UPLOAD_TEMP_DIR``; after an interrupted
+transfer the client reads the session's ``received`` offset and continues
+from there.
+
+Completed files are stored once per SHA-256 digest as a ``DocumentBlob``
+under ``blobs/aa/bb/<digest>``; every ``Document`` with the same content
+points at that one file. Deduplication only happens after the server has
+received the bytes and hashed them itself: a digest declared when opening
+the session is a checksum to verify, never proof that the client holds the
+content, so knowing another user's file hash does not grant access to it.
+"""
+import hashlib
+import os
+import tempfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import Document, DocumentBlob, UploadSession
+
+READ_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def part_path(session):
+    return Path(settings.UPLOAD_TEMP_DIR) / f'{session.pk}.part'
+
+
+def blob_name(digest):
+    return f'blobs/{digest[:2]}/{digest[2:4]}/{digest}'
+
+
+def hash_file(fp):
+    digest = hashlib.sha256()
+    for block in iter(lambda: fp.read(READ_SIZE), b''):
+        digest.update(block)
+    fp.seek(0)
+    return digest.hexdigest()
+
+
+def store_blob(fp, digest, size):
+    """Returns the blob for ``digest``, writing ``fp`` to storage only if the content is new."""
+    blob = DocumentBlob.objects.filter(pk=digest).first()
+    if blob is not None:
+        return blob
+    name = blob_name(digest)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, File(fp))
+    try:
+        with transaction.atomic():
+            return DocumentBlob.objects.create(sha256=digest, file=name, size=size)
+    except IntegrityError:
+        # Another upload of the same content won the race.
+        return DocumentBlob.objects.get(pk=digest)
+
+
+def store_uploaded_file(uploaded):
+    """Content-addresses a regular multipart ``UploadedFile``."""
+    digest = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        digest.update(chunk)
+    uploaded.seek(0)
+    return store_blob(uploaded, digest.hexdigest(), uploaded.size)
+
+
+def create_document(session, blob):
+    document = Document.objects.create(
+        owner_id=session.owner_id,
+        application_id=session.application_id,
+        doc_type=session.doc_type,
+        metadata={**(session.metadata or {}), 'filename': session.filename},
+        file=blob.file.name,
+        blob=blob,
+    )
+    session.document = document
+    session.status = 'complete'
+    session.received = session.size
+    session.save(update_fields=['document', 'status', 'received', 'updated_at'])
+    return document
+
+
+def open_session(owner, filename, size, doc_type, application=None, metadata=None, sha256=''):
+    if size > settings.UPLOAD_MAX_SIZE:
+        raise UploadError(f'Files are limited to {settings.UPLOAD_MAX_SIZE} bytes.', 413)
+    session = UploadSession.objects.create(
+        owner=owner,
+        application=application,
+        doc_type=doc_type,
+        metadata=metadata,
+        filename=filename,
+        size=size,
+        sha256=sha256.lower(),
+        expires_at=timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL),
+    )
+    return session
+
+
+def check_chunk(session, offset, length):
+    if session.status != 'open':
+        raise UploadError('Upload is already complete.', 409)
+    if offset != session.received:
+        raise UploadError(f'Expected offset {session.received}.', 409)
+    if session.received + length > session.size:
+        raise UploadError('Chunk runs past the declared file size.')
+
+
+def read_chunk(stream, length):
+    """Buffers ``length`` bytes from ``stream``, spilling to disk past ``FILE_UPLOAD_MAX_MEMORY_SIZE``."""
+    chunk = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE)
+    received = 0
+    while received < length:
+        block = stream.read(min(READ_SIZE, length - received))
+        if not block:
+            break
+        chunk.write(block)
+        received += len(block)
+    if received != length:
+        chunk.close()
+        raise UploadError('Request body ended before Content-Length bytes were received.')
+    chunk.seek(0)
+    return chunk
+
+
+def write_chunk(session_id, owner, offset, stream, length):
+    """
+    Appends ``length`` bytes read from ``stream`` at ``offset``. The chunk is
+    read from the network before the session row is locked, so a slow client
+    never holds the lock; the offset is checked again under the lock so
+    concurrent chunks cannot interleave.
+    """
+    if length > settings.UPLOAD_CHUNK_MAX_SIZE:
+        raise UploadError(f'Chunks are limited to {settings.UPLOAD_CHUNK_MAX_SIZE} bytes.', 413)
+    # Fail fast before reading the body; the check is repeated under the lock.
+    check_chunk(UploadSession.objects.get(pk=session_id, owner=owner), offset, length)
+    with read_chunk(stream, length) as chunk, transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id, owner=owner)
+        check_chunk(session, offset, length)
+        path = part_path(session)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'ab') as part:
+            part.truncate(session.received)
+            for block in iter(lambda: chunk.read(READ_SIZE), b''):
+                part.write(block)
+
+        session.received += length
+        session.expires_at = timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+        session.save(update_fields=['received', 'expires_at', 'updated_at'])
+        return session
+
+
+def complete_session(session_id, owner):
+    with transaction.atomic():
+        session = UploadSession.objects.select_for_update().get(pk=session_id, owner=owner)
+        if session.status == 'complete':
+            return session
+        if session.received != session.size:
+            raise UploadError(f'Received {session.received} of {session.size} bytes.', 409)
+
+        with open(part_path(session), 'rb') as part:
+            digest = hash_file(part)
+            matches = not session.sha256 or digest == session.sha256
+            if matches:
+                create_document(session, store_blob(part, digest, session.size))
+            else:
+                session.received = 0
+                session.save(update_fields=['received', 'updated_at'])
+    discard_part(session)
+    if not matches:
+        raise UploadError('Checksum mismatch; upload the file again from offset 0.')
+    return session
+
+
+def discard_part(session):
+    try:
+        os.remove(part_path(session))
+    except FileNotFoundError:
+        pass
+
+
+def purge_expired_sessions(now=None):
+    """Deletes open sessions past ``expires_at`` with their part files. Returns the count."""
+    expired = UploadSession.objects.filter(status='open', expires_at__lt=now or timezone.now())
+    count = 0
+    for session in expired.iterator():
+        discard_part(session)
+        session.delete()
+        count += 1
+    return count
@@ -1,5 +1,5 @@
 from django.urls import path, include
-from . import views
+from . import assistant, views
 
 urlpatterns = [
     path('employers/', views.EmployerListCreateAPIView.as_view(), name='employer-list-create'),
@@ -9,24 +9,40 @@ urlpatterns = [
     path('candidates/<uuid:pk>/', views.CandidateProfileRetrieveUpdateDestroyAPIView.as_view(), name='candidate-detail'),
     
     path('vacancies/', views.VacancyListCreateAPIView.as_view(), name='vacancy-list-create'),
+    path('vacancies/bulk/', views.VacancyBulkAPIView.as_view(), name='vacancy-bulk'),
+    path('vacancies/search/', views.VacancySearchAPIView.as_view(), name='vacancy-search'),
     path('vacancies/<uuid:pk>/', views.VacancyRetrieveUpdateDestroyAPIView.as_view(), name='vacancy-detail'),
     path('employers/vacancies/', views.VacancyListByEmployerAPIView.as_view(), name='employer-vacancies'),
     
     path('applications/', views.ApplicationListCreateAPIView.as_view(), name='application-list-create'),
+    path('applications/bulk/', views.ApplicationBulkAPIView.as_view(), name='application-bulk'),
+    path('applications/export/', views.ApplicationExportAPIView.as_view(), name='application-export'),
     path('applications/<uuid:pk>/', views.ApplicationRetrieveUpdateDestroyAPIView.as_view(), name='application-detail'),
     path('candidates/applications/', views.ApplicationListByCandidateAPIView.as_view(), name='candidate-applications'),
     path('vacancies/<uuid:vacancy_id>/applications/', views.ApplicationListByVacancyAPIView.as_view(), name='vacancy-applications'),
+    path('candidates/recommendations/', views.CandidateRecommendationListAPIView.as_view(), name='candidate-recommendations'),
+    path('vacancies/<uuid:vacancy_id>/recommendations/', views.VacancyRecommendationListAPIView.as_view(), name='vacancy-recommendations'),
     
     path('documents/', views.DocumentListCreateAPIView.as_view(), name='document-list-create'),
     path('documents/<uuid:pk>/', views.DocumentRetrieveUpdateDestroyAPIView.as_view(), name='document-detail'),
+    path('documents/<uuid:pk>/download/', views.DocumentDownloadAPIView.as_view(), name='document-download'),
+    path('uploads/', views.UploadSessionListCreateAPIView.as_view(), name='upload-list-create'),
+    path('uploads/<uuid:pk>/', views.UploadSessionDetailAPIView.as_view(), name='upload-detail'),
+    path('uploads/<uuid:pk>/complete/', views.UploadSessionCompleteAPIView.as_view(), name='upload-complete'),
     path('users/documents/', views.DocumentListByUserAPIView.as_view(), name='user-documents'),
     path('applications/<uuid:application_id>/documents/', views.DocumentListByApplicationAPIView.as_view(), name='application-documents'),
     
     path('visa-cases/', views.VisaCaseListCreateAPIView.as_view(), name='visa-case-list-create'),
+    path('visa-cases/export/', views.VisaCaseExportAPIView.as_view(), name='visa-case-export'),
     path('visa-cases/<uuid:pk>/', views.VisaCaseRetrieveUpdateDestroyAPIView.as_view(), name='visa-case-detail'),
+    path('visa-cases/<uuid:pk>/steps/', views.VisaCaseStepCreateAPIView.as_view(), name='visa-case-steps'),
     path('officers/visa-cases/', views.VisaCaseListByOfficerAPIView.as_view(), name='officer-visa-cases'),
+    path('officers/visa-cases/queue/', views.OfficerQueueAPIView.as_view(), name='officer-visa-case-queue'),
+    path('officers/visa-cases/next/', views.OfficerClaimNextCaseAPIView.as_view(), name='officer-visa-case-next'),
+    path('officers/workload/', views.OfficerWorkloadListAPIView.as_view(), name='officer-workload'),
     
     path('housing/', views.HousingListingListCreateAPIView.as_view(), name='housing-list-create'),
+    path('housing/nearby/', views.HousingNearbyAPIView.as_view(), name='housing-nearby'),
     path('housing/<uuid:pk>/', views.HousingListingRetrieveUpdateDestroyAPIView.as_view(), name='housing-detail'),
     
     path('relocation-suggestions/', views.RelocationSuggestionListCreateAPIView.as_view(), name='relocation-suggestion-list-create'),
@@ -34,13 +50,17 @@ urlpatterns = [
     path('applications/<uuid:application_id>/relocation-suggestions/', views.RelocationSuggestionListByApplicationAPIView.as_view(), name='application-relocation-suggestions'),
     
     path('expense-estimates/', views.ExpenseEstimateListCreateAPIView.as_view(), name='expense-estimate-list-create'),
+    path('expense-estimates/summary/', views.expense_estimate_summary, name='expense-estimate-summary'),
     path('expense-estimates/<uuid:pk>/', views.ExpenseEstimateRetrieveUpdateDestroyAPIView.as_view(), name='expense-estimate-detail'),
     path('applications/<uuid:application_id>/expense-estimates/', views.ExpenseEstimateListByApplicationAPIView.as_view(), name='application-expense-estimates'),
     
     path('ai-interactions/', views.AIAssistantInteractionListCreateAPIView.as_view(), name='ai-interaction-list-create'),
+    path('ai-interactions/stream/', assistant.assistant_stream, name='ai-interaction-stream'),
     path('ai-interactions/<uuid:pk>/', views.AIAssistantInteractionRetrieveUpdateDestroyAPIView.as_view(), name='ai-interaction-detail'),
     path('users/ai-interactions/', views.AIAssistantInteractionListByUserAPIView.as_view(), name='user-ai-interactions'),
     path('applications/<uuid:application_id>/ai-interactions/', views.AIAssistantInteractionListByApplicationAPIView.as_view(), name='application-ai-interactions'),
+    path('ai-interactions/window/', views.ConversationWindowAPIView.as_view(), name='ai-interaction-window'),
+    path('applications/<uuid:application_id>/ai-interactions/window/', views.ConversationWindowAPIView.as_view(), name='application-ai-interaction-window'),
     
     path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
 ]
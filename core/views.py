@@ -1,21 +1,51 @@
+import mimetypes
+import os
+import uuid
+from decimal import Decimal, InvalidOperation
+
 from rest_framework import generics, permissions, status
+from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
+from django.conf import settings
+from django.db.models import F, Q
+from django.http import Http404
 from django.shortcuts import get_object_or_404
 from .models import (
     Employer, CandidateProfile, Vacancy, Application, Document,
-    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate,
-    AIAssistantInteraction
+    VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate, UploadSession,
+    AIAssistantInteraction, MatchScore, OfficerWorkload
 )
+from .bulk import NDJSONParser, get_rows, write_applications, write_vacancies
+from .caching import CachedResponseMixin, cache_response
+from .conversations import window
+from .counters import get_counters, dashboard_tag
+from .expenses import ExpenseTotalsMixin, summarize_by_vacancy
+from .exports import APPLICATION_EXPORT_FIELDS, VISA_CASE_EXPORT_FIELDS, filter_export, stream_export
+from .fx import get_rates
+from .geo import bounding_box, covering_cells, haversine_m
+from .pagination import KeysetPagination, ApplicationKeysetPagination
+from .permissions import IsApplicationParticipant, visible_visa_cases
+from .principals import candidate_or_404, employer_or_404, get_principal
+from .protected import can_access_document, file_etag, serve_file
+from .querying import QueryPlanMixin, apply_query_plan
+from .search import SearchResults, get_backend
+from .uploads import UploadError, complete_session, discard_part, open_session, store_uploaded_file, write_chunk
+from .visa import annotate_latest_step, filter_latest_step
+from .workload import claim_next_case, officer_queue
 from .serializers import (
     EmployerSerializer, CandidateProfileSerializer, VacancySerializer,
-    ApplicationSerializer, DocumentSerializer, VisaCaseSerializer,
-    HousingListingSerializer, RelocationSuggestionSerializer,
-    ExpenseEstimateSerializer, AIAssistantInteractionSerializer
+    VacancySearchResultSerializer, ApplicationSerializer, DocumentSerializer, VisaCaseSerializer,
+    HousingListingSerializer, HousingNearbySerializer, RelocationSuggestionSerializer,
+    ExpenseEstimateSerializer, ExpenseCohortSerializer, AIAssistantInteractionSerializer, ConversationWindowSerializer,
+    VacancyMatchSerializer, CandidateMatchSerializer, ApplicationBulkSerializer, UploadSessionSerializer,
+    OfficerWorkloadSerializer
 )
 
 
-class EmployerListCreateAPIView(generics.ListCreateAPIView):
+class EmployerListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Employer.objects.all()
     serializer_class = EmployerSerializer
     permission_classes = (permissions.IsAuthenticated,)
@@ -24,13 +54,13 @@ class EmployerListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class EmployerRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class EmployerRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Employer.objects.all()
     serializer_class = EmployerSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class CandidateProfileListCreateAPIView(generics.ListCreateAPIView):
+class CandidateProfileListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = CandidateProfile.objects.all()
     serializer_class = CandidateProfileSerializer
     permission_classes = (permissions.IsAuthenticated,)
@@ -39,263 +69,613 @@ class CandidateProfileListCreateAPIView(generics.ListCreateAPIView):
         serializer.save(user=self.request.user)
 
 
-class CandidateProfileRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class CandidateProfileRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = CandidateProfile.objects.all()
     serializer_class = CandidateProfileSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class VacancyListCreateAPIView(generics.ListCreateAPIView):
+class VacancyListCreateAPIView(CachedResponseMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Vacancy.objects.all()
     serializer_class = VacancySerializer
     permission_classes = (permissions.IsAuthenticated,)
+    cache_tags = ('vacancies', 'employers')
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
-        employer = get_object_or_404(Employer, user=self.request.user)
+        employer = employer_or_404(self.request)
         serializer.save(employer=employer)
 
 
-class VacancyRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class BulkWriteView(generics.GenericAPIView):
+    permission_classes = (permissions.IsAuthenticated,)
+    parser_classes = (JSONParser, NDJSONParser)
+
+    def bulk_response(self, result):
+        if result.errors:
+            code = status.HTTP_409_CONFLICT if result.conflict else status.HTTP_400_BAD_REQUEST
+            return Response({'errors': result.errors}, status=code)
+        return Response(
+            {'created': result.created, 'updated': result.updated},
+            status=status.HTTP_201_CREATED if result.created else status.HTTP_200_OK,
+        )
+
+
+class VacancyBulkAPIView(BulkWriteView):
+    serializer_class = VacancySerializer
+
+    def post(self, request, *args, **kwargs):
+        employer = employer_or_404(request)
+        rows = get_rows(request.data)
+        return self.bulk_response(write_vacancies(
+            employer, rows, self.get_serializer_class(), self.get_serializer_context(),
+        ))
+
+
+class VacancyRetrieveUpdateDestroyAPIView(CachedResponseMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Vacancy.objects.all()
     serializer_class = VacancySerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_cache_tags(self):
+        return [f"vacancy:{self.kwargs['pk']}", 'employers']
+
+
+class VacancySearchAPIView(CachedResponseMixin, generics.ListAPIView):
+    serializer_class = VacancySearchResultSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    cache_tags = ('vacancies', 'employers')
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'q': ['This query parameter is required.']}, status=status.HTTP_400_BAD_REQUEST)
+        backend = get_backend()
+        if backend is None:
+            return Response({'message': 'Search is not supported on this database'},
+                            status=status.HTTP_501_NOT_IMPLEMENTED)
+
+        queryset = apply_query_plan(Vacancy.objects.all(), self.get_serializer_class())
+        page = self.paginate_queryset(SearchResults(query, queryset, backend))
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
 
-class VacancyListByEmployerAPIView(generics.ListAPIView):
+
+class VacancyListByEmployerAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = VacancySerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        employer = get_object_or_404(Employer, user=self.request.user)
+        employer = employer_or_404(self.request)
         return Vacancy.objects.filter(employer=employer)
 
 
-class ApplicationListCreateAPIView(generics.ListCreateAPIView):
+class ApplicationListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = ApplicationKeysetPagination
 
     def perform_create(self, serializer):
-        candidate = get_object_or_404(CandidateProfile, user=self.request.user)
+        candidate = candidate_or_404(self.request)
         serializer.save(candidate=candidate)
 
 
-class ApplicationRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ApplicationExportAPIView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        applications = Application.objects.all()
+        if not request.user.is_staff:
+            applications = applications.filter(vacancy__employer__user=request.user)
+        applications = filter_export(applications, request.query_params, 'submitted_at')
+        return stream_export(
+            applications, APPLICATION_EXPORT_FIELDS, request.query_params.get('output', 'ndjson'), 'applications',
+        )
+
+
+class ApplicationBulkAPIView(BulkWriteView):
+    serializer_class = ApplicationBulkSerializer
+
+    def post(self, request, *args, **kwargs):
+        candidate = candidate_or_404(request)
+        rows = get_rows(request.data)
+        return self.bulk_response(write_applications(
+            candidate, rows, self.get_serializer_class(), self.get_serializer_context(),
+        ))
+
+
+class ApplicationRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class ApplicationListByCandidateAPIView(generics.ListAPIView):
+class ApplicationListByCandidateAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = ApplicationSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = ApplicationKeysetPagination
 
     def get_queryset(self):
-        candidate = get_object_or_404(CandidateProfile, user=self.request.user)
+        candidate = candidate_or_404(self.request)
         return Application.objects.filter(candidate=candidate)
 
 
-class ApplicationListByVacancyAPIView(generics.ListAPIView):
+class ApplicationListByVacancyAPIView(QueryPlanMixin, generics.ListAPIView):
+    """Best match first; unscored applications last."""
     serializer_class = ApplicationSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = ApplicationKeysetPagination
+    ordering = ('-score', '-submitted_at', '-pk')
 
     def get_queryset(self):
         vacancy_id = self.kwargs['vacancy_id']
         vacancy = get_object_or_404(Vacancy, id=vacancy_id)
-        if vacancy.employer.user != self.request.user:
+        if vacancy.employer_id != get_principal(self.request).employer_id:
             return Application.objects.none()
         return Application.objects.filter(vacancy=vacancy)
 
 
-class DocumentListCreateAPIView(generics.ListCreateAPIView):
+class CandidateRecommendationListAPIView(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = VacancyMatchSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        candidate = candidate_or_404(self.request)
+        return MatchScore.objects.filter(candidate=candidate, vacancy__status='open').order_by('-score')
+
+
+class VacancyRecommendationListAPIView(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = CandidateMatchSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        vacancy_id = self.kwargs['vacancy_id']
+        vacancy = get_object_or_404(Vacancy, id=vacancy_id)
+        if vacancy.employer_id != get_principal(self.request).employer_id:
+            return MatchScore.objects.none()
+        return MatchScore.objects.filter(vacancy=vacancy).order_by('-score')
+
+
+class DocumentListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = Document.objects.all()
     serializer_class = DocumentSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def perform_create(self, serializer):
-        serializer.save(owner=self.request.user)
+        uploaded = serializer.validated_data['file']
+        blob = store_uploaded_file(uploaded)
+        metadata = {**(serializer.validated_data.get('metadata') or {}), 'filename': uploaded.name}
+        serializer.save(owner=self.request.user, file=blob.file.name, blob=blob, metadata=metadata)
 
 
-class DocumentRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class DocumentRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = Document.objects.all()
     serializer_class = DocumentSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def perform_update(self, serializer):
+        uploaded = serializer.validated_data.get('file')
+        if uploaded is None:
+            serializer.save()
+            return
+        # New bytes get their own blob, so the ETag, variants and processing metadata start over.
+        blob = store_uploaded_file(uploaded)
+        document = serializer.instance
+        if blob.pk == document.blob_id:
+            metadata = {**(document.metadata or {}), **(serializer.validated_data.get('metadata') or {})}
+        else:
+            metadata = dict(serializer.validated_data.get('metadata') or {})
+        metadata['filename'] = uploaded.name
+        serializer.save(file=blob.file.name, blob=blob, metadata=metadata)
+
+
+class DocumentDownloadAPIView(APIView):
+    """Serves a document, or one of its image variants with ``?variant=``, to users allowed to see it."""
+    permission_classes = (permissions.IsAuthenticated,)
 
-class DocumentListByUserAPIView(generics.ListAPIView):
+    def get(self, request, pk):
+        document = get_object_or_404(
+            Document.objects.select_related(
+                'application__candidate', 'application__vacancy__employer', 'application__visa_case',
+            ),
+            pk=pk,
+        )
+        if not document.file or not can_access_document(request.user, document):
+            raise Http404
+
+        metadata = document.metadata or {}
+        filename = metadata.get('filename') or os.path.basename(document.file.name)
+        variant = request.query_params.get('variant')
+        if variant:
+            name = (metadata.get('variants') or {}).get(variant)
+            if name is None:
+                raise Http404
+            filename = f'{os.path.splitext(filename)[0]}-{os.path.basename(name)}'
+            content_type = mimetypes.guess_type(name)[0]
+            digest = f'{document.blob_id}-{variant}' if document.blob_id else None
+        else:
+            name = document.file.name
+            content_type = metadata.get('content_type') or mimetypes.guess_type(filename)[0]
+            digest = document.blob_id
+
+        try:
+            etag = file_etag(name, digest)
+        except FileNotFoundError:
+            raise Http404
+        return serve_file(request, name, filename, content_type or 'application/octet-stream', etag)
+
+
+class DocumentListByUserAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = DocumentSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
-        return Document.objects.filter(owner=self.request.user)
+        return Document.objects.filter(owner=self.request.user).order_by('-uploaded_at', '-id')
 
 
-class DocumentListByApplicationAPIView(generics.ListAPIView):
+class DocumentListByApplicationAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = DocumentSerializer
+    permission_classes = (permissions.IsAuthenticated, IsApplicationParticipant)
+
+    def get_queryset(self):
+        return Document.objects.filter(application_id=self.kwargs['application_id'])
+
+
+class UploadSessionListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
+    serializer_class = UploadSessionSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
-        application_id = self.kwargs['application_id']
-        application = get_object_or_404(Application, id=application_id)
-        if (application.candidate.user != self.request.user and 
-            application.vacancy.employer.user != self.request.user):
-            return Document.objects.none()
-        return Document.objects.filter(application=application)
+        return UploadSession.objects.filter(owner=self.request.user).order_by('-created_at')
 
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            session = open_session(owner=request.user, **serializer.validated_data)
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=exc.status_code)
+        return Response(self.get_serializer(session).data, status=status.HTTP_201_CREATED)
 
-class VisaCaseListCreateAPIView(generics.ListCreateAPIView):
-    queryset = VisaCase.objects.all()
+
+class UploadSessionDetailAPIView(QueryPlanMixin, generics.RetrieveDestroyAPIView):
+    """``PUT`` appends the raw request body at the ``Upload-Offset`` header."""
+    serializer_class = UploadSessionSerializer
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get_queryset(self):
+        return UploadSession.objects.filter(owner=self.request.user)
+
+    def put(self, request, *args, **kwargs):
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+        except (KeyError, ValueError):
+            return Response({'error': 'Upload-Offset and Content-Length headers are required.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        get_object_or_404(self.get_queryset(), pk=kwargs['pk'])
+        try:
+            session = write_chunk(kwargs['pk'], request.user, offset, request.stream, length)
+        except UploadError as exc:
+            current = UploadSession.objects.filter(pk=kwargs['pk']).values_list('received', flat=True).first()
+            return Response({'error': str(exc), 'received': current}, status=exc.status_code)
+        return Response(self.get_serializer(session).data)
+
+    def perform_destroy(self, instance):
+        discard_part(instance)
+        instance.delete()
+
+
+class UploadSessionCompleteAPIView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, pk):
+        get_object_or_404(UploadSession, pk=pk, owner=request.user)
+        try:
+            session = complete_session(pk, request.user)
+        except UploadError as exc:
+            return Response({'error': str(exc)}, status=exc.status_code)
+        return Response(UploadSessionSerializer(session, context={'request': request}).data)
+
+
+class VisaCaseListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
+    """Staff see every case; other users see, and open cases on, their own applications."""
     serializer_class = VisaCaseSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_queryset(self):
+        cases = annotate_latest_step(visible_visa_cases(get_principal(self.request)))
+        return filter_latest_step(cases, self.request.query_params)
+
 
-class VisaCaseRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = VisaCase.objects.all()
+class VisaCaseRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = VisaCaseSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_queryset(self):
+        return visible_visa_cases(get_principal(self.request))
 
-class VisaCaseListByOfficerAPIView(generics.ListAPIView):
+
+class VisaCaseListByOfficerAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = VisaCaseSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_queryset(self):
-        return VisaCase.objects.filter(assigned_officer=self.request.user)
+        cases = annotate_latest_step(VisaCase.objects.filter(assigned_officer=self.request.user))
+        return filter_latest_step(cases, self.request.query_params)
+
+
+class OfficerQueueAPIView(QueryPlanMixin, generics.ListAPIView):
+    """The current officer's open cases, most urgent due date first."""
+    serializer_class = VisaCaseSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get_queryset(self):
+        return officer_queue(self.request.user)
+
+
+class OfficerClaimNextCaseAPIView(APIView):
+    """Assigns the most urgent unassigned case to the current officer; 204 when the pool is empty."""
+    permission_classes = (permissions.IsAdminUser,)
 
+    def post(self, request, *args, **kwargs):
+        case = claim_next_case(request.user)
+        if case is None:
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        case = apply_query_plan(VisaCase.objects.filter(pk=case.pk), VisaCaseSerializer).get()
+        return Response(VisaCaseSerializer(case, context={'request': request}).data)
 
-class HousingListingListCreateAPIView(generics.ListCreateAPIView):
+
+class OfficerWorkloadListAPIView(QueryPlanMixin, generics.ListAPIView):
+    serializer_class = OfficerWorkloadSerializer
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get_queryset(self):
+        return OfficerWorkload.objects.filter(officer__is_staff=True, officer__is_active=True).order_by(
+            'open_cases', F('next_due_at').desc(nulls_first=True), 'officer_id',
+        )
+
+
+class VisaCaseStepCreateAPIView(APIView):
+    """Appends steps to a case's log; the existing steps are neither read nor rewritten."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, pk):
+        case = get_object_or_404(VisaCase, pk=pk)
+        if not (request.user.is_staff or case.assigned_officer_id == request.user.pk):
+            raise Http404
+        steps = request.data if isinstance(request.data, list) else [request.data]
+        if not steps or not all(isinstance(step, dict) and step for step in steps):
+            return Response({'error': 'Expected a step object or a list of step objects'}, status=status.HTTP_400_BAD_REQUEST)
+        rows = case.add_steps(steps, request.user)
+        return Response({
+            'steps': [row.data for row in rows],
+            'latest_step': rows[-1].data,
+        }, status=status.HTTP_201_CREATED)
+
+
+class VisaCaseExportAPIView(APIView):
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def get(self, request, *args, **kwargs):
+        cases = annotate_latest_step(VisaCase.objects.all())
+        if not request.user.is_staff:
+            cases = cases.filter(assigned_officer=request.user)
+        cases = filter_export(cases, request.query_params, 'created_at')
+        return stream_export(
+            cases, VISA_CASE_EXPORT_FIELDS, request.query_params.get('output', 'ndjson'), 'visa-cases',
+        )
+
+
+class HousingListingListCreateAPIView(CachedResponseMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = HousingListing.objects.all()
     serializer_class = HousingListingSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    cache_tags = ('housing',)
 
 
-class HousingListingRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class HousingListingRetrieveUpdateDestroyAPIView(CachedResponseMixin, QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = HousingListing.objects.all()
     serializer_class = HousingListingSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
+    def get_cache_tags(self):
+        return [f"housing:{self.kwargs['pk']}"]
+
+
+class HousingNearbyAPIView(CachedResponseMixin, generics.ListAPIView):
+    serializer_class = HousingNearbySerializer
+    permission_classes = (permissions.IsAuthenticated,)
+    cache_tags = ('housing', 'vacancies')
+    default_radius_km = 5
+    max_radius_km = 50
+
+    def get_center(self):
+        params = self.request.query_params
+        if 'vacancy' in params:
+            try:
+                vacancy_id = uuid.UUID(params['vacancy'])
+            except ValueError:
+                raise ValidationError({'vacancy': ['Must be a valid UUID.']})
+            vacancy = get_object_or_404(Vacancy, id=vacancy_id)
+            if vacancy.latitude is None or vacancy.longitude is None:
+                raise ValidationError({'vacancy': ['Vacancy has no coordinates.']})
+            return vacancy.latitude, vacancy.longitude
+        try:
+            latitude, longitude = float(params['lat']), float(params['lon'])
+        except (KeyError, ValueError):
+            raise ValidationError({'detail': 'Pass either vacancy or lat and lon.'})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'detail': 'Coordinates are out of range.'})
+        return latitude, longitude
+
+    def get_radius_m(self):
+        try:
+            radius_km = float(self.request.query_params.get('radius_km', self.default_radius_km))
+        except ValueError:
+            raise ValidationError({'radius_km': ['A number is required.']})
+        if not 0 < radius_km <= self.max_radius_km:
+            raise ValidationError({'radius_km': [f'Must be between 0 and {self.max_radius_km}.']})
+        return radius_km * 1000
 
-class RelocationSuggestionListCreateAPIView(generics.ListCreateAPIView):
+    def get_queryset(self):
+        latitude, longitude = self.get_center()
+        radius_m = self.get_radius_m()
+
+        cells = Q()
+        for prefix in covering_cells(latitude, longitude, radius_m):
+            cells |= Q(geohash__gte=prefix, geohash__lt=prefix + '{')
+        queryset = HousingListing.objects.filter(cells)
+        min_lat, max_lat, min_lon, max_lon = bounding_box(latitude, longitude, radius_m)
+        queryset = queryset.filter(latitude__range=(min_lat, max_lat))
+        if -180 <= min_lon and max_lon <= 180:
+            queryset = queryset.filter(longitude__range=(min_lon, max_lon))
+        if 'max_price' in self.request.query_params:
+            try:
+                max_price = Decimal(self.request.query_params['max_price'])
+            except InvalidOperation:
+                raise ValidationError({'max_price': ['A number is required.']})
+            queryset = queryset.filter(price__lte=max_price)
+
+        nearby = []
+        for listing in queryset:
+            listing.distance_m = round(haversine_m(latitude, longitude, listing.latitude, listing.longitude))
+            if listing.distance_m <= radius_m:
+                nearby.append(listing)
+        nearby.sort(key=lambda listing: (listing.distance_m, listing.price))
+        return nearby
+
+
+class RelocationSuggestionListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = RelocationSuggestion.objects.all()
     serializer_class = RelocationSuggestionSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class RelocationSuggestionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class RelocationSuggestionRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = RelocationSuggestion.objects.all()
     serializer_class = RelocationSuggestionSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class RelocationSuggestionListByApplicationAPIView(generics.ListAPIView):
+class RelocationSuggestionListByApplicationAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = RelocationSuggestionSerializer
-    permission_classes = (permissions.IsAuthenticated,)
+    permission_classes = (permissions.IsAuthenticated, IsApplicationParticipant)
 
     def get_queryset(self):
-        application_id = self.kwargs['application_id']
-        application = get_object_or_404(Application, id=application_id)
-        if (application.candidate.user != self.request.user and 
-            application.vacancy.employer.user != self.request.user):
-            return RelocationSuggestion.objects.none()
-        return RelocationSuggestion.objects.filter(application=application)
+        return RelocationSuggestion.objects.filter(application_id=self.kwargs['application_id'])
 
 
-class ExpenseEstimateListCreateAPIView(generics.ListCreateAPIView):
+class ExpenseEstimateListCreateAPIView(ExpenseTotalsMixin, QueryPlanMixin, generics.ListCreateAPIView):
     queryset = ExpenseEstimate.objects.all()
     serializer_class = ExpenseEstimateSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class ExpenseEstimateRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class ExpenseEstimateRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = ExpenseEstimate.objects.all()
     serializer_class = ExpenseEstimateSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class ExpenseEstimateListByApplicationAPIView(generics.ListAPIView):
+class ExpenseEstimateListByApplicationAPIView(ExpenseTotalsMixin, QueryPlanMixin, generics.ListAPIView):
     serializer_class = ExpenseEstimateSerializer
-    permission_classes = (permissions.IsAuthenticated,)
+    permission_classes = (permissions.IsAuthenticated, IsApplicationParticipant)
 
     def get_queryset(self):
-        application_id = self.kwargs['application_id']
-        application = get_object_or_404(Application, id=application_id)
-        if (application.candidate.user != self.request.user and 
-            application.vacancy.employer.user != self.request.user):
-            return ExpenseEstimate.objects.none()
-        return ExpenseEstimate.objects.filter(application=application)
+        return ExpenseEstimate.objects.filter(application_id=self.kwargs['application_id'])
 
 
-class AIAssistantInteractionListCreateAPIView(generics.ListCreateAPIView):
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def expense_estimate_summary(request):
+    currency = request.query_params.get('currency', 'EUR')
+    if currency not in get_rates().rates:
+        return Response({'error': f'Unknown currency {currency}'}, status=status.HTTP_400_BAD_REQUEST)
+
+    estimates = ExpenseEstimate.objects.all()
+    if not request.user.is_staff:
+        estimates = estimates.filter(application__vacancy__employer__user=request.user)
+    return Response({
+        'currency': currency,
+        'cohorts': ExpenseCohortSerializer(summarize_by_vacancy(estimates, currency), many=True).data,
+    })
+
+
+class AIAssistantInteractionListCreateAPIView(QueryPlanMixin, generics.ListCreateAPIView):
     queryset = AIAssistantInteraction.objects.all()
     serializer_class = AIAssistantInteractionSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
 
 
-class AIAssistantInteractionRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class AIAssistantInteractionRetrieveUpdateDestroyAPIView(QueryPlanMixin, generics.RetrieveUpdateDestroyAPIView):
     queryset = AIAssistantInteraction.objects.all()
     serializer_class = AIAssistantInteractionSerializer
     permission_classes = (permissions.IsAuthenticated,)
 
 
-class AIAssistantInteractionListByUserAPIView(generics.ListAPIView):
+class AIAssistantInteractionListByUserAPIView(QueryPlanMixin, generics.ListAPIView):
     serializer_class = AIAssistantInteractionSerializer
     permission_classes = (permissions.IsAuthenticated,)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         return AIAssistantInteraction.objects.filter(user=self.request.user)
 
 
-class AIAssistantInteractionListByApplicationAPIView(generics.ListAPIView):
+class AIAssistantInteractionListByApplicationAPIView(QueryPlanMixin, generics.ListAPIView):
+    """The conversation oldest first."""
     serializer_class = AIAssistantInteractionSerializer
-    permission_classes = (permissions.IsAuthenticated,)
+    permission_classes = (permissions.IsAuthenticated, IsApplicationParticipant)
+    pagination_class = KeysetPagination
+    ordering = ('created_at', 'id')
 
     def get_queryset(self):
-        application_id = self.kwargs['application_id']
-        application = get_object_or_404(Application, id=application_id)
-        if (application.candidate.user != self.request.user and 
-            application.vacancy.employer.user != self.request.user):
-            return AIAssistantInteraction.objects.none()
-        return AIAssistantInteraction.objects.filter(application=application)
+        return AIAssistantInteraction.objects.filter(application_id=self.kwargs['application_id'])
+
+
+class ConversationWindowAPIView(APIView):
+    """The caller's last ``?turns=`` messages (oldest first) plus the summary of older turns."""
+    permission_classes = (permissions.IsAuthenticated, IsApplicationParticipant)
+    max_turns = 100
+
+    def get(self, request, application_id=None):
+        try:
+            turns = min(int(request.query_params.get('turns', settings.CONVERSATION_WINDOW)), self.max_turns)
+        except ValueError:
+            return Response({'error': 'turns must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if turns < 1:
+            return Response({'error': 'turns must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ConversationWindowSerializer(window(request.user, application_id, turns)).data)
 
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
+@cache_response(lambda request: [dashboard_tag(request.user.pk)], per_user=True)
 def dashboard_stats(request):
-    user = request.user
-    
-    try:
-        employer = Employer.objects.get(user=user)
+    counters = get_counters(request.user)
+
+    if counters is not None and counters.is_employer:
         employer_stats = {
-            'total_vacancies': Vacancy.objects.filter(employer=employer).count(),
-            'open_vacancies': Vacancy.objects.filter(employer=employer, status='open').count(),
-            'total_applications': Application.objects.filter(vacancy__employer=employer).count(),
-            'pending_applications': Application.objects.filter(
-                vacancy__employer=employer, 
-                status__in=['applied', 'screening']
-            ).count(),
+            'total_vacancies': counters.employer_total_vacancies,
+            'open_vacancies': counters.employer_open_vacancies,
+            'total_applications': counters.employer_total_applications,
+            'pending_applications': counters.employer_pending_applications,
         }
         return Response(employer_stats)
-    except Employer.DoesNotExist:
-        pass
-    
-    try:
-        candidate = CandidateProfile.objects.get(user=user)
+
+    if counters is not None and counters.is_candidate:
         candidate_stats = {
-            'total_applications': Application.objects.filter(candidate=candidate).count(),
-            'pending_applications': Application.objects.filter(
-                candidate=candidate, 
-                status__in=['applied', 'screening', 'interview']
-            ).count(),
-            'accepted_applications': Application.objects.filter(
-                candidate=candidate, 
-                status='accepted'
-            ).count(),
+            'total_applications': counters.candidate_total_applications,
+            'pending_applications': counters.candidate_pending_applications,
+            'accepted_applications': counters.candidate_accepted_applications,
         }
         return Response(candidate_stats)
-    except CandidateProfile.DoesNotExist:
-        pass
-    
-    return Response({'message': 'No profile found'}, status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+
+    return Response({'message': 'No profile found'}, status=status.HTTP_404_NOT_FOUND)
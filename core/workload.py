@@ -0,0 +1,151 @@
+"""
+Visa officer workload and case assignment.
+
+``OfficerWorkload`` keeps one row per staff officer: their count of open
+cases and their earliest due date. The ``VisaCase`` signal handlers in
+``core.signals`` keep those rows current with one ``UPDATE`` per change.
+New cases go to the least-loaded officer, with ties broken by the later
+``next_due_at`` and then by whoever was assigned least recently. Officers can
+also pull the most urgent unassigned case from the pool with
+:func:`claim_next_case`.
+
+Both paths lock candidate rows with ``select_for_update(skip_locked=True)``
+where the database supports it. Both then set ``assigned_officer`` with a
+conditional ``UPDATE ... WHERE assigned_officer IS NULL``. As a result a case
+is never handed to two officers, even on databases that have no row locks.
+:func:`reconcile_workloads` (``manage.py reconcile_officer_workloads``)
+recomputes the rows and repairs drift left by writes that bypass signals.
+It runs at deploy time and, for one user, whenever a user becomes an active
+staff member; assignment itself never rebuilds rows, so an officer without a
+row is not offered cases until then.
+"""
+from django.db import connection, transaction
+from django.db.models import Count, F, Min, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from users.models import User
+from .models import OfficerWorkload, VisaCase
+
+CLOSED_VISA_STATUSES = ('approved', 'rejected', 'closed', 'withdrawn')
+CLAIM_ATTEMPTS = 5
+
+
+def is_open(status):
+    return status is not None and status not in CLOSED_VISA_STATUSES
+
+
+def open_cases(officer_id=None):
+    cases = VisaCase.objects.exclude(status__in=CLOSED_VISA_STATUSES)
+    return cases if officer_id is None else cases.filter(assigned_officer_id=officer_id)
+
+
+def _next_due(officer_id):
+    earliest = open_cases().filter(assigned_officer_id=officer_id, due_at__isnull=False).order_by('due_at')
+    return Subquery(earliest.values('due_at')[:1])
+
+
+def workload_changed(old_officer_id, new_officer_id, old_open, new_open, due_changed=False):
+    """Applies one case's move between officers and/or open states to their workload rows."""
+    deltas = {}
+    if old_officer_id is not None:
+        deltas[old_officer_id] = -int(old_open)
+    if new_officer_id is not None:
+        deltas[new_officer_id] = deltas.get(new_officer_id, 0) + int(new_open)
+    for officer_id, delta in deltas.items():
+        if delta or due_changed or old_officer_id != new_officer_id:
+            OfficerWorkload.objects.filter(pk=officer_id).update(
+                open_cases=F('open_cases') + delta, next_due_at=_next_due(officer_id),
+            )
+
+
+def officer_queue(officer):
+    """The officer's open cases, most urgent first; served by ``(assigned_officer, status, due_at)``."""
+    return open_cases(officer.pk).order_by(F('due_at').asc(nulls_last=True), 'created_at', 'id')
+
+
+def _locked(queryset):
+    if connection.features.has_select_for_update_skip_locked:
+        return queryset.select_for_update(skip_locked=True, of=('self',))
+    return queryset
+
+
+def _take(case_id, officer_id, now):
+    taken = VisaCase.objects.filter(pk=case_id, assigned_officer__isnull=True).update(
+        assigned_officer_id=officer_id, updated_at=now,
+    )
+    if taken:
+        OfficerWorkload.objects.filter(pk=officer_id).update(
+            open_cases=F('open_cases') + 1, next_due_at=_next_due(officer_id), last_assigned_at=now,
+        )
+    return bool(taken)
+
+
+def pick_officer():
+    """Locks and returns the workload row of the officer who should get the next case, or ``None``."""
+    candidates = OfficerWorkload.objects.filter(officer__is_staff=True, officer__is_active=True).order_by(
+        'open_cases', F('next_due_at').desc(nulls_first=True),
+        F('last_assigned_at').asc(nulls_first=True), 'officer_id',
+    )
+    return _locked(candidates).first()
+
+
+def assign_case(case):
+    """Gives an unassigned open case to the least-loaded officer. Returns the officer or ``None``."""
+    if case.assigned_officer_id is not None or not is_open(case.status):
+        return None
+    with transaction.atomic():
+        workload = pick_officer()
+        if workload is None:
+            return None
+        if not _take(case.pk, workload.officer_id, timezone.now()):
+            return None
+    case.assigned_officer_id = workload.officer_id
+    case._workload_state = (case.assigned_officer_id, True, case.due_at)
+    return workload.officer
+
+
+def claim_next_case(officer):
+    """Assigns the most urgent unassigned open case to ``officer`` and returns it, or ``None``."""
+    pool = open_cases().filter(assigned_officer__isnull=True).order_by(
+        F('due_at').asc(nulls_last=True), 'created_at', 'id',
+    )
+    for _ in range(CLAIM_ATTEMPTS):
+        with transaction.atomic():
+            case = _locked(pool).first()
+            if case is None:
+                return None
+            if _take(case.pk, officer.pk, timezone.now()):
+                return VisaCase.objects.get(pk=case.pk)
+    return None
+
+
+def reconcile_workloads(officer_ids=None):
+    """
+    Recomputes the workload rows of every active staff officer, or of those
+    among ``officer_ids``. Returns the number of rows written.
+    """
+    officers = User.objects.filter(is_staff=True, is_active=True)
+    if officer_ids is not None:
+        officers = officers.filter(pk__in=officer_ids)
+    officers = officers.annotate(
+        open_count=Count('assigned_cases', filter=~Q(assigned_cases__status__in=CLOSED_VISA_STATUSES)),
+        earliest_due=Min('assigned_cases__due_at', filter=~Q(assigned_cases__status__in=CLOSED_VISA_STATUSES)),
+        last_assigned=Subquery(
+            OfficerWorkload.objects.filter(pk=OuterRef('pk')).values('last_assigned_at')[:1]
+        ),
+    )
+    rows = [
+        OfficerWorkload(
+            officer_id=officer.pk, open_cases=officer.open_count,
+            next_due_at=officer.earliest_due, last_assigned_at=officer.last_assigned,
+        )
+        for officer in officers
+    ]
+    OfficerWorkload.objects.bulk_create(
+        rows,
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=['officer'],
+        update_fields=['open_cases', 'next_due_at', 'updated_at'],
+    )
+    return len(rows)
@@ -5,6 +5,7 @@ import {
   ScrollView,
   RefreshControl,
   Alert,
+  Image,
 } from 'react-native';
 import {
   Text,
@@ -19,6 +20,7 @@ import {
   IconButton,
 } from 'react-native-paper';
 import * as DocumentPicker from 'expo-document-picker';
+import AsyncStorage from '@react-native-async-storage/async-storage';
 import { coreAPI } from '../services/api';
 
 const DocumentsScreen = ({ navigation }) => {
@@ -26,9 +28,12 @@ const DocumentsScreen = ({ navigation }) => {
   const [loading, setLoading] = useState(true);
   const [refreshing, setRefreshing] = useState(false);
   const [uploading, setUploading] = useState(false);
+  const [authToken, setAuthToken] = useState(null);
 
   useEffect(() => {
     loadDocuments();
+    // Thumbnails are served by the authorized download view.
+    AsyncStorage.getItem('access_token').then(setAuthToken);
   }, []);
 
   const loadDocuments = async () => {
@@ -203,6 +208,17 @@ const DocumentsScreen = ({ navigation }) => {
                   />
                 </View>
 
+                {document.thumbnails && document.thumbnails.thumb_webp && (
+                  <Image
+                    source={{
+                      uri: document.thumbnails.thumb_webp,
+                      headers: authToken ? { Authorization: `Bearer ${authToken}` } : undefined,
+                    }}
+                    style={styles.thumbnail}
+                    resizeMode="cover"
+                  />
+                )}
+
                 {document.application && (
                   <View style={styles.applicationInfo}>
                     <Text style={styles.applicationEmoji}>📋</Text>
@@ -334,6 +350,13 @@ const styles = StyleSheet.create({
     color: '#757575',
     flex: 1,
   },
+  thumbnail: {
+    width: '100%',
+    height: 160,
+    borderRadius: 8,
+    marginBottom: 12,
+    backgroundColor: '#EEEEEE',
+  },
   metadataContainer: {
     flexDirection: 'row',
     flexWrap: 'wrap',
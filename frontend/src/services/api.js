@@ -58,6 +58,12 @@ api.interceptors.response.use(
   }
 );
 
+// Keyset pagination opt-in for endlessly scrolled feeds. Pass the `cursor`
+// from the previous page's `next` link, or nothing for the first page.
+const cursorPage = (cursor) => ({
+  params: cursor ? { pagination: 'cursor', cursor } : { pagination: 'cursor' },
+});
+
 // Auth API
 export const authAPI = {
   login: (email, password) => 
@@ -87,6 +93,7 @@ export const coreAPI = {
   
   // Vacancies
   getVacancies: () => api.get('/vacancies/'),
+  getVacanciesFeed: (cursor) => api.get('/vacancies/', cursorPage(cursor)),
   getVacancy: (id) => api.get(`/vacancies/${id}/`),
   createVacancy: (data) => api.post('/vacancies/', data),
   updateVacancy: (id, data) => api.put(`/vacancies/${id}/`, data),
@@ -98,6 +105,7 @@ export const coreAPI = {
   createApplication: (data) => api.post('/applications/', data),
   updateApplication: (id, data) => api.put(`/applications/${id}/`, data),
   getCandidateApplications: () => api.get('/candidates/applications/'),
+  getCandidateApplicationsFeed: (cursor) => api.get('/candidates/applications/', cursorPage(cursor)),
   getVacancyApplications: (vacancyId) => api.get(`/vacancies/${vacancyId}/applications/`),
   
   // Documents
@@ -142,6 +150,7 @@ export const coreAPI = {
   getAIInteraction: (id) => api.get(`/ai-interactions/${id}/`),
   createAIInteraction: (data) => api.post('/ai-interactions/', data),
   getUserAIInteractions: () => api.get('/users/ai-interactions/'),
+  getUserAIInteractionsFeed: (cursor) => api.get('/users/ai-interactions/', cursorPage(cursor)),
   getApplicationAIInteractions: (applicationId) => 
     api.get(`/applications/${applicationId}/ai-interactions/`),
   
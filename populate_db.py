@@ -2,8 +2,10 @@
 """
 Скрипт для популяции базы данных тестовыми данными
 Запуск: python manage.py shell < populate_db.py
+Синтетические данные: python populate_db.py --users 250000 --vacancies 100000 --applications 1000000 --seed 0
 """
 
+import argparse
 import os
 import sys
 import django
@@ -21,6 +23,7 @@ from core.models import (
     VisaCase, HousingListing, RelocationSuggestion, ExpenseEstimate,
     AIAssistantInteraction
 )
+from core.synthetic import SyntheticDataGenerator, volumes_for_counts
 
 User = get_user_model()
 
@@ -291,10 +294,13 @@ def create_test_data():
     ]
     
     for visa_data in visa_cases_data:
+        steps = visa_data.pop('steps')
         visa_case, created = VisaCase.objects.get_or_create(
             application=visa_data['application'],
             defaults=visa_data
         )
+        if created:
+            visa_case.add_steps(steps, visa_data['assigned_officer'])
         print(f"Создано визовое дело для заявки: {visa_case.application.id}")
     
     # Создание предложений жилья
@@ -453,5 +459,21 @@ def create_test_data():
     print(f"- Оценок расходов: {ExpenseEstimate.objects.count()}")
     print(f"- AI взаимодействий: {AIAssistantInteraction.objects.count()}")
 
+def create_synthetic_data(users=None, vacancies=None, applications=None, seed=0):
+    """Детерминированные синтетические данные через bulk_create (см. core/synthetic.py)"""
+    volumes = volumes_for_counts(users=users, vacancies=vacancies, applications=applications)
+    print("Генерация синтетических данных: " + ", ".join(f"{name}={count}" for name, count in volumes.items()))
+    SyntheticDataGenerator(seed=seed, log=print).generate(volumes)
+
+
 if __name__ == '__main__':
-    create_test_data()
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int)
+    parser.add_argument('--vacancies', type=int)
+    parser.add_argument('--applications', type=int)
+    parser.add_argument('--seed', type=int, default=0)
+    args, _ = parser.parse_known_args()
+    if args.users or args.vacancies or args.applications:
+        create_synthetic_data(args.users, args.vacancies, args.applications, args.seed)
+    else:
+        create_test_data()
@@ -5,9 +5,29 @@ from django.core.exceptions import ValidationError
 from django.db import models, transaction
 from phonenumber_field.modelfields import PhoneNumberField
 from tools.validators import validate_password
+from .signals import claims_changed
 
+CLAIMED_FIELDS = {'is_active', 'is_staff'}
 
-class CustomUserManager(UserManager):
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        if CLAIMED_FIELDS.isdisjoint(kwargs):
+            return super().update(**kwargs)
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        claims_changed.send(sender=self.model, user_ids=user_ids)
+        return rows
+
+    def bulk_update(self, objs, fields, batch_size=None):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, batch_size=batch_size)
+        if not CLAIMED_FIELDS.isdisjoint(fields):
+            claims_changed.send(sender=self.model, user_ids=[obj.pk for obj in objs])
+        return rows
+
+
+class CustomUserManager(UserManager.from_queryset(UserQuerySet)):
     @transaction.atomic
     def _create(self, email, password, **extra):
         email = self.normalize_email(email)
@@ -44,6 +64,7 @@ class User(AbstractUser):
     last_name = models.CharField(max_length=30, null=True, blank=True)
 
     profile_pic = models.ImageField(upload_to="users/profile_pics/", null=True, blank=True)
+    profile_pic_variants = models.JSONField(null=True, blank=True)
 
     member_since = models.DateTimeField(null=True, blank=True)
     is_verified = models.BooleanField(default=False)
@@ -1,10 +1,15 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from core.media import variant_urls
 from tools.validators import validate_password
 from .models import User
 
 
 class UserSerializer(serializers.ModelSerializer):
     profile_pic = serializers.ImageField(use_url=True)
+    profile_pic_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -14,8 +19,12 @@ class UserSerializer(serializers.ModelSerializer):
             'email',
             'phone',
             'profile_pic',
+            'profile_pic_thumbnails',
         ]
 
+    def get_profile_pic_thumbnails(self, user):
+        return variant_urls(user.profile_pic_variants, self.context.get('request'))
+
 
 class UserRegisterSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, style={'input_type': 'password'}, validators=[validate_password])
@@ -44,3 +53,16 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         password = validated_data.pop('password')
         user = User.objects.create_user(password=password, **validated_data)
         return user
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as exc:
+            raise serializers.ValidationError(exc.args[0])
+        if str(token.get(api_settings.USER_ID_CLAIM)) != str(self.context['request'].user.pk):
+            raise serializers.ValidationError('Token belongs to another user')
+        return token
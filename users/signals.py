@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent with ``user_ids`` when QuerySet.update() or bulk_update() writes fields
+# that access tokens carry as claims; model signals do not fire for those.
+claims_changed = Signal()
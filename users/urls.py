@@ -9,5 +9,6 @@ urlpatterns = [
     path('register/', UserRegisterAPIView.as_view(), name='register'),
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/revoke/', TokenRevokeAPIView.as_view(), name='token_revoke'),
     path('me/', ProfileAPIView.as_view(), name='profile'),
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
 from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from core.authentication import revoke_token
 from .models import User
-from .serializers import UserRegisterSerializer, UserSerializer
+from .serializers import TokenRevokeSerializer, UserRegisterSerializer, UserSerializer
 
 
 class UserRegisterAPIView(generics.CreateAPIView):
@@ -27,4 +29,23 @@ class ProfileAPIView(generics.RetrieveUpdateAPIView):
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
-        return self.request.user
+        user = self.request.user
+        deferred = user.get_deferred_fields()
+        if deferred:
+            # Token-authenticated requests carry a partial user; see core/authentication.py.
+            user.refresh_from_db(fields=deferred)
+        return user
+
+
+class TokenRevokeAPIView(APIView):
+    """Revokes the access token the request is made with and, if given, a refresh token."""
+    permission_classes = (permissions.IsAuthenticated,)
+
+    def post(self, request, *args, **kwargs):
+        serializer = TokenRevokeSerializer(data=request.data, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        if request.auth is not None:
+            revoke_token(request.auth.payload)
+        if 'refresh' in serializer.validated_data:
+            revoke_token(serializer.validated_data['refresh'].payload)
+        return Response(status=status.HTTP_204_NO_CONTENT)